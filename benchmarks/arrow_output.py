@@ -0,0 +1,60 @@
+"""
+Benchmark of output="arrow" against converting the pandas result of get_var_data to Arrow
+(pa.Table.from_pandas), starting from the decoded DataArrays.
+
+Usage:
+    pip install -e .[arrow]
+    python benchmarks/arrow_output.py [--rows 10000000] [--channels 4] [--repeat 3]
+
+Prints the best time and the peak of newly allocated memory of each variant.
+"""
+
+import argparse
+
+import numpy as np
+import pyarrow as pa
+
+from dataframe_build import measure
+from gimodules.cloudconnect.cloud_request import CloudRequest
+from gimodules.cloudconnect.decoder import DataArrays
+from gimodules.cloudconnect.output import OutputFormat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Rows of the result")
+    parser.add_argument("--channels", type=int, default=4, help="Value columns")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    args = parser.parse_args()
+
+    # Column-major values and ns timestamps, as decoded for get_var_data
+    data = DataArrays(
+        (1_700_000_000_000_000_000 + np.arange(args.rows) * 100_000).reshape(-1, 1),
+        np.asfortranarray(np.random.default_rng(0).random((args.rows, args.channels))),
+        time_unit="ns",
+    )
+    column_names = ["Time"] + [f"a{i}" for i in range(args.channels)]
+    index_list = column_names[1:]
+    client = CloudRequest()
+
+    def via_pandas() -> pa.Table:
+        df = client._build_output(
+            data, "", index_list, "nanos", OutputFormat.PANDAS, column_names, "Europe/Vienna"
+        )
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    variants = {
+        "pandas + from_pandas": via_pandas,
+        "output=arrow": lambda: client._build_output(
+            data, "", index_list, "nanos", OutputFormat.ARROW, column_names, "Europe/Vienna"
+        ),
+    }
+    size = (data.timestamps.nbytes + data.values.nbytes) / 2**20
+    print(f"{args.rows} rows x {args.channels} channels ({size:.0f} MB decoded)")
+    for label, func in variants.items():
+        seconds, peak = measure(func, args.repeat)
+        print(f"  {label:<26}{seconds * 1000:>10.1f} ms{peak:>10.0f} MB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark of get_var_data_batched (parallel GraphQL time slices) against get_data_as_csv
+(exportCSV) on a real tenant.
+
+Usage (variables can also be given in a .env file):
+    export GI_URL=https://example.gi-cloud.io GI_ACCESS_TOKEN=... GI_SID=<stream id>
+    export GI_INDICES=a1,a2 GI_START="2024-01-01 00:00:00" GI_END="2024-01-02 00:00:00"
+    python benchmarks/batched_fetch.py [--resolution HZ10] [--workers 8] [--repeat 3]
+"""
+
+import argparse
+import os
+import time
+
+from dotenv import load_dotenv
+
+from gimodules.cloudconnect.cloud_request import CloudRequest
+
+
+def best_time(func, repeat: int):
+    """Returns the fastest of repeat runs in seconds and the last result."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolution", default="HZ10", help="Resolution of both methods")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent time slices")
+    parser.add_argument("--max-points", type=int, default=700_000, help="Values per slice")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    args = parser.parse_args()
+    load_dotenv()
+
+    sid = os.environ["GI_SID"]
+    indices = os.environ["GI_INDICES"].split(",")
+    start, end = os.environ["GI_START"], os.environ["GI_END"]
+
+    cloud = CloudRequest()
+    cloud.login(url=os.environ["GI_URL"], access_token=os.environ["GI_ACCESS_TOKEN"])
+    cloud.get_all_stream_metadata()
+    cloud.get_all_var_metadata()
+    variables = [
+        var for var in cloud.get_all_vars_of_stream(sid) if var.index in indices
+    ]
+
+    seconds, df = best_time(
+        lambda: cloud.get_var_data_batched(
+            sid,
+            indices,
+            start,
+            end,
+            resolution=args.resolution,
+            max_points=args.max_points,
+            max_workers=args.workers,
+        ),
+        args.repeat,
+    )
+    print(f"get_var_data_batched: {seconds:8.2f} s, {len(df)} rows")
+
+    seconds, df = best_time(
+        lambda: cloud.get_data_as_csv(variables, args.resolution, start, end, write_file=False),
+        args.repeat,
+    )
+    print(f"get_data_as_csv:      {seconds:8.2f} s, {len(df)} rows")
+
+
+if __name__ == "__main__":
+    main()
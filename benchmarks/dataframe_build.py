@@ -0,0 +1,75 @@
+"""
+Benchmark of the DataFrame construction of get_var_data against the previous
+pd.DataFrame / pd.to_datetime / tz_localize / tz_convert path.
+
+Usage:
+    python benchmarks/dataframe_build.py [--rows 10000000] [--channels 4] [--repeat 3]
+
+Prints the best time and the peak of newly allocated memory of each variant.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from gimodules.cloudconnect.cloud_request import CloudRequest
+
+
+def legacy_build(data: np.ndarray, column_names, timezone: str) -> pd.DataFrame:
+    """The construction path before the decoded buffers were wrapped without copies"""
+    df = pd.DataFrame(data, columns=column_names)
+    df["Time"] = pd.to_datetime(df["Time"], unit="ms")
+    df["Time"] = df["Time"].dt.tz_localize("UTC")
+    df["Time"] = df["Time"].dt.tz_convert(timezone)
+    return df
+
+
+def measure(func, repeat: int):
+    """Returns the fastest run in seconds and the largest peak of traced memory in MB."""
+    times, peaks = [], []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return min(times), max(peaks) / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Rows of the result")
+    parser.add_argument("--channels", type=int, default=4, help="Value columns")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    args = parser.parse_args()
+
+    data = np.empty((args.rows, args.channels + 1))
+    data[:, 0] = 1_700_000_000_000 + np.arange(args.rows)
+    data[:, 1:] = np.random.default_rng(0).random((args.rows, args.channels))
+    column_names = ["Time"] + [f"a{i}" for i in range(args.channels)]
+    client = CloudRequest()
+
+    variants = {
+        "legacy": lambda: legacy_build(data, column_names, "Europe/Vienna"),
+        "_build_dataframe": lambda: client._build_dataframe(
+            data, "", [], column_names, "Europe/Vienna"
+        ),
+        "_build_dataframe index": lambda: client._build_dataframe(
+            data, "", [], column_names, "Europe/Vienna", time_index=True
+        ),
+        "_build_dataframe no tz": lambda: client._build_dataframe(
+            data, "", [], column_names, None
+        ),
+    }
+    print(f"{args.rows} rows x {args.channels} channels ({data.nbytes / 2**20:.0f} MB matrix)")
+    for label, func in variants.items():
+        seconds, peak = measure(func, args.repeat)
+        print(f"  {label:<26}{seconds * 1000:>10.1f} ms{peak:>10.0f} MB peak")
+
+
+if __name__ == "__main__":
+    main()
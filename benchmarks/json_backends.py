@@ -0,0 +1,125 @@
+"""
+Benchmark of the JSON backends on payloads shaped like real Cloud responses.
+
+Usage:
+    pip install -e .[orjson]
+    python benchmarks/json_backends.py [--scale 1.0] [--repeat 5]
+
+Prints the best decode time in milliseconds of every installed backend per payload.
+"""
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from gimodules.cloudconnect.decoder import decode_raw_matrix
+from gimodules.cloudconnect.json_backend import available_backends, get_json_backend
+
+
+def make_analytics_payload(channels: int, points: int) -> bytes:
+    """analytics response of get_data_np / get_var_data with a non-raw resolution"""
+    analytics = {"ts": [1_700_000_000_000 + i * 1000 for i in range(points)]}
+    for c in range(channels):
+        analytics[f"a{c}"] = {"avg": [random.uniform(-100, 100) for _ in range(points)]}
+    return json.dumps({"data": {"analytics": analytics}}).encode()
+
+
+def make_raw_payload(channels: int, points: int) -> bytes:
+    """Raw response of get_data_np / get_var_data with resolution "nanos" """
+    rows = [
+        [1_700_000_000_000 + i // 10, (i % 10) * 100_000]
+        + [random.uniform(-100, 100) for _ in range(channels)]
+        for i in range(points)
+    ]
+    return json.dumps({"data": {"Raw": {"data": rows}}}).encode()
+
+
+def make_metadata_payload(streams: int, variables: int) -> bytes:
+    """Variable mapping response of get_all_var_metadata"""
+    data = [
+        {
+            "Id": f"{s:08x}-0000-0000-0000-000000000000",
+            "Name": f"Stream {s}",
+            "Variables": [
+                {
+                    "Id": f"{s:04x}{v:04x}-0000-0000-0000-000000000000",
+                    "Name": f"Variable {v} of stream {s}",
+                    "GQLId": f"a{v}",
+                    "Unit": random.choice(["V", "A", "°C", "bar", ""]),
+                    "DataFormat": "Float",
+                }
+                for v in range(variables // streams)
+            ],
+        }
+        for s in range(streams)
+    ]
+    return json.dumps({"Success": True, "Message": "", "Data": data}).encode()
+
+
+def make_buffer_payload(channels: int, points: int) -> bytes:
+    """COL formatted response of get_buffer_data"""
+    columns = [[random.uniform(-100, 100) for _ in range(points)] for _ in range(channels)]
+    return json.dumps({"Data": {"Columns": columns}}).encode()
+
+
+def best_time(func, repeat: int) -> float:
+    """Returns the fastest of repeat runs in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=float, default=1.0, help="Scales the payload sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args()
+    random.seed(0)
+
+    def scaled(n: int) -> int:
+        return max(1, int(n * args.scale))
+
+    payloads = {
+        "analytics 20ch x 20k": make_analytics_payload(20, scaled(20_000)),
+        "raw 20ch x 20k": make_raw_payload(20, scaled(20_000)),
+        "metadata 20k vars": make_metadata_payload(20, scaled(20_000)),
+        "buffer COL 20ch x 20k": make_buffer_payload(20, scaled(20_000)),
+    }
+    backends = available_backends()
+
+    print(f"{'payload':<24}{'MB':>8}" + "".join(f"{name:>12}" for name in backends))
+    for label, payload in payloads.items():
+        row = f"{label:<24}{len(payload) / 1e6:>8.1f}"
+        for name in backends:
+            loads = get_json_backend(name).loads
+            row += f"{best_time(lambda: loads(payload), args.repeat):>12.1f}"
+        print(row)
+
+    # Raw matrices end up as float arrays, compare with the streaming decoder
+    payload = payloads["raw 20ch x 20k"]
+    print("\nraw 20ch x 20k into np.ndarray (ms)")
+    for name in backends:
+        loads = get_json_backend(name).loads
+
+        def decode() -> None:
+            np.array(loads(payload)["data"]["Raw"]["data"], dtype=float)
+
+        print(f"  {name + ' + np.array':<30}{best_time(decode, args.repeat):>8.1f}")
+    chunks = [payload[i: i + 65536] for i in range(0, len(payload), 65536)]
+    print(f"  {'decode_raw_matrix':<30}"
+          f"{best_time(lambda: decode_raw_matrix(chunks), args.repeat):>8.1f}")
+    for name in backends:
+        loads = get_json_backend(name).loads
+        label = f"decode_raw_matrix + {name}"
+        print(f"  {label:<30}"
+              f"{best_time(lambda: decode_raw_matrix(chunks, loads=loads), args.repeat):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark of viewport queries on a MinMaxPyramid against re-reducing the raw array
+(pandas resample to n_pixels buckets) for every zoom step.
+
+Usage:
+    python benchmarks/pyramid_query.py [--rows 20000000] [--pixels 2000] [--repeat 3]
+
+Prints the build time of the pyramid and the best time per viewport query.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from gimodules.domain.pyramid import MinMaxPyramid
+
+
+def best_time(func, repeat: int) -> float:
+    """Returns the fastest of repeat runs in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000_000, help="Rows of the series")
+    parser.add_argument("--pixels", type=int, default=2000, help="Buckets per viewport")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    args = parser.parse_args()
+
+    # 1 kHz series in ms
+    timestamps = 1_700_000_000_000 + np.arange(args.rows, dtype=np.int64)
+    values = np.random.default_rng(0).normal(size=args.rows).cumsum()
+    series = pd.Series(values, index=pd.to_datetime(timestamps, unit="ms"))
+
+    start = time.perf_counter()
+    pyramid = MinMaxPyramid(timestamps, values)
+    print(
+        f"{args.rows} rows: pyramid built in {time.perf_counter() - start:.2f} s, "
+        f"{pyramid.levels} levels, {pyramid.nbytes / 2**20:.0f} MB"
+    )
+
+    for fraction in (1.0, 0.1, 0.001):
+        t0 = int(timestamps[0])
+        t1 = t0 + int(fraction * args.rows) - 1
+        bucket_ms = max(1, int(fraction * args.rows / args.pixels))
+
+        def resample():
+            window = series[pd.to_datetime(t0, unit="ms"): pd.to_datetime(t1, unit="ms")]
+            return window.resample(f"{bucket_ms}ms").agg(["min", "max", "mean"])
+
+        query = best_time(lambda: pyramid.query(t0, t1, args.pixels), args.repeat)
+        reduce = best_time(resample, args.repeat)
+        print(
+            f"  viewport {fraction:>6.1%}: query {query * 1000:8.2f} ms, "
+            f"resample {reduce * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark of splitting a time range into windows: a datetime loop formatting every window
+with strftime against TimeRange.windows and format_timestamps on int64 edges.
+
+Usage:
+    python benchmarks/time_windows.py [--days 365] [--size 1min] [--repeat 3]
+
+Prints the best time of both ways for the number of windows.
+"""
+
+import argparse
+import datetime as dt
+import time
+
+import pandas as pd
+
+from gimodules.cloudconnect.time_range import TimeRange, format_timestamps
+
+
+def best_time(func, repeat: int) -> float:
+    """Returns the fastest of repeat runs in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def loop_windows(start: dt.datetime, end: dt.datetime, size: dt.timedelta):
+    """Windows as (start, end) strings, one datetime step and two strftime calls each."""
+    windows = []
+    current = start
+    while current < end:
+        following = min(current + size, end)
+        windows.append(
+            (current.strftime("%Y-%m-%d %H:%M:%S"), following.strftime("%Y-%m-%d %H:%M:%S"))
+        )
+        current = following
+    return windows
+
+
+def vectorized_windows(time_range: TimeRange, size: str):
+    """Windows as (start, end) strings from the int64 edges of TimeRange.windows."""
+    windows = time_range.windows(size)
+    times = format_timestamps([w.start_ns for w in windows] + [time_range.end_ns])
+    return list(zip(times[:-1], times[1:]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365, help="Length of the range")
+    parser.add_argument("--size", default="1min", help="Window length")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    args = parser.parse_args()
+
+    start = dt.datetime(2024, 1, 1)
+    end = start + dt.timedelta(days=args.days)
+    size = pd.Timedelta(args.size).to_pytimedelta()
+    time_range = TimeRange.parse(start, end)
+
+    n_windows = len(vectorized_windows(time_range, args.size))
+    loop = best_time(lambda: loop_windows(start, end, size), args.repeat)
+    vectorized = best_time(lambda: vectorized_windows(time_range, args.size), args.repeat)
+    print(
+        f"{n_windows} windows: loop {loop * 1000:8.1f} ms, "
+        f"vectorized {vectorized * 1000:8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
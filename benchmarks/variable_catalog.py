@@ -0,0 +1,107 @@
+"""
+Benchmark of variable lookups: linear scans over a dict of variables (as CloudRequest did
+before) against the hash and trigram indexes of VariableCatalog.
+
+Usage:
+    python benchmarks/variable_catalog.py [--streams 200] [--variables 400] [--repeat 3]
+
+Prints the best time of both ways for building an export header (stream name per
+variable), the column names of a stream and a substring search.
+"""
+
+import argparse
+import time
+
+from gimodules.cloudconnect.cloud_request import GIStreamVariable
+from gimodules.cloudconnect.variable_catalog import VariableCatalog
+
+
+def best_time(func, repeat: int) -> float:
+    """Returns the fastest of repeat runs in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def make_variables(n_streams: int, n_variables: int) -> dict:
+    return {
+        f"Stream {s}__Channel {v}": GIStreamVariable(
+            f"vid-{s}-{v}", f"Channel {v}", f"a{v}", "V", "Float", f"sid-{s}"
+        )
+        for s in range(n_streams)
+        for v in range(n_variables)
+    }
+
+
+def scan_header(variables: dict, selected: list) -> list:
+    """Stream name per variable with one scan over all variables each."""
+    names = []
+    for var in selected:
+        keys = [k for k, v in variables.items() if v.sid == var.sid and v.id == var.id]
+        names.append(keys[0].split("__")[0])
+    return names
+
+
+def catalog_header(catalog: VariableCatalog, selected: list) -> list:
+    """Stream name per variable from the (sid, id) index."""
+    return [catalog.find_names(sid=var.sid, id=var.id)[0].split("__")[0] for var in selected]
+
+
+def scan_columns(variables: dict, sid: str, indices: list) -> list:
+    res = [v for v in variables.values() if v.sid == sid]
+    return [x.name for i in indices for x in res if x.index == i]
+
+
+def catalog_columns(catalog: VariableCatalog, sid: str, indices: list) -> list:
+    return [x.name for i in indices for x in catalog.find(sid=sid, index=i)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--streams", type=int, default=200, help="Number of streams")
+    parser.add_argument("--variables", type=int, default=400, help="Variables per stream")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    args = parser.parse_args()
+
+    variables = make_variables(args.streams, args.variables)
+    start = time.perf_counter()
+    catalog = VariableCatalog(variables)
+    catalog.find(sid="sid-0")
+    catalog.search("Channel 1")
+    build = time.perf_counter() - start
+    selected = list(variables.values())[:: max(1, len(variables) // 200)]
+    indices = [f"a{v}" for v in range(args.variables)]
+    sid = f"sid-{args.streams // 2}"
+    text = f"Stream {args.streams // 2}__Channel 12"
+
+    cases = [
+        (
+            f"header of {len(selected)} variables",
+            lambda: scan_header(variables, selected),
+            lambda: catalog_header(catalog, selected),
+        ),
+        (
+            f"{len(indices)} column names",
+            lambda: scan_columns(variables, sid, indices),
+            lambda: catalog_columns(catalog, sid, indices),
+        ),
+        (
+            "substring search",
+            lambda: [k for k in variables if text in k],
+            lambda: catalog.search(text),
+        ),
+    ]
+    print(f"{len(variables)} variables, catalog and indexes built in {build * 1000:.1f} ms")
+    for name, scan, indexed in cases:
+        assert scan() == indexed()
+        print(
+            f"{name:>28}: scan {best_time(scan, args.repeat) * 1000:9.2f} ms, "
+            f"catalog {best_time(indexed, args.repeat) * 1000:9.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,643 @@
+"""
+Module to send concurrent asyncio http requests to the Cloud.
+(Gantner HTTP API for more information)
+
+Requires the optional dependency aiohttp (pip install gimodules[async]).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from io import BytesIO
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import DTypeLike
+
+from gimodules.cloudconnect.cloud_request import (
+    CloudRequest,
+    GIStreamVariable,
+    NaNPolicy,
+    resolve_aggregations,
+    split_aggregations,
+)
+from gimodules.cloudconnect.decoder import DataArrays
+from gimodules.cloudconnect.output import DataOutput, OutputFormat, get_output_format
+from gimodules.cloudconnect.query_builder import GQLQuery
+from gimodules.cloudconnect.retry import Deadline, DeadlineExceeded
+from gimodules.cloudconnect.session import ACCEPT_ENCODING, SessionConfig, TransferStats
+from gimodules.cloudconnect.time_range import TimeLike, TimeRange
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+class AsyncCloudRequest:
+    """
+    asyncio counterpart of CloudRequest for concurrent data retrieval.
+
+    Authentication and metadata (streams, variables, column names) are taken from a
+    logged-in CloudRequest, only the data requests are sent asynchronously. All requests
+    share one aiohttp connection pool and at most max_concurrency of them are in flight.
+    Cancelling a task that awaits one of the methods aborts its request and releases
+    the connection.
+
+    Example:
+        gi = CloudRequest()
+        gi.login(use_env_file=True)
+        async with AsyncCloudRequest(gi, max_concurrency=32) as agi:
+            frames = await asyncio.gather(
+                *(agi.get_var_data(sid, indices, start, end) for sid in sids)
+            )
+    """
+
+    def __init__(
+        self,
+        cloud_request: CloudRequest,
+        max_concurrency: int = 16,
+        session_config: Optional[SessionConfig] = None,
+    ) -> None:
+        """
+        Args:
+            cloud_request (CloudRequest): Logged-in client used for tokens and metadata.
+            max_concurrency (int): Maximum number of requests in flight. Defaults to 16.
+            session_config (Optional[SessionConfig]): Pool and timeout settings.
+            Defaults to the settings of cloud_request.
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncCloudRequest requires aiohttp. Install it with: pip install gimodules[async]"
+            )
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.cloud_request = cloud_request
+        self.max_concurrency = max_concurrency
+        self.session_config = session_config or cloud_request.session_config
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Transferred vs. decoded bytes of the last response, totals are kept by cloud_request
+        self.last_transfer: Optional[TransferStats] = None
+
+    async def __aenter__(self) -> AsyncCloudRequest:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes the aiohttp session and all pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Lazily creates the session, it has to be bound to the running event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                limit_per_host=self.session_config.pool_maxsize,
+                force_close=not self.session_config.keep_alive,
+            )
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=self.session_config.connect_timeout,
+                sock_read=self.session_config.read_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _execute_gql_request(
+        self, query: GQLQuery, deadline: Union[None, float, Deadline] = None
+    ) -> Optional[bytes]:
+        """
+        Posts a GraphQL query and returns the raw response body.
+        The access token is refreshed once on 401/403, transient failures are retried
+        according to the retry policy of the CloudRequest within the deadline.
+
+        Args:
+            query (GQLQuery): The GraphQL query.
+            deadline (Union[None, float, Deadline]): Time budget in seconds or shared
+            Deadline. Defaults to retry_policy.deadline.
+
+        Returns:
+            Optional[bytes]: The response body, or None if the request failed.
+        """
+        client = self.cloud_request
+        policy = client.retry_policy
+        token_manager = client.token_manager
+        deadline = Deadline.resolve(deadline, policy.deadline)
+        url = f"{client.url}/__api__/gql"
+        session = self._get_session()
+        assert self._semaphore is not None
+        loop = asyncio.get_running_loop()
+        token_refreshed = False
+        attempt = 0
+
+        while True:
+            attempt += 1
+            if token_manager.needs_refresh():
+                # Refresh blocks on http and on the single-flight lock, keep it off the loop
+                await loop.run_in_executor(None, token_manager.get_access_token)
+            token = token_manager.access_token
+            try:
+                connect, read = deadline.clamp_timeout(self.session_config.timeout)
+                timeout = aiohttp.ClientTimeout(
+                    total=deadline.remaining(), sock_connect=connect, sock_read=read
+                )
+                async with self._semaphore:
+                    async with session.post(
+                        url,
+                        json=query.payload,
+                        headers={
+                            "Accept-Encoding": ACCEPT_ENCODING,
+                            "Authorization": f"Bearer {token}",
+                        },
+                        timeout=timeout,
+                    ) as res:
+                        body = await res.read()
+                        status, reason = res.status, res.reason
+                        retry_after = res.headers.get("Retry-After")
+                        self._record_transfer(res, body)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                delay = policy.get_backoff(attempt)
+                if attempt < policy.max_attempts and deadline.allows(delay):
+                    logging.warning(f"Connection error ({e}), retrying in {delay:.1f}s...")
+                    await asyncio.sleep(delay)
+                    continue
+                logging.warning(f"Request error while fetching data: {e}")
+                return None
+            except (aiohttp.ClientError, DeadlineExceeded) as e:
+                logging.warning(f"Request error while fetching data: {e}")
+                return None
+
+            if status == 200 and not client._has_gql_errors(body):
+                return body
+            if status in {401, 403} and not token_refreshed:
+                token_refreshed = True
+                if await loop.run_in_executor(None, token_manager.refresh, token):
+                    logging.info("Token expired. Renewed token, retrying request...")
+                    attempt -= 1
+                    continue
+            if policy.should_retry_status(status) and attempt < policy.max_attempts:
+                delay = policy.get_delay(attempt, retry_after)
+                if deadline.allows(delay):
+                    logging.warning(
+                        f"Request failed with code {status}, retrying in {delay:.1f}s..."
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+
+            logging.error(
+                f"Fetching data failed! Response Code: {status}, Reason: {reason},"
+                f" Msg: {body[:500].decode(errors='replace')}"
+            )
+            return None
+
+    async def _load_metadata(self, sid: str) -> None:
+        """
+        Fetches the streams and the variables of a stream in an executor if the
+        CloudRequest loads its metadata lazily, as these requests block.
+        """
+        client = self.cloud_request
+        if client.lazy_metadata:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._load_metadata_sync, sid)
+
+    def _load_metadata_sync(self, sid: str) -> None:
+        if self.cloud_request.streams is not None:
+            self.cloud_request._get_variable_catalog(sid)
+
+    def _record_transfer(self, res: aiohttp.ClientResponse, body: bytes) -> None:
+        """Records transferred (compressed) vs. decoded bytes of a response."""
+        wire_bytes = getattr(res.content, "total_raw_bytes", None)
+        if not wire_bytes:
+            wire_bytes = res.content_length or len(body)
+        stats = TransferStats(
+            wire_bytes=wire_bytes,
+            decoded_bytes=len(body),
+            content_encoding=res.headers.get("Content-Encoding", ""),
+            responses=1,
+        )
+        self.last_transfer = stats
+        self.cloud_request.transfer_counter.record(stats)
+
+    async def get_data_np(
+        self,
+        sid: str,
+        index_list: List[str],
+        tss: Union[str, int, TimeRange],
+        tse: Union[None, str, int] = None,
+        resolution: str = "nanos",
+        deadline: Union[None, float, Deadline] = None,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        dtype: Optional[DTypeLike] = None,
+        aggregations: Union[None, str, Sequence[str]] = None,
+        target_points: Optional[int] = None,
+    ) -> Optional[Union[np.ndarray, DataArrays]]:
+        """
+        Returns a numpy matrix of data with timestamps and values directly from a data stream.
+
+        Args:
+            sid (str): Stream ID.
+            index_list (List[str]): List of channel indices (e.g., ["a10", "a11"]).
+            tss (Union[str, int, TimeRange]): Start timestamp in ms, or the TimeRange.
+            tse (Union[None, str, int]): End timestamp in ms, None if tss is a TimeRange.
+            Defaults to None.
+            resolution (str, optional): Data resolution. Defaults to "nanos".
+            deadline (Union[None, float, Deadline], optional): Time budget in seconds
+            including retries. Defaults to retry_policy.deadline.
+            nan_policy (Union[str, NaNPolicy], optional): Handling of rows with NaNs
+            (see apply_nan_policy). Defaults to "trim_edges".
+            dtype (Optional[DTypeLike], optional): dtype of the values, e.g. "float32" or
+            "native" (see CloudRequest.get_data_np). Defaults to None (float64 matrix).
+            aggregations (Union[None, str, Sequence[str]], optional): Aggregations per
+            variable fetched in one analytics query (see CloudRequest.get_data_np).
+            Defaults to None ("avg").
+            target_points (Optional[int], optional): Maximum number of rows, the resolution
+            is chosen to fit (see CloudRequest.select_resolution). Defaults to None.
+
+        Returns:
+            Optional[Union[np.ndarray, DataArrays]]: Numpy matrix containing the requested
+             data (DataArrays if a dtype or aggregations are given), or None if the request
+             failed.
+        """
+        await self._load_metadata(sid)
+        try:
+            tss, tse = self.cloud_request._ms_bounds(tss, tse)
+            if target_points is not None:
+                resolution = self.cloud_request.select_resolution(
+                    sid, tss, tse, target_points, resolution, aggregations is None
+                )
+            aggregations = resolve_aggregations(aggregations, resolution)
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
+            return None
+        data = await self._fetch_data_matrix(
+            sid,
+            index_list,
+            tss,
+            tse,
+            resolution,
+            deadline,
+            nan_policy,
+            dtype,
+            np.float64 if aggregations else None,
+            aggregations,
+        )
+        if data is None or not aggregations:
+            return data
+        return split_aggregations(data, len(aggregations))
+
+    async def _fetch_data_matrix(
+        self,
+        sid: str,
+        index_list: List[str],
+        tss: Union[str, int],
+        tse: Union[str, int],
+        resolution: str,
+        deadline: Union[None, float, Deadline],
+        nan_policy: Union[str, NaNPolicy],
+        dtype: Optional[DTypeLike],
+        default_dtype: Optional[DTypeLike] = None,
+        aggregations: Optional[Sequence[str]] = None,
+    ) -> Optional[Union[np.ndarray, DataArrays]]:
+        """
+        Fetches and decodes the data matrix of a stream (see CloudRequest._decode_data_matrix),
+        the values of several aggregations are the columns of one 2-D matrix.
+        """
+        if not index_list:
+            logging.info("No variable selected.")
+            return None
+
+        client = self.cloud_request
+        try:
+            nan_policy = NaNPolicy(nan_policy)
+            value_dtype = client._resolve_value_dtype(sid, index_list, dtype, default_dtype)
+            query = client._build_data_query(sid, index_list, tss, tse, resolution, aggregations)
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
+            return None
+        body = await self._execute_gql_request(query, deadline)
+        if body is None:
+            return None
+        try:
+            return client._decode_data_matrix(
+                [body], index_list, resolution, nan_policy, value_dtype, aggregations
+            )
+        except ValueError as e:
+            logging.error(f"Decoding data failed! Msg: {e}")
+            return None
+
+    async def get_var_data(
+        self,
+        sid: str,
+        index_list: List[str],
+        start_date: Union[TimeLike, TimeRange],
+        end_date: Optional[TimeLike] = None,
+        resolution: str = "nanos",
+        custom_column_names: Optional[List[str]] = None,
+        timezone: str = "UTC",
+        deadline: Union[None, float, Deadline] = None,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        dtype: Optional[DTypeLike] = None,
+        output: Union[str, OutputFormat] = OutputFormat.PANDAS,
+        aggregations: Union[None, str, Sequence[str]] = None,
+        target_points: Optional[int] = None,
+    ) -> Optional[DataOutput]:
+        """
+        Returns a pandas DataFrame with timestamps and values directly from a data stream.
+
+        Args:
+            sid (str): Stream ID.
+            index_list (List[str]): List of channel indices (e.g., ["a10", "a11"]).
+            start_date (Union[TimeLike, TimeRange]): Start date or the TimeRange to fetch
+            (see CloudRequest.get_var_data).
+            end_date (Optional[TimeLike]): End date (inclusive), None if start_date is a
+            TimeRange. Defaults to None.
+            resolution (str, optional): Data resolution. Defaults to "nanos".
+            custom_column_names (Optional[List[str]], optional):
+            Custom column names for the DataFrame.
+            timezone (str, optional): Timezone for the data. Defaults to "UTC".
+            deadline (Union[None, float, Deadline], optional): Time budget in seconds
+            including retries. Defaults to retry_policy.deadline.
+            nan_policy (Union[str, NaNPolicy], optional): Handling of rows with NaNs
+            (see apply_nan_policy). Defaults to "trim_edges".
+            dtype (Optional[DTypeLike], optional): dtype of the value columns.
+            Defaults to None (float64).
+            output (Union[str, OutputFormat], optional): "pandas", "numpy", "arrow" or
+            "polars" (see CloudRequest.get_var_data). Defaults to "pandas".
+            aggregations (Union[None, str, Sequence[str]], optional): Aggregations per
+            variable, returned as (variable, aggregation) MultiIndex columns
+            (see CloudRequest.get_var_data). Defaults to None ("avg").
+            target_points (Optional[int], optional): Maximum number of rows, the resolution
+            is chosen to fit (see CloudRequest.select_resolution). Defaults to None.
+
+        Returns:
+            Optional[DataOutput]: DataFrame (or the output format) containing the requested
+            data, or None if the request failed.
+        """
+        client = self.cloud_request
+        output = get_output_format(output)
+        time_range = client._get_time_range(start_date, end_date)
+        if time_range is None:
+            return None
+        tss, tse = time_range.start_ms, time_range.end_ms
+        await self._load_metadata(sid)
+
+        try:
+            if target_points is not None:
+                resolution = client.select_resolution(
+                    sid, tss, tse, target_points, resolution, aggregations is None
+                )
+            aggregations = resolve_aggregations(aggregations, resolution)
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
+            return None
+        data = await self._fetch_data_matrix(
+            sid,
+            index_list,
+            tss,
+            tse,
+            resolution,
+            deadline,
+            nan_policy,
+            dtype,
+            np.float64,
+            aggregations,
+        )
+        if data is None:
+            return None
+        return client._build_output(
+            data,
+            sid,
+            index_list,
+            resolution,
+            output,
+            custom_column_names,
+            timezone,
+            aggregations=aggregations,
+        )
+
+    async def get_data_as_csv(
+        self,
+        variables: List[GIStreamVariable],
+        resolution: str,
+        start: Union[TimeLike, TimeRange],
+        end: Optional[TimeLike] = None,
+        filepath: str = "",
+        return_df: bool = True,
+        write_file: bool = True,
+        decimal_sep: str = ".",
+        delimiter: str = ";",
+        timezone: str = "UTC",
+        aggregation: str = "avg",
+        batch: Optional[str] = None,
+        deadline: Union[None, float, Deadline] = None,
+        output: Union[str, OutputFormat] = OutputFormat.PANDAS,
+    ) -> Optional[DataOutput]:
+        """
+        Returns a CSV file with the data of a given list of variables.
+        With batch set, all batches are requested concurrently.
+
+        Args:
+            variables (List[GIStreamVariable]): List of variables to include in the export.
+            resolution (str): Data resolution.
+            start (Union[TimeLike, TimeRange]): Start date or the TimeRange to export
+            (see CloudRequest.get_data_as_csv).
+            end (Optional[TimeLike]): End date, None if start is a TimeRange.
+            Defaults to None.
+            filepath (str, optional): Path to save the file. Defaults to "".
+            return_df (bool, optional): Whether to return a DataFrame. Defaults to True.
+            write_file (bool, optional): Whether to write the file to disk. Defaults to True.
+            decimal_sep (str, optional): Decimal separator for the CSV. Defaults to ".".
+            delimiter (str, optional): Field delimiter for the CSV. Defaults to ";".
+            timezone (str, optional): Timezone for the export. Defaults to "UTC".
+            aggregation (str, optional): Aggregation type. Defaults to "avg".
+            batch (str, optional): Batch size for the export, "daily", "weekly", "monthly",
+             "yearly" or "auto" (see CloudRequest.get_data_as_csv). Defaults to None.
+            deadline (Union[None, float, Deadline], optional): Time budget in seconds for
+            all batches including retries. Defaults to retry_policy.deadline. If a batch
+            fails or the deadline runs out, the whole export fails.
+            output (Union[str, OutputFormat], optional): "pandas", "numpy", "arrow" or
+            "polars" (see CloudRequest.get_data_as_csv). Defaults to "pandas".
+
+        Returns:
+            Optional[DataOutput]: The data as a pandas DataFrame (or the output format)
+            if return_df is True, otherwise None.
+        """
+        client = self.cloud_request
+        deadline = Deadline.resolve(deadline, client.retry_policy.deadline)
+        output = get_output_format(output)
+        for sid in dict.fromkeys(var.sid for var in variables):
+            await self._load_metadata(sid)
+        if batch is not None:
+            # "auto" plans the batches with blocking requests for the measurement periods
+            loop = asyncio.get_running_loop()
+            intervals = await loop.run_in_executor(
+                None, client._export_intervals, variables, resolution, start, end, batch
+            )
+        else:
+            intervals = [(start, end)]
+
+        bodies = await asyncio.gather(
+            *(
+                self._export_csv(variables, resolution, s, e, timezone, aggregation, deadline)
+                for s, e in intervals
+            )
+        )
+        failed = [interval for interval, body in zip(intervals, bodies) if body is None]
+        if failed:
+            # A partial export would pass for the complete one
+            logging.error(f"Fetching batches {failed} failed, export aborted")
+            return None
+
+        if output is not OutputFormat.PANDAS:
+            return await self._csv_output(
+                variables,
+                resolution,
+                intervals,
+                bodies,
+                filepath,
+                return_df,
+                write_file,
+                decimal_sep,
+                delimiter,
+                timezone,
+                aggregation,
+                output,
+            )
+
+        all_dfs = []
+        for body in bodies:
+            if body is None:
+                continue
+            batch_df = pd.read_csv(BytesIO(body), delimiter=delimiter, decimal=decimal_sep)
+            # Remove first metadata rows from subsequent batches
+            all_dfs.append(batch_df if not all_dfs else batch_df.iloc[3:])
+        if not all_dfs:
+            return None
+        df = pd.concat(all_dfs, ignore_index=True) if len(all_dfs) > 1 else all_dfs[0]
+
+        if write_file:
+            _, filename = client._build_export_csv_query(
+                variables, resolution, start, end, timezone, aggregation
+            )
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, self._write_csv, f"{filepath}{filename}", bodies, df, delimiter, decimal_sep
+            )
+        return df if return_df else None
+
+    async def _csv_output(
+        self,
+        variables: List[GIStreamVariable],
+        resolution: str,
+        intervals: List[Tuple[Any, Any]],
+        bodies: List[Optional[bytes]],
+        filepath: str,
+        return_df: bool,
+        write_file: bool,
+        decimal_sep: str,
+        delimiter: str,
+        timezone: str,
+        aggregation: str,
+        output: OutputFormat,
+    ) -> Optional[DataOutput]:
+        """Writes the file of every batch and parses the bodies into a non-pandas output."""
+        client = self.cloud_request
+        received = [(interval, body) for interval, body in zip(intervals, bodies) if body]
+        if not received:
+            return None
+
+        if write_file:
+            paths = [
+                filepath + client._build_export_csv_query(
+                    variables, resolution, s, e, timezone, aggregation
+                )[1]
+                for (s, e), _ in received
+            ]
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, self._write_files, paths, [body for _, body in received]
+            )
+        if not return_df:
+            return None
+
+        # Parsing resolves stream names and is CPU bound, keep it off the loop
+        loop = asyncio.get_running_loop()
+        parts = await loop.run_in_executor(
+            None,
+            self._read_outputs,
+            [body for _, body in received],
+            variables,
+            aggregation,
+            delimiter,
+            decimal_sep,
+            output,
+        )
+        return parts[0] if len(parts) == 1 else client._concat_outputs(parts, output)
+
+    def _read_outputs(
+        self,
+        bodies: List[bytes],
+        variables: List[GIStreamVariable],
+        aggregation: str,
+        delimiter: str,
+        decimal_sep: str,
+        output: OutputFormat,
+    ) -> List[DataOutput]:
+        """Parses the files of the batches (see CloudRequest._read_export_csv)."""
+        return [
+            self.cloud_request._read_export_csv(
+                BytesIO(body), variables, aggregation, delimiter, decimal_sep, output
+            )
+            for body in bodies
+        ]
+
+    @staticmethod
+    def _write_files(paths: List[str], bodies: List[bytes]) -> None:
+        """Writes the server files as they are."""
+        for path, body in zip(paths, bodies):
+            with open(path, "wb") as csv_file:
+                csv_file.write(body)
+
+    async def _export_csv(
+        self,
+        variables: List[GIStreamVariable],
+        resolution: str,
+        start: Union[TimeLike, TimeRange],
+        end: Optional[TimeLike],
+        timezone: str,
+        aggregation: str,
+        deadline: Deadline,
+    ) -> Optional[bytes]:
+        """Requests one exportCSV file and returns its content."""
+        logging.info(f"Fetching batch: {start}-{end}")
+        try:
+            query, _ = self.cloud_request._build_export_csv_query(
+                variables, resolution, start, end, timezone, aggregation
+            )
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
+            return None
+        return await self._execute_gql_request(query, deadline)
+
+    @staticmethod
+    def _write_csv(
+        path: str,
+        bodies: List[Optional[bytes]],
+        df: pd.DataFrame,
+        delimiter: str,
+        decimal_sep: str,
+    ) -> None:
+        """Writes the server file as is, or the combined DataFrame for batched exports."""
+        if len(bodies) == 1 and bodies[0] is not None:
+            with open(path, "wb") as csv_file:
+                csv_file.write(bodies[0])
+        else:
+            df.to_csv(path, sep=delimiter, decimal=decimal_sep, index=False)
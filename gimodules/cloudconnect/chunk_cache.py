@@ -0,0 +1,272 @@
+"""
+Module for a persistent cache of fetched time series in aligned time buckets.
+
+A bucket holds the rows of one stream at one resolution in [k * bucket_ms,
+(k + 1) * bucket_ms): the timestamps as ts.npy and every (index, aggregation) column as
+its own .npy file, so a request for other channels of a cached bucket only adds columns.
+Buckets are written atomically (temporary file, then rename) and evicted least recently
+used first once the cache exceeds its size limit.
+
+Layout: {directory}/{tenant}/{sid}/{resolution}/{bucket_ms}/{k}/{ts, index.aggregation}.npy
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Bucket lengths in ms, the largest one below the target number of rows is used
+_BUCKET_LADDER_MS = [
+    1_000,
+    10_000,
+    60_000,
+    600_000,
+    3_600_000,
+    6 * 3_600_000,
+    86_400_000,
+    7 * 86_400_000,
+]
+
+_TIMESTAMPS = "ts"
+
+
+@dataclass(frozen=True)
+class ChunkKey:
+    """Object for tracking the series a bucket belongs to"""
+
+    tenant: str
+    sid: str
+    resolution: str
+
+
+def _safe_name(name: str) -> str:
+    """Returns name with every character but letters, digits, "-" and "." replaced."""
+    return re.sub(r"[^\w.-]", "_", name) or "_"
+
+
+class ChunkCache:
+    """
+    Opt-in on-disk cache of time-series buckets (see CloudRequest(cache=...)).
+
+    Args:
+        directory (str): Root directory of the cache, created if missing.
+        max_bytes (int): Size limit of the stored files, least recently used buckets are
+        evicted beyond it. Defaults to 1 GiB.
+        bucket_rows (int): Target number of rows per bucket, the bucket length is chosen
+        from the resolution or the sample rate. Defaults to 100_000.
+        open_margin (float): Buckets ending less than open_margin seconds before the
+        stream's last timestamp (or now) are still open, so they are fetched every time
+        and never stored. Defaults to 3600.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 2**30,
+        bucket_rows: int = 100_000,
+        open_margin: float = 3600.0,
+    ) -> None:
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.bucket_rows = bucket_rows
+        self.open_margin = open_margin
+        os.makedirs(self.directory, exist_ok=True)
+        # Bytes of the stored files, scanned on the first write
+        self._nbytes: Optional[int] = None
+
+    def bucket_ms(self, rows_per_second: float, step: int) -> int:
+        """
+        Returns the bucket length for a series: the largest of the fixed lengths with at
+        most bucket_rows rows, at least one row (step) long.
+
+        Args:
+            rows_per_second (float): Estimated rows per second, 0 if unknown.
+            step (int): Length of a row at the resolution in ms (1 for raw data).
+
+        Returns:
+            int: The bucket length in ms.
+        """
+        if rows_per_second > 0:
+            target = self.bucket_rows / rows_per_second * 1000
+        else:
+            target = 3_600_000
+        fitting = [length for length in _BUCKET_LADDER_MS if length <= target]
+        length = fitting[-1] if fitting else _BUCKET_LADDER_MS[0]
+        return length if length >= step and length % step == 0 else step
+
+    def is_closed(self, bucket_ms: int, bucket: int, last_ts: Optional[int] = None) -> bool:
+        """
+        Returns whether a bucket is closed, i.e. it ends at least open_margin before the
+        stream's last timestamp and before now. Only closed buckets are stored.
+
+        Args:
+            bucket_ms (int): Bucket length in ms.
+            bucket (int): Bucket number.
+            last_ts (Optional[int]): Last timestamp of the stream in ms. Defaults to None.
+
+        Returns:
+            bool: True if the bucket can be stored.
+        """
+        now = int(time.time() * 1000)
+        cutoff = min(last_ts, now) if last_ts else now
+        return (bucket + 1) * bucket_ms <= cutoff - self.open_margin * 1000
+
+    @property
+    def nbytes(self) -> int:
+        """the bytes of the stored files"""
+        if self._nbytes is None:
+            self._nbytes = sum(size for _, size, _ in self._scan())
+        return self._nbytes
+
+    def get(
+        self, key: ChunkKey, bucket_ms: int, bucket: int, columns: List[str]
+    ) -> Optional[Tuple[np.ndarray, List[np.ndarray]]]:
+        """
+        Returns the timestamps and the columns of a stored bucket.
+
+        Args:
+            key (ChunkKey): Series of the bucket.
+            bucket_ms (int): Bucket length in ms.
+            bucket (int): Bucket number, it starts at bucket * bucket_ms.
+            columns (List[str]): Column names, e.g. "a1.avg".
+
+        Returns:
+            Optional[Tuple[np.ndarray, List[np.ndarray]]]: The timestamps and one array per
+            column, None if the bucket or one of the columns is not stored.
+        """
+        path = self._bucket_path(key, bucket_ms, bucket)
+        try:
+            timestamps = np.load(self._column_path(path, _TIMESTAMPS))
+            arrays = [np.load(self._column_path(path, column)) for column in columns]
+            os.utime(self._column_path(path, _TIMESTAMPS))
+        except (OSError, ValueError):
+            return None
+        if any(len(array) != len(timestamps) for array in arrays):
+            return None
+        return timestamps, arrays
+
+    def put(
+        self,
+        key: ChunkKey,
+        bucket_ms: int,
+        bucket: int,
+        timestamps: np.ndarray,
+        columns: Dict[str, np.ndarray],
+    ) -> None:
+        """
+        Stores the columns of a closed bucket. Columns stored before with other
+        timestamps are dropped.
+
+        Args:
+            key (ChunkKey): Series of the bucket.
+            bucket_ms (int): Bucket length in ms.
+            bucket (int): Bucket number.
+            timestamps (np.ndarray): Timestamps of the rows of the bucket.
+            columns (Dict[str, np.ndarray]): Values per column name.
+        """
+        path = self._bucket_path(key, bucket_ms, bucket)
+        try:
+            stored = np.load(self._column_path(path, _TIMESTAMPS))
+        except (OSError, ValueError):
+            stored = None
+        written = 0
+        try:
+            if stored is None or not np.array_equal(stored, timestamps):
+                if stored is not None:
+                    written -= self._remove(path)
+                os.makedirs(path, exist_ok=True)
+                written += self._write(path, _TIMESTAMPS, timestamps)
+            for column, values in columns.items():
+                written += self._write(path, column, values)
+        except OSError as e:
+            logging.warning(f"Writing cache bucket {path} failed: {e}")
+        if self._nbytes is not None:
+            self._nbytes += written
+        if self.nbytes > self.max_bytes:
+            self.evict()
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Removes the least recently used buckets until the cache fits max_bytes.
+
+        Args:
+            max_bytes (Optional[int]): Size to reach. Defaults to the cache's max_bytes.
+
+        Returns:
+            int: The number of removed buckets.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        buckets = sorted(self._scan())
+        total = sum(size for _, size, _ in buckets)
+        removed = 0
+        for _, size, path in buckets:
+            if total <= limit:
+                break
+            total -= self._remove(path)
+            removed += 1
+        self._nbytes = total
+        return removed
+
+    def clear(self) -> None:
+        """Removes all buckets."""
+        self.evict(0)
+
+    def _bucket_path(self, key: ChunkKey, bucket_ms: int, bucket: int) -> str:
+        return os.path.join(
+            self.directory,
+            _safe_name(key.tenant),
+            _safe_name(key.sid),
+            _safe_name(key.resolution),
+            str(bucket_ms),
+            str(bucket),
+        )
+
+    @staticmethod
+    def _column_path(path: str, column: str) -> str:
+        return os.path.join(path, f"{_safe_name(column)}.npy")
+
+    def _write(self, path: str, column: str, array: np.ndarray) -> int:
+        """Writes a column atomically and returns the change of the stored bytes."""
+        target = self._column_path(path, column)
+        previous = os.path.getsize(target) if os.path.exists(target) else 0
+        temporary = f"{target}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                np.save(file, np.ascontiguousarray(array))
+            os.replace(temporary, target)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return os.path.getsize(target) - previous
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """Returns the (last use, bytes, path) of every stored bucket."""
+        buckets = []
+        for root, _, files in os.walk(self.directory):
+            if f"{_TIMESTAMPS}.npy" not in files:
+                continue
+            try:
+                used = os.path.getmtime(os.path.join(root, f"{_TIMESTAMPS}.npy"))
+                size = sum(os.path.getsize(os.path.join(root, name)) for name in files)
+            except OSError:
+                continue
+            buckets.append((used, size, root))
+        return buckets
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        """Removes a bucket and returns its bytes."""
+        try:
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+        except OSError:
+            return 0
+        shutil.rmtree(path, ignore_errors=True)
+        return size
@@ -5,7 +5,9 @@ Module to send simplified http request to the Cloud. (Gantner HTTP API for more
 from __future__ import annotations
 
 from datetime import datetime
-from io import BytesIO
+import io
+import itertools
+import json
 import requests
 import datetime as dt
 import numpy as np
@@ -16,13 +18,65 @@ import time
 import logging
 import pytz
 
-from dataclasses import dataclass
-from typing import List, Dict, Optional, Union, Any, Type, cast, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import List, Dict, Optional, Union, Any, Type, cast, Tuple, Iterable, Sequence
 from requests.auth import HTTPBasicAuth
 from enum import Enum
-from dateutil import tz, relativedelta
-
-from gimodules.cloudconnect import utils, authenticate
+from dateutil import tz
+from numpy.typing import DTypeLike
+
+from gimodules.cloudconnect import utils, authenticate, query_builder, query_plan
+from gimodules.cloudconnect.chunk_cache import ChunkCache, ChunkKey
+from gimodules.cloudconnect.decoder import (
+    DataArrays,
+    NANOS_PER_MS,
+    GraphQLError,
+    decode_raw_matrices,
+    get_graphql_error,
+)
+from gimodules.cloudconnect.json_backend import STDLIB, JSONBackend, get_json_backend
+from gimodules.cloudconnect.metadata_snapshot import (
+    MetadataSnapshot,
+    load_snapshot,
+    save_snapshot,
+    stream_fingerprint,
+)
+from gimodules.cloudconnect.output import (
+    DataOutput,
+    FieldInfo,
+    OutputFormat,
+    arrow_table,
+    concat_tables,
+    get_output_format,
+    polars_frame,
+    read_csv_table,
+)
+from gimodules.cloudconnect.query_builder import GQLQuery
+from gimodules.cloudconnect.query_plan import QueryLimits, QueryPlan
+from gimodules.cloudconnect.result_cache import ResultCache
+from gimodules.cloudconnect.retry import Deadline, RetryPolicy
+from gimodules.cloudconnect.session import (
+    ACCEPT_ENCODING,
+    CHUNK_SIZE,
+    IteratorReader,
+    SessionConfig,
+    TransferCounter,
+    TransferStats,
+    create_session,
+    iter_decoded_content,
+)
+from gimodules.cloudconnect.time_range import (
+    CALENDAR_FREQS,
+    UNIT_NS,
+    TimeLike,
+    TimeRange,
+    format_timestamps,
+    to_epoch_ns,
+    to_time_range,
+)
+from gimodules.cloudconnect.token_manager import TokenManager
+from gimodules.cloudconnect.variable_catalog import VariableCatalog
 
 # Set output level to INFO because default is WARNNG
 logging.getLogger().setLevel(logging.INFO)
@@ -124,6 +178,13 @@ class DataType(Enum):
     FFT = "fft"
 
 
+class NaNPolicy(Enum):
+    TRIM_EDGES = "trim_edges"
+    DROP_ANY = "drop_any"
+    KEEP = "keep"
+    FILL = "fill"
+
+
 class Variable():
     SID: str
     VID: str
@@ -174,17 +235,273 @@ def get_sample_rate(resolution: str):
         return 1
 
 
+# Resolutions from finest to coarsest
+_RESOLUTION_ORDER: List[Resolution] = [
+    Resolution.NANOS,
+    Resolution.KHZ10,
+    Resolution.KHZ,
+    Resolution.HZ100,
+    Resolution.HZ10,
+    Resolution.SECOND,
+    Resolution.MINUTE,
+    Resolution.QUARTER_HOUR,
+    Resolution.HOUR,
+    Resolution.DAY,
+    Resolution.WEEK,
+    Resolution.MONTH,
+]
+
+
+def select_resolution(
+    duration: float,
+    target_points: int,
+    sample_rate_hz: Optional[float] = None,
+    finest: str = "nanos",
+    raw: bool = True,
+) -> str:
+    """
+    Returns the finest resolution which returns at most target_points rows per variable
+    for a time range, so visual use cases fetch a few thousand aggregated points instead
+    of all raw samples.
+
+    Raw data ("nanos") is chosen if the stream's sample rate is known and fits the budget.
+    Aggregated resolutions at least as fine as the sample rate are skipped then, they
+    return no fewer rows than the raw data.
+
+    Args:
+        duration (float): Length of the time range in seconds.
+        target_points (int): Maximum number of rows.
+        sample_rate_hz (Optional[float]): Sample rate of the stream, None if unknown.
+        finest (str): Finest resolution considered. Defaults to "nanos".
+        raw (bool): Consider raw data. Defaults to True.
+
+    Returns:
+        str: The resolution, "MONTH" if no resolution fits the budget.
+
+    Raises:
+        ValueError: If target_points is not positive or finest is no resolution.
+    """
+    if target_points <= 0:
+        raise ValueError(f"target_points must be positive, got {target_points}")
+    candidates = _RESOLUTION_ORDER[_RESOLUTION_ORDER.index(Resolution(finest)):]
+    use_raw = raw and bool(sample_rate_hz) and Resolution.NANOS in candidates
+    for resolution in candidates:
+        if resolution is Resolution.NANOS:
+            if not use_raw:
+                continue
+            rate = cast(float, sample_rate_hz)
+        else:
+            rate = get_sample_rate(resolution.value)
+            if use_raw and rate >= cast(float, sample_rate_hz):
+                continue
+        if rate * duration <= target_points:
+            return resolution.value
+    return Resolution.MONTH.value
+
+
+# Float dtype holding the values of a variable DataFormat exactly (NaN marks missing values)
+_NATIVE_VALUE_DTYPES: Dict[str, np.dtype] = {
+    **dict.fromkeys(
+        ["bool", "int8", "uint8", "int16", "uint16", "float", "float32", "single"],
+        np.dtype(np.float32),
+    ),
+    **dict.fromkeys(
+        ["int32", "uint32", "int64", "uint64", "double", "float64"], np.dtype(np.float64)
+    ),
+}
+
+
+def native_value_dtype(variables: List[GIStreamVariable]) -> np.dtype:
+    """
+    Returns the smallest float dtype which holds the values of all variables exactly,
+    e.g. float32 for 16 bit integers and Float, float64 for unknown data types.
+
+    Args:
+        variables (List[GIStreamVariable]): The variables.
+
+    Returns:
+        np.dtype: float32 or float64.
+    """
+    dtypes = [
+        _NATIVE_VALUE_DTYPES.get(str(var.data_type).lower(), np.dtype(np.float64))
+        for var in variables
+    ]
+    return np.result_type(*dtypes) if dtypes else np.dtype(np.float64)
+
+
+# Rows checked at once when looking for the first/last row without NaN
+_EDGE_SCAN_ROWS = 64
+
+
+def _find_complete_row(data: np.ndarray, reverse: bool = False) -> int:
+    """Returns the index of the first (or last) row without NaN, -1 if there is none."""
+    n_rows = len(data)
+    for offset in range(0, n_rows, _EDGE_SCAN_ROWS):
+        if reverse:
+            block = data[max(0, n_rows - offset - _EDGE_SCAN_ROWS): n_rows - offset][::-1]
+        else:
+            block = data[offset: offset + _EDGE_SCAN_ROWS]
+        complete = ~np.isnan(block).any(axis=1)
+        if complete.any():
+            row = offset + int(np.argmax(complete))
+            return n_rows - 1 - row if reverse else row
+    return -1
+
+
+def _forward_fill(data: np.ndarray) -> None:
+    """Replaces NaNs in place with the last valid value of their column."""
+    positions = np.arange(len(data))
+    for k in range(data.shape[1]):
+        column = data[:, k]
+        missing = np.isnan(column)
+        if not missing.any():
+            continue
+        last_valid = np.where(missing, 0, positions)
+        np.maximum.accumulate(last_valid, out=last_valid)
+        column[:] = column[last_valid]
+
+
+def apply_nan_policy(
+    data: Union[np.ndarray, DataArrays], policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES
+) -> Union[np.ndarray, DataArrays]:
+    """
+    Handles the rows of a data matrix with missing values (NaN).
+
+    Args:
+        data (Union[np.ndarray, DataArrays]): The data matrix, modified in place by "fill".
+        Only the values of DataArrays are checked, their timestamps follow the rows.
+        policy (Union[str, NaNPolicy]):
+            "trim_edges": drop leading and trailing rows with NaNs, gaps inside are kept.
+            Returns a view, only the trimmed rows are scanned.
+            "drop_any": drop every row with a NaN (copies the matrix).
+            "keep": return the matrix unchanged.
+            "fill": fill NaNs with the last valid value of their column and drop the
+            leading rows without one.
+            Defaults to "trim_edges".
+
+    Returns:
+        Union[np.ndarray, DataArrays]: The handled data matrix.
+    """
+    policy = NaNPolicy(policy)
+    values = data.values if isinstance(data, DataArrays) else data
+    if policy is NaNPolicy.KEEP or not len(values):
+        return data
+
+    rows: Union[slice, np.ndarray]
+    if policy is NaNPolicy.DROP_ANY:
+        rows = ~np.isnan(values).any(axis=1)
+    else:
+        if policy is NaNPolicy.FILL:
+            _forward_fill(values)
+        first = _find_complete_row(values)
+        if first == -1:
+            rows = slice(0, 0)
+        else:
+            rows = slice(first, _find_complete_row(values, reverse=True) + 1)
+
+    if isinstance(data, DataArrays):
+        return replace(data, timestamps=data.timestamps[rows], values=data.values[rows])
+    return data[rows]
+
+
+def split_aggregations(data: DataArrays, n_aggregations: int) -> DataArrays:
+    """
+    Returns the DataArrays of a multi-aggregation fetch with the values as
+    (rows, variables, aggregations) array.
+
+    The value columns are ordered by variable, then aggregation, so column-major values
+    are reshaped without a copy.
+
+    Args:
+        data (DataArrays): The data with one value column per variable and aggregation.
+        n_aggregations (int): Number of aggregations per variable.
+
+    Returns:
+        DataArrays: The data with 3-D values.
+    """
+    rows, columns = data.values.shape
+    values = data.values.reshape((rows, n_aggregations, columns // n_aggregations), order="F")
+    return replace(data, values=values.transpose(0, 2, 1))
+
+
+def resolve_aggregations(
+    aggregations: Union[None, str, Sequence[str]], resolution: str
+) -> Optional[Tuple[str, ...]]:
+    """
+    Returns the aggregations of a data fetch as tuple.
+
+    Args:
+        aggregations (Union[None, str, Sequence[str]]): Aggregations per variable,
+        e.g. ["min", "max", "avg"], or None for the average only.
+        resolution (str): Data resolution.
+
+    Returns:
+        Optional[Tuple[str, ...]]: The aggregations, None for the average only.
+
+    Raises:
+        ValueError: If no aggregation is given or the resolution is "nanos".
+    """
+    if aggregations is None:
+        return None
+    if isinstance(aggregations, str):
+        aggregations = [aggregations]
+    if not aggregations:
+        raise ValueError("No aggregation selected")
+    if resolution == "nanos":
+        raise ValueError("Aggregations require an aggregated resolution, not 'nanos'")
+    return tuple(aggregations)
+
+
 class CloudRequest:
-    def __init__(self) -> None:
-        self.stream_variables = None
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        session_config: Optional[SessionConfig] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        json_backend: Union[None, str, JSONBackend] = None,
+        cache: Optional[ChunkCache] = None,
+        result_cache: Optional[ResultCache] = None,
+    ) -> None:
+        """
+        Args:
+            session (Optional[requests.Session]): Custom session used for every request
+            (e.g. a mocked session in tests). Defaults to a pooled session built from
+            session_config.
+            session_config (Optional[SessionConfig]): Pool size, keep-alive and timeout
+            settings. Defaults to SessionConfig().
+            retry_policy (Optional[RetryPolicy]): Retry, backoff and default deadline
+            settings. Defaults to RetryPolicy().
+            json_backend (Union[None, str, JSONBackend]): JSON decoder used for data and
+            metadata responses ("orjson", "simdjson" or "json"). Defaults to the fastest
+            installed one.
+            cache (Optional[ChunkCache]): On-disk cache of the data fetched by get_var_data
+            and get_data_np, only the buckets missing in it are requested.
+            Defaults to None (no cache).
+            result_cache (Optional[ResultCache]): In-memory cache of the results of
+            get_var_data and get_data_np, shared by threads making identical requests.
+            Defaults to None (no cache).
+        """
+        self.session_config = session_config or SessionConfig()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.session = session or create_session(self.session_config)
+        self.json_backend = get_json_backend(json_backend)
+        self.cache = cache
+        self.result_cache = result_cache
         self.url: Optional[str] = ""
         self.user: str = ""
         self.pw: str = ""
-        self.login_token: Optional[Dict[str, Optional[str]]] = None
-        self.refresh_token: Optional[str] = None
-        self.streams: Optional[Dict[str, GIStream]] = None
-        self.stream_variables: Optional[Dict[str, GIStreamVariable]] = None
-        self.query: str = ""
+        self.token_manager = TokenManager(refresh_func=self._request_refreshed_tokens)
+        # Transferred vs. decoded bytes of the last data response and of all responses
+        self.last_transfer: Optional[TransferStats] = None
+        self.transfer_counter = TransferCounter()
+        # Load streams and variables on first use (see login(lazy_metadata=True))
+        self.lazy_metadata = False
+        self._streams: Optional[Dict[str, GIStream]] = None
+        self._stream_variables: Optional[VariableCatalog] = None
+        # Streams whose variables were loaded lazily, None once all are loaded
+        self._variable_sids: Optional[set] = set()
+        # Last GraphQL query sent by a data method
+        self.query: Optional[GQLQuery] = None
         self.request_measurement_res = None
         self.timezone: str = "Europe/Vienna"
 
@@ -199,6 +516,228 @@ class CloudRequest:
         self.session_ID = None
         self.csv_config = CsvConfig()
 
+    def __enter__(self) -> CloudRequest:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the session and all pooled connections."""
+        self.session.close()
+
+    @property
+    def login_token(self) -> Optional[Dict[str, Optional[str]]]:
+        """The current token pair, None if not logged in."""
+        if not self.token_manager.access_token:
+            return None
+        return {
+            "access_token": self.token_manager.access_token,
+            "refresh_token": self.token_manager.refresh_token,
+        }
+
+    @login_token.setter
+    def login_token(self, login_token: Optional[Dict[str, Optional[str]]]) -> None:
+        if not login_token:
+            self.token_manager.clear()
+            return
+        self.token_manager.set_tokens(
+            login_token.get("access_token"), login_token.get("refresh_token")
+        )
+
+    @property
+    def refresh_token(self) -> Optional[str]:
+        return self.token_manager.refresh_token
+
+    @refresh_token.setter
+    def refresh_token(self, refresh_token: Optional[str]) -> None:
+        self.token_manager.refresh_token = refresh_token
+
+    @property
+    def streams(self) -> Optional[Dict[str, GIStream]]:
+        """the streams by id, fetched on first use in lazy mode"""
+        if self._streams is None and self.lazy_metadata and self.login_token:
+            self.get_all_stream_metadata()
+        return self._streams
+
+    @streams.setter
+    def streams(self, streams: Optional[Dict[str, GIStream]]) -> None:
+        self._streams = streams
+
+    @property
+    def stream_variables(self) -> Optional[VariableCatalog]:
+        """the variables by "<stream>__<variable>" name, all fetched on first use in lazy mode"""
+        if self.lazy_metadata and self._variable_sids is not None:
+            self.get_all_var_metadata()
+        return self._stream_variables
+
+    @stream_variables.setter
+    def stream_variables(self, stream_variables: Optional[Dict[str, GIStreamVariable]]) -> None:
+        if stream_variables is not None and not isinstance(stream_variables, VariableCatalog):
+            stream_variables = VariableCatalog(stream_variables)
+        self._stream_variables = stream_variables
+        self._variable_sids = None
+
+    def _get_variable_catalog(self, sid: str) -> Optional[VariableCatalog]:
+        """
+        Returns the variable catalog with the variables of a stream, in lazy mode only this
+        stream's variables are fetched on first use.
+
+        Returns:
+            Optional[VariableCatalog]: The catalog, None if no variables are loaded.
+        """
+        if self.lazy_metadata and self._variable_sids is not None:
+            if sid not in self._variable_sids and self._load_var_metadata([sid]):
+                self._variable_sids.add(sid)
+        return self._stream_variables
+
+    def _get_stream_variables(self, sid: str) -> Optional[List[GIStreamVariable]]:
+        """Returns the variables of a stream, None if no variables are loaded."""
+        catalog = self._get_variable_catalog(sid)
+        return None if catalog is None else catalog.find(sid=sid)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Authorization header with the current (refreshed if necessary) bearer token."""
+        return self.token_manager.auth_header()
+
+    @property
+    def transfer_stats(self) -> TransferStats:
+        """Accumulated transferred vs. decoded bytes of all data responses."""
+        return self.transfer_counter.totals
+
+    def _record_transfer(self, stats: TransferStats) -> None:
+        self.last_transfer = stats
+        self.transfer_counter.record(stats)
+        logging.debug(
+            f"Received {stats.wire_bytes} bytes ({stats.content_encoding or 'identity'}),"
+            f" decoded {stats.decoded_bytes} bytes"
+        )
+
+    def _read_body(self, res: requests.Response) -> bytes:
+        """
+        Reads the complete (decompressed) body of a streamed response
+        and records its transfer stats.
+
+        Args:
+            res (requests.Response): The response.
+
+        Returns:
+            bytes: The decoded body.
+        """
+        stats = TransferStats()
+        body = b"".join(iter_decoded_content(res, stats))
+        self._record_transfer(stats)
+        return body
+
+    def _has_gql_errors(self, body: bytes) -> bool:
+        """
+        Returns True if a response body is a JSON document with top-level GraphQL errors,
+        other bodies (e.g. CSV files) have none.
+        """
+        if body.lstrip(b"\xef\xbb\xbf \t\r\n")[:1] != b"{" or b'"errors"' not in body:
+            return False
+        try:
+            return get_graphql_error(self.json_backend.loads(body)) is not None
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _get_gql_error_message(body: bytes) -> str:
+        """Extracts the first GraphQL error message of a response body."""
+        try:
+            return json.loads(body).get("errors", [{}])[0].get("message", "Unknown error")
+        except (ValueError, AttributeError, IndexError, TypeError):
+            return body[:200].decode(errors="replace") or "Unknown error"
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        authenticated: bool = True,
+        retry: Optional[bool] = None,
+        deadline: Union[None, float, Deadline] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        Central request executor: sends a request over the pooled session.
+
+        Authenticated requests carry the current bearer token and are repeated once with a
+        refreshed token on 401/403. Responses with a status in the retry policy's
+        status_forcelist (429/5xx) and connection errors are retried with exponential
+        backoff and jitter, honouring Retry-After. All attempts and waits stay within the
+        deadline; connect/read timeouts are clamped to the remaining budget.
+
+        Args:
+            method (str): HTTP method, e.g. "POST".
+            url (str): Target url.
+            authenticated (bool): Whether to send the bearer token. Defaults to True.
+            retry (Optional[bool]): Whether transient failures are retried. Pass True for
+            requests which only read (e.g. GraphQL queries sent as POST) and False for
+            requests that must not be repeated. Defaults to None (only the idempotent
+            methods of the retry policy, e.g. GET, are retried).
+            deadline (Union[None, float, Deadline]): Time budget in seconds or a Deadline
+            shared with other requests of the same call. Defaults to the policy deadline.
+            **kwargs: Passed on to requests.Session.request.
+
+        Returns:
+            requests.Response: The last server response.
+
+        Raises:
+            requests.RequestException: If the last attempt failed without response
+            (DeadlineExceeded if the budget ran out before sending).
+        """
+        policy = self.retry_policy
+        deadline = Deadline.resolve(deadline, policy.deadline)
+        if retry is None:
+            retry = policy.should_retry_method(method)
+        max_attempts = policy.max_attempts if retry else 1
+        timeout = kwargs.pop("timeout", self.session_config.timeout)
+        headers = {"Accept-Encoding": ACCEPT_ENCODING, **(kwargs.pop("headers", None) or {})}
+        token_refreshed = False
+        attempt = 0
+
+        while True:
+            attempt += 1
+            token = self.token_manager.get_access_token() if authenticated else None
+            request_headers = (
+                {**headers, **self.token_manager.auth_header()} if authenticated else headers
+            )
+            try:
+                res = self.session.request(
+                    method,
+                    url,
+                    headers=request_headers,
+                    timeout=deadline.clamp_timeout(timeout),
+                    **kwargs,
+                )
+            except requests.ConnectionError as e:
+                delay = policy.get_backoff(attempt)
+                if attempt >= max_attempts or not deadline.allows(delay):
+                    raise
+                logging.warning(f"Connection error ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                continue
+
+            if authenticated and res.status_code in {401, 403} and not token_refreshed:
+                token_refreshed = True
+                if self.token_manager.refresh(stale_token=token):
+                    logging.info("Token expired. Renewed token, retrying request...")
+                    res.close()
+                    attempt -= 1
+                    continue
+
+            if not policy.should_retry_status(res.status_code) or attempt >= max_attempts:
+                return res
+            delay = policy.get_delay(attempt, res.headers.get("Retry-After"))
+            if not deadline.allows(delay):
+                return res
+            logging.warning(
+                f"Request failed with code {res.status_code}, retrying in {delay:.1f}s..."
+            )
+            res.close()
+            time.sleep(delay)
+
     def login(
         self,
         url: Optional[str] = None,
@@ -207,6 +746,10 @@ class CloudRequest:
         access_token: Optional[str] = None,
         use_env_file: bool = False,
         dotenv_path: Optional[str] = ".env",
+        metadata_snapshot: Optional[str] = None,
+        snapshot_ttl: Optional[float] = 86_400.0,
+        check_snapshot: bool = True,
+        lazy_metadata: bool = False,
     ) -> None:
         """Login method that handles Bearer Token/tenant,
         username/password logins, or .env file.
@@ -215,6 +758,19 @@ class CloudRequest:
         CLOUD_TENANT='https://demo.gi-cloud.io'
         BEARER_TOKEN=''
         dotenv_path example: "/path/to/custom/.env"
+
+        With metadata_snapshot (a file path) the stream and variable metadata are loaded
+        from the snapshot while it is younger than snapshot_ttl seconds and, if
+        check_snapshot, the stream list is unchanged (see load_metadata_snapshot).
+        Otherwise they are fetched (a stream list fetched by the check is reused) and the
+        snapshot is rewritten. The check only compares the id, name, sample rate and index
+        of the streams: variables added to an existing stream are not seen until the
+        snapshot is older than snapshot_ttl.
+
+        With lazy_metadata no metadata is loaded during the login: streams are fetched
+        on first use and variables only for the streams a method needs (e.g.
+        get_all_vars_of_stream or the column names of get_var_data), all of them when
+        stream_variables or find_var is used.
         """
 
         if url and access_token:
@@ -227,7 +783,6 @@ class CloudRequest:
         elif use_env_file:
             tenant, bearer_token, refresh_token = (
                 authenticate.load_env_variables(dotenv_path=dotenv_path))
-            logging.info(bearer_token)
             self.url = tenant
             self.login_token = {
                 "access_token": bearer_token,
@@ -247,12 +802,16 @@ class CloudRequest:
             login_url = f"{self.url}/token"
 
             try:
-                res = requests.post(login_url, data=login_form, headers=headers, auth=auth)
+                res = self._request(
+                    "POST",
+                    login_url,
+                    authenticated=False,
+                    data=login_form,
+                    headers=headers,
+                    auth=auth,
+                )
                 if res.status_code == 200:
                     self.login_token = res.json()
-                    self.refresh_token = (
-                        (self.login_token.get("refresh_token")) if self.login_token else None
-                    )
                     logging.info("Login successful")
                 else:
                     logging.error(
@@ -263,11 +822,22 @@ class CloudRequest:
 
         try:
             assert self.login_token, "Login token is None even after Login!!"
-            # Set headers for future requests after login
-            self.headers: dict = {"Authorization": f"Bearer {self.login_token['access_token']}"}
-            self.get_all_stream_metadata()
+            self.lazy_metadata = lazy_metadata
+            if lazy_metadata:
+                self._streams, self._stream_variables, self._variable_sids = None, None, set()
+                return
+            self._streams = None
+            if metadata_snapshot is not None and self.load_metadata_snapshot(
+                metadata_snapshot, snapshot_ttl, check_snapshot
+            ):
+                self.print_streams()
+                return
+            if not self._streams:
+                self.get_all_stream_metadata()
             self.print_streams()
             self.get_all_var_metadata()
+            if metadata_snapshot is not None and self.stream_variables:
+                self.save_metadata_snapshot(metadata_snapshot)
         except Exception as e:
             logging.error(f"Login post-processing failed: {e}")
             raise Exception(f"Login failed! {e}")
@@ -277,28 +847,39 @@ class CloudRequest:
         Refresh the access token with a refresh token.
         The refresh token is valid for 14 days.
         """
-        if not self.refresh_token:
-            logging.error("No refresh token available for refreshing access token.")
-            return
+        self.token_manager.refresh()
+
+    def _request_refreshed_tokens(self, refresh_token: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Exchanges a refresh token for a new token pair (used by the token manager).
 
+        Args:
+            refresh_token (str): The refresh token.
+
+        Returns:
+            Optional[Tuple[str, Optional[str]]]: The new access and refresh token,
+            or None if the refresh failed.
+        """
         # Prepare request
         refresh_form = {
             "ClientID": "gibench",
-            "RefreshToken": self.refresh_token,
+            "RefreshToken": refresh_token,
         }
         headers = {"Content-Type": "application/json"}
         refresh_url = f"{self.url}/rpc/AdminAPI.RefreshToken"
 
         # Send request
         try:
-            res = requests.post(refresh_url, json=refresh_form, headers=headers)
+            res = self._request(
+                "POST", refresh_url, authenticated=False, json=refresh_form, headers=headers
+            )
             if res.status_code == 200:
                 response_data = res.json()
-                self.login_token = {
-                    "access_token": response_data.get("AccessToken"),
-                    "refresh_token": response_data.get("RefreshToken", self.refresh_token),
-                }
                 logging.info("Access token refreshed successfully.")
+                return (
+                    response_data.get("AccessToken"),
+                    response_data.get("RefreshToken", refresh_token),
+                )
             else:
                 logging.error(
                     f"Failed to refresh access token. Response Code: "
@@ -306,8 +887,7 @@ class CloudRequest:
                 )
         except requests.RequestException as e:
             logging.warning(f"Request error while refreshing access token: {e}")
-
-    from typing import Optional, Dict
+        return None
 
     def get_all_stream_metadata(self) -> Optional[Dict[Any, GIStream]]:
         """
@@ -326,9 +906,9 @@ class CloudRequest:
         url_list = f"{self.url}/kafka/structure/sources"
         # Send request
         try:
-            res = requests.get(url_list, headers=self.headers)
+            res = self._request("GET", url_list)
             if res.status_code == 200:
-                response_data = res.json()
+                response_data = self.json_backend.loads(res.content)
                 self.streams = {}  # Reset memory
                 for stream in response_data["Data"]:
                     name = stream["Name"]
@@ -347,20 +927,85 @@ class CloudRequest:
                         index,
                     )
                 return self.streams
-            elif res.status_code in {401, 403}:
-                self.refresh_access_token()
-                res = requests.get(url_list, headers=self.headers)
-                if res.status_code == 200:
-                    return self.get_all_stream_metadata()
-                else:
-                    logging.error(f"Failed after token refresh! Code: {res.status_code}")
             else:
                 logging.error(f"Failed! Code: {res.status_code}, Reason: {res.reason}")
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:
             logging.warning(f"Request error while fetching stream metadata: {e}")
 
         return None
 
+    def save_metadata_snapshot(self, path: str) -> bool:
+        """
+        Writes the loaded streams and variables to a snapshot file (see
+        load_metadata_snapshot).
+
+        Args:
+            path (str): File path.
+
+        Returns:
+            bool: True if the snapshot was written.
+        """
+        if not self.streams or self.stream_variables is None:
+            logging.info("You have no loaded metadata.")
+            return False
+        snapshot = MetadataSnapshot(
+            url=self.url or "",
+            fingerprint=self._stream_fingerprint(self.streams),
+            streams=[list(vars(stream).values()) for stream in self.streams.values()],
+            variables=[
+                [name, *vars(variable).values()] for name, variable in self.stream_variables.items()
+            ],
+        )
+        return save_snapshot(path, snapshot)
+
+    def load_metadata_snapshot(
+        self, path: str, ttl: Optional[float] = 86_400.0, check: bool = True
+    ) -> bool:
+        """
+        Loads the streams and variables from a snapshot of this tenant (see
+        save_metadata_snapshot) instead of fetching them.
+
+        Args:
+            path (str): File path.
+            ttl (Optional[float]): Maximum age of the snapshot in seconds.
+            Defaults to one day, None accepts any age.
+            check (bool): Fetch the stream list (one small request) and only use the
+            snapshot if no stream was added, removed or changed. The streams then have
+            current last timestamps. Defaults to True.
+
+        Returns:
+            bool: True if the metadata was loaded, False if the snapshot is missing,
+            expired or stale. The stream list fetched by the check is kept on .streams.
+        """
+        snapshot = load_snapshot(path, self.url or "", ttl, self.json_backend)
+        if snapshot is None:
+            return False
+        streams = {row[1]: GIStream(*row) for row in snapshot.streams}
+        if check:
+            current = self.get_all_stream_metadata()
+            if current is None or self._stream_fingerprint(current) != snapshot.fingerprint:
+                logging.info(f"Metadata snapshot {path} is stale")
+                return False
+            streams = current
+
+        self.streams = streams
+        self.stream_variables = {row[0]: GIStreamVariable(*row[1:]) for row in snapshot.variables}
+        unit_names = {var.unit for var in self.stream_variables.values() if var.unit}
+        self.units = cast(Type[Enum], Enum("Units", {unit: unit for unit in unit_names}))
+        logging.info(
+            f"Loaded {len(self.streams)} streams and {len(self.stream_variables)} variables "
+            f"from {path} ({snapshot.age:.0f} s old)"
+        )
+        return True
+
+    @staticmethod
+    def _stream_fingerprint(streams: Dict[str, GIStream]) -> str:
+        """Returns the fingerprint of the stream configuration (not the timestamps)."""
+        return stream_fingerprint(
+            (stream.id, stream.name, stream.sample_rate_hz, stream.index)
+            for stream in streams.values()
+        )
+
     def get_streams_by_name(self, stream_name: str) -> Optional[List[GIStream]]:
         """
         Searches for streams by name.
@@ -417,35 +1062,40 @@ class CloudRequest:
             logging.info("You have no loaded streams. Please load streams first.")
             return
 
+        self.stream_variables = {}  # Reset memory
+        self._load_var_metadata([stream.id for stream in self.streams.values()])
+
+    def _load_var_metadata(self, sids: List[str]) -> bool:
+        """
+        Loads the variables of the given streams into stream_variables
+        (see get_all_var_metadata) and updates the units.
+
+        Args:
+            sids (List[str]): Stream IDs.
+
+        Returns:
+            bool: True if the variables were loaded.
+        """
         url = f"{self.url}/kafka/structure/sources"
         assert self.login_token, "No valid access token. Please log in first."
-        headers = {
-            "Authorization": f"Bearer {self.login_token['access_token']}",
-            "Content-Type": "application/json",
-        }
+        headers = {"Content-Type": "application/json"}
 
-        self.stream_variables = {}  # Reset memory
-        unit_names = set()
+        if self._stream_variables is None:
+            self._stream_variables = VariableCatalog()
 
         payload = {
             "AddVarMapping": True,
-            "Sources": [stream.id for stream in self.streams.values()],
+            "Sources": sids,
         }
 
         try:
-            res = requests.post(url, json=payload, headers=headers)
-
-            if res.status_code == 401 or res.status_code == 403:
-                self.refresh_access_token()
-                headers["Authorization"] = f"Bearer {self.login_token['access_token']}"
-                res = requests.post(url, json=payload, headers=headers)
-
+            res = self._request("POST", url, retry=True, json=payload, headers=headers)
             res.raise_for_status()
-            response_data = res.json()
+            response_data = self.json_backend.loads(res.content)
 
             if not response_data.get("Success"):
                 logging.error("Failed to load data: %s", response_data.get("Message"))
-                return
+                return False
 
             for source in response_data.get("Data", []):
                 stream_name = source["Name"]
@@ -469,21 +1119,20 @@ class CloudRequest:
                                          f"'{stream_name}' due to missing key: {missing_key}")
                         continue
 
-                    if unit:
-                        unit_names.add(unit)
-
                     # Create unique variable name
                     unique_var_name = f"{stream_name}__{name}"
-                    self.stream_variables[unique_var_name] = GIStreamVariable(
+                    self._stream_variables[unique_var_name] = GIStreamVariable(
                         variable_id, name, index, unit, data_type, sid
                     )
 
-        except requests.RequestException as e:
+        except (requests.RequestException, ValueError) as e:
             logging.error("Request error while fetching variable metadata: %s", e)
-            return
+            return False
 
         # Create Enum for available units
+        unit_names = {var.unit for var in self._stream_variables.values() if var.unit}
         self.units = cast(Type[Enum], Enum("Units", {unit: unit for unit in unit_names}))
+        return True
 
     def variable_info(self) -> Optional[Any]:
         """
@@ -498,14 +1147,11 @@ class CloudRequest:
 
         # Prepare request
         url_list = f"{self.url}/online/structure/variables"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.login_token['access_token']}",
-        }
+        headers = {"Content-Type": "application/json"}
 
         # Send request
         try:
-            res = requests.get(url_list, headers=headers)
+            res = self._request("GET", url_list, headers=headers)
             if res.status_code == 200:
                 response_data = res.json()
                 # TODO: Implement processing of response_data here if needed
@@ -531,23 +1177,20 @@ class CloudRequest:
             Optional[Dict[str, GIStreamVariable]]: Dictionary of found variables
             or None if no matches.
         """
-        if not self.stream_variables:
+        catalog = self.stream_variables
+        if not catalog:
             logging.info("No variables are available to search.")
             return None
 
-        # Search logic
-        if isinstance(var_name, list):
-            var_name_set = set(var_name)  # Use set for faster lookup
-            match = [k for k in self.stream_variables.keys() if any(vr in k for vr in var_name_set)]
-        else:
-            match = [k for k in self.stream_variables.keys() if var_name in k]
+        # Substring search in the trigram index
+        match = catalog.search(var_name)
 
         if not match:
             logging.info("No variable found.")
             return None
 
         # Create the result dictionary for matching variables
-        result = {m: self.stream_variables[m] for m in match}
+        result = {m: catalog[m] for m in match}
         return result
 
     def filter_var_attr(self, attr: str, value: str) -> Optional[List[GIStreamVariable]]:
@@ -562,271 +1205,1220 @@ class CloudRequest:
             Optional[List[GIStreamVariable]]: A list of matching variables,
              or None if no matches found.
         """
-        if not self.stream_variables:
+        if attr == "sid":
+            # Only the variables of this stream are loaded in lazy mode
+            catalog = self._get_variable_catalog(value)
+        else:
+            catalog = self.stream_variables
+        if not catalog:
             logging.info("No stream variables available to filter.")
             return None
 
-        # Filtering based on the attribute and value
-        match = [var for var in self.stream_variables.values() if getattr(var, attr, "") == value]
+        # Filtering based on the attribute and value (indexed for sid, unit and data_type)
+        match = catalog.find(**{attr: value})
 
         return match if match else None
 
+    def get_var_data_batched(
+        self,
+        sid: str,
+        index_list: List,
+        start_date: Union[TimeLike, TimeRange],
+        end_date: Optional[TimeLike] = None,
+        resolution: str = "nanos",
+        custom_column_names: Optional[List[str]] = None,
+        timezone: str = "UTC",
+        max_points: int = 700_000,
+        deadline: Optional[float] = None,
+        max_workers: int = 8,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        dtype: Optional[DTypeLike] = None,
+        output: Union[str, OutputFormat] = OutputFormat.PANDAS,
+        aggregations: Union[None, str, Sequence[str]] = None,
+        target_points: Optional[int] = None,
+        limits: Optional[QueryLimits] = None,
+        periods: Optional[np.ndarray] = None,
+    ) -> Optional[DataOutput]:
+        """
+        Returns a pandas DataFrame for long time ranges, fetched as time slices in parallel.
+
+        The request is split by a query plan (see plan_query): non-overlapping windows of
+        about the same number of rows, aligned to the resolution, and column groups if the
+        channels do not fit one request. The requests are fetched concurrently by a bounded
+        pool of worker threads sharing the pooled session, then reassembled in order into
+        one array. Rows repeated at window boundaries are dropped, the nan_policy is applied
+        to the reassembled range (so trimming only affects its edges, not those of every
+        slice).
+
+        Args:
+            sid (str): Stream ID.
+            index_list (List[str]): List of channel indices (e.g., ["a10", "a11"]).
+            start_date (Union[TimeLike, TimeRange]): Start date, e.g. "YYYY-MM-DD HH:MM:SS[.fff]"
+            (UTC), datetime, np.datetime64 or epoch ms, or the TimeRange to fetch.
+            end_date (Optional[TimeLike]): End date (inclusive), None if start_date is a
+            TimeRange. Defaults to None.
+            resolution (str, optional): Data resolution. Defaults to "nanos".
+            custom_column_names (Optional[List[str]], optional):
+            Custom column names for the DataFrame.
+            timezone (str, optional): Timezone for the data. Defaults to "UTC".
+            max_points (int, optional): Values (rows * channels) per request.
+            deadline (Optional[float], optional): Time budget in seconds for all slices
+            including retries. Defaults to retry_policy.deadline.
+            max_workers (int, optional): Number of slices fetched concurrently.
+            nan_policy (Union[str, NaNPolicy], optional): Handling of rows with NaNs
+            (see apply_nan_policy). Defaults to "trim_edges".
+            dtype (Optional[DTypeLike], optional): dtype of the values, e.g. "float32", or
+            "native" for the smallest float dtype holding the variables' DataFormat. The
+            timestamps are always exact (ns for "nanos"). Defaults to None (float64).
+            output (Union[str, OutputFormat], optional): "pandas", "numpy" (DataArrays),
+            "arrow" (pyarrow.Table) or "polars". Arrow fields carry the variable name, index,
+            stream, unit and aggregation as metadata. Defaults to "pandas".
+            aggregations (Union[None, str, Sequence[str]], optional): Aggregations per
+            variable (see get_var_data). Defaults to None ("avg").
+            target_points (Optional[int], optional): Maximum number of rows. The finest
+            resolution (not finer than resolution) which fits the budget is chosen from the
+            time range and the stream's sample rate (see select_resolution), e.g. 2000 for
+            a plot. Defaults to None (use resolution).
+            limits (Optional[QueryLimits], optional): Limits per request of the query plan.
+            Defaults to None (QueryLimits with max_points).
+            periods (Optional[np.ndarray], optional): Measurement periods of the stream
+            (see plan_query). Defaults to None.
+
+        Returns:
+            Optional[DataOutput]: DataFrame (or the output format) containing the requested
+            data, or None if a slice could not be fetched.
+        """
+        if not index_list:
+            logging.info("No variable selected")
+            return None
+        time_range = self._get_time_range(start_date, end_date)
+        if time_range is None:
+            return None
+        tss, tse = time_range.start_ms, time_range.end_ms
+        try:
+            nan_policy = NaNPolicy(nan_policy)
+            value_dtype = self._resolve_value_dtype(sid, index_list, dtype, np.float64)
+            output = get_output_format(output)
+            if target_points is not None:
+                resolution = self.select_resolution(
+                    sid, tss, tse, target_points, resolution, aggregations is None
+                )
+            aggregations = resolve_aggregations(aggregations, resolution)
+            plan = self._plan_query(
+                sid,
+                index_list,
+                tss,
+                tse,
+                resolution,
+                aggregations,
+                limits or QueryLimits(max_points=max_points),
+                periods,
+            )
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
+            return None
+        logging.info(str(plan))
+
+        call_deadline = Deadline.resolve(deadline, self.retry_policy.deadline)
+        try:
+            data = self._fetch_time_slices(
+                sid,
+                index_list,
+                plan.windows,
+                resolution,
+                max_workers,
+                call_deadline,
+                value_dtype,
+                aggregations,
+                plan.column_groups,
+            )
+        except requests.RequestException as e:
+            logging.warning(f"Request error while fetching variable data: {e}")
+            return None
+        if data is None:
+            return None
+        data = apply_nan_policy(data, nan_policy)
+        return self._build_output(
+            data,
+            sid,
+            index_list,
+            resolution,
+            output,
+            custom_column_names,
+            timezone,
+            aggregations=aggregations,
+        )
+
+    def plan_query(
+        self,
+        sid: str,
+        index_list: List[str],
+        start_date: Union[TimeLike, TimeRange],
+        end_date: Optional[TimeLike] = None,
+        resolution: str = "nanos",
+        aggregations: Union[None, str, Sequence[str]] = None,
+        limits: Optional[QueryLimits] = None,
+        periods: Optional[np.ndarray] = None,
+    ) -> Optional[QueryPlan]:
+        """
+        Returns the plan by which get_var_data_batched splits a request, without fetching.
+
+        The rows are estimated from the stream's sample rate (raw data) or the resolution,
+        within the stream's first and last timestamp (get_all_stream_metadata) and the
+        measurement periods if given. The plan has the fewest requests which keep every
+        request under the limits, see query_plan.plan_query.
+
+        Args:
+            sid (str): Stream ID.
+            index_list (List[str]): List of channel indices (e.g., ["a10", "a11"]).
+            start_date (Union[TimeLike, TimeRange]): Start date or the TimeRange to fetch.
+            end_date (Optional[TimeLike]): End date, None if start_date is a TimeRange.
+            Defaults to None.
+            resolution (str, optional): Data resolution. Defaults to "nanos".
+            aggregations (Union[None, str, Sequence[str]], optional): Aggregations per
+            variable (see get_var_data). Defaults to None ("avg").
+            limits (Optional[QueryLimits], optional): Limits per request.
+            Defaults to None (QueryLimits()).
+            periods (Optional[np.ndarray], optional): (start, stop) rows in ms of the
+            measurement periods, e.g. print_measurement() after get_measurement_limit.
+            Defaults to None.
+
+        Returns:
+            Optional[QueryPlan]: The plan, or None if the parameters are invalid.
+        """
+        time_range = self._get_time_range(start_date, end_date)
+        if time_range is None:
+            return None
+        try:
+            return self._plan_query(
+                sid,
+                index_list,
+                time_range.start_ms,
+                time_range.end_ms,
+                resolution,
+                resolve_aggregations(aggregations, resolution),
+                limits,
+                periods,
+            )
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
+            return None
+
+    def _plan_query(
+        self,
+        sid: str,
+        index_list: List[str],
+        tss: int,
+        tse: int,
+        resolution: str,
+        aggregations: Optional[Sequence[str]],
+        limits: Optional[QueryLimits],
+        periods: Optional[np.ndarray],
+    ) -> QueryPlan:
+        """
+        Plans a request of one stream (see plan_query).
+
+        Raises:
+            ValueError: If the time range or the channels are empty.
+        """
+        stream = self.streams.get(sid) if self.streams else None
+        active = query_plan.active_periods(
+            tss,
+            tse,
+            self._to_ms(stream.first_ts) if stream else None,
+            self._to_ms(stream.last_ts) if stream else None,
+            periods,
+        )
+        rows_per_second = self._get_stream_rows_per_second(sid, resolution)
+        if not rows_per_second:
+            logging.warning(f"Sample rate of stream {sid} unknown, the request is not split")
+        return query_plan.plan_query(
+            index_list,
+            tss,
+            tse,
+            rows_per_second,
+            resolution,
+            step=self._get_resolution_step(resolution),
+            time_columns=2 if resolution == "nanos" else 1,
+            values_per_column=len(aggregations or ("avg",)),
+            active=active,
+            limits=limits,
+        )
+
+    def _get_stream_rows_per_second(self, sid: str, resolution: str) -> float:
+        """
+        Returns the estimated rows per second of a stream at the resolution, at most one
+        per sample (0 for raw data of a stream without a known sample rate).
+        """
+        sample_rate_hz = self._get_stream_sample_rate_hz(sid)
+        if resolution == "nanos":
+            return sample_rate_hz or 0.0
+        rate = get_sample_rate(resolution)
+        return min(rate, sample_rate_hz) if sample_rate_hz else rate
+
     @staticmethod
-    def _build_sensorid_querystring(
-        indices: List[str], aggregations: Optional[List[str]] = None
+    def _get_resolution_step(resolution: str) -> int:
+        """Returns the length of a row at the resolution in ms (1 for raw data)."""
+        if resolution == "nanos":
+            return 1
+        return max(1, int(round(1000 / get_sample_rate(resolution))))
+
+    @staticmethod
+    def _to_ms(timestamp: Any) -> Optional[int]:
+        """Returns a metadata timestamp in ms as int, None if it is missing or invalid."""
+        try:
+            return int(float(timestamp)) or None
+        except (TypeError, ValueError):
+            return None
+
+    def _get_stream_sample_rate_hz(self, sid: str) -> Optional[float]:
+        """Returns the sample rate of a stream from its metadata, None if unknown."""
+        if self.streams and sid in self.streams:
+            try:
+                return float(self.streams[sid].sample_rate_hz)
+            except (TypeError, ValueError):
+                pass
+        return None
+
+    def select_resolution(
+        self,
+        sid: str,
+        tss: Union[str, float, None],
+        tse: Union[str, float, None],
+        target_points: int,
+        finest: str = "nanos",
+        raw: bool = True,
     ) -> str:
         """
-        Builds a query string for the sensor IDs with optional aggregations.
+        Returns the finest resolution which returns at most target_points rows per variable
+        of a stream in a time range (see select_resolution). The stream's sample rate is
+        taken from the stream metadata (get_all_stream_metadata).
+
+        Args:
+            sid (str): Stream ID.
+            tss (Union[str, float, None]): Start timestamp in ms.
+            tse (Union[str, float, None]): End timestamp in ms.
+            target_points (int): Maximum number of rows.
+            finest (str): Finest resolution considered. Defaults to "nanos".
+            raw (bool): Consider raw data. Defaults to True.
+
+        Returns:
+            str: The resolution.
+
+        Raises:
+            ValueError: If the time range or target_points is invalid.
+        """
+        if tss is None or tse is None:
+            raise ValueError("Invalid time range")
+        duration = max(0.0, float(tse) - float(tss)) / 1000
+        resolution = select_resolution(
+            duration, target_points, self._get_stream_sample_rate_hz(sid), finest, raw
+        )
+        logging.info(f"Selected resolution {resolution} for {target_points} points")
+        return resolution
+
+    def _fetch_time_slices(
+        self,
+        sid: str,
+        index_list: List[str],
+        windows: List[Tuple[int, int]],
+        resolution: str,
+        max_workers: int,
+        deadline: Deadline,
+        value_dtype: Optional[np.dtype] = None,
+        aggregations: Optional[Sequence[str]] = None,
+        column_groups: Optional[List[List[str]]] = None,
+    ) -> Optional[Union[np.ndarray, DataArrays]]:
+        """
+        Fetches the time windows (and column groups) concurrently and reassembles them
+        in order, rows with NaNs are kept.
+
+        Args:
+            sid (str): Stream ID.
+            index_list (List[str]): List of channel indices.
+            windows (List[Tuple[int, int]]): Non-overlapping inclusive windows in ms.
+            resolution (str): Data resolution.
+            max_workers (int): Number of requests sent concurrently.
+            deadline (Deadline): Time budget shared by all windows.
+            value_dtype (Optional[np.dtype]): dtype of the values (see _decode_data_matrices).
+            aggregations (Optional[Sequence[str]]): Aggregations per index.
+            column_groups (Optional[List[List[str]]]): Consecutive parts of index_list
+            fetched by separate requests per window. Defaults to None (index_list).
+
+        Returns:
+            Optional[Union[np.ndarray, DataArrays]]: The data matrix of the whole range,
+            or None if a window could not be fetched.
+
+        Raises:
+            requests.RequestException: If a request could not be sent.
+        """
+        groups = column_groups or [index_list]
+        queries = [
+            self._build_data_query(sid, group, start, end, resolution, aggregations)
+            for start, end in windows
+            for group in groups
+        ]
+        n_time_columns = 2 if resolution == "nanos" else 1
+        slices: List[Union[np.ndarray, DataArrays]] = []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as pool:
+            futures = [
+                pool.submit(
+                    self._fetch_data_matrix,
+                    query,
+                    group,
+                    resolution,
+                    deadline,
+                    NaNPolicy.KEEP,
+                    value_dtype,
+                    aggregations,
+                )
+                for query, group in zip(queries, itertools.cycle(groups))
+            ]
+            try:
+                for i, (start, end) in enumerate(windows):
+                    group_futures = futures[i * len(groups): (i + 1) * len(groups)]
+                    parts = [future.result() for future in group_futures]
+                    data = None
+                    if all(part is not None for part in parts):
+                        data = self._join_column_groups(parts, n_time_columns)
+                    if data is None:
+                        logging.error(f"Fetching time slice {start}-{end} failed")
+                        return None
+                    slices.append(data)
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        return self._concat_time_slices(slices, n_time_columns)
+
+    @staticmethod
+    def _join_column_groups(
+        parts: List[Union[np.ndarray, DataArrays]], n_time_columns: int
+    ) -> Optional[Union[np.ndarray, DataArrays]]:
+        """
+        Joins the column groups of one time window side by side.
+
+        Args:
+            parts (List[Union[np.ndarray, DataArrays]]): Data matrices of the groups.
+            n_time_columns (int): 2 for (ts, nanos) matrices, 1 for (ts) matrices.
+
+        Returns:
+            Optional[Union[np.ndarray, DataArrays]]: The joined matrix, or None if the
+            groups do not have the same timestamps.
+        """
+        if len(parts) == 1:
+            return parts[0]
+        first = parts[0]
+        if isinstance(first, DataArrays):
+            if any(not np.array_equal(p.timestamps, first.timestamps) for p in parts):
+                logging.error("Column groups returned different timestamps")
+                return None
+            # Keep the values column-major
+            n_columns = sum(p.values.shape[1] for p in parts)
+            values = np.empty((len(first), n_columns), dtype=first.values.dtype, order="F")
+            np.concatenate([p.values for p in parts], axis=1, out=values)
+            return replace(first, values=values)
+        if any(not np.array_equal(p[:, :n_time_columns], first[:, :n_time_columns]) for p in parts):
+            logging.error("Column groups returned different timestamps")
+            return None
+        return np.hstack([first] + [p[:, n_time_columns:] for p in parts[1:]])
+
+    @staticmethod
+    def _concat_time_slices(
+        slices: List[Union[np.ndarray, DataArrays]], n_time_columns: int
+    ) -> Union[np.ndarray, DataArrays]:
+        """
+        Copies time ordered slices into one preallocated array, leading rows of a slice
+        which are not after the last row of the previous slice are dropped.
+
+        Args:
+            slices (List[Union[np.ndarray, DataArrays]]): Data matrices in time order.
+            n_time_columns (int): 2 for (ts, nanos) matrices, 1 for (ts) matrices.
+            DataArrays are compared by all their timestamp columns.
+
+        Returns:
+            Union[np.ndarray, DataArrays]: The concatenated matrix.
+        """
+        skips = []
+        last = None
+        for data in slices:
+            times = data.timestamps if isinstance(data, DataArrays) else data[:, :n_time_columns]
+            skip = 0
+            if last is not None and len(data):
+                ts = times[:, 0]
+                skip = int(np.searchsorted(ts, last[0], side="right"))
+                if times.shape[1] > 1 and skip:
+                    # Rows within the same ms are ordered by nanos
+                    same = int(np.searchsorted(ts, last[0], side="left"))
+                    skip = same + int(np.searchsorted(times[same:skip, 1], last[1], side="right"))
+            skips.append(skip)
+            if len(data) > skip:
+                last = times[-1]
+
+        if slices and isinstance(slices[0], DataArrays):
+            return replace(
+                slices[0],
+                timestamps=CloudRequest._concat_rows([d.timestamps for d in slices], skips),
+                values=CloudRequest._concat_rows([d.values for d in slices], skips),
+            )
+        return CloudRequest._concat_rows(slices, skips)
+
+    @staticmethod
+    def _concat_rows(arrays: List[np.ndarray], skips: List[int]) -> np.ndarray:
+        """
+        Copies the arrays without their first skips rows into one preallocated array,
+        column-major arrays stay column-major.
+        """
+        n_columns = arrays[0].shape[1] if arrays else 0
+        dtype = arrays[0].dtype if arrays else float
+        order = "F" if arrays and arrays[0].strides[0] < arrays[0].strides[-1] else "C"
+        out = np.empty(
+            (sum(len(a) - k for a, k in zip(arrays, skips)), n_columns), dtype=dtype, order=order
+        )
+        row = 0
+        for array, skip in zip(arrays, skips):
+            out[row: row + len(array) - skip] = array[skip:]
+            row += len(array) - skip
+        return out
+
+    def get_var_data_batch(
+        self,
+        sid,
+        index_list,
+        tss,
+        tse,
+        resolution,
+        custom_column_names,
+        timezone,
+        deadline=None,
+        nan_policy=NaNPolicy.TRIM_EDGES,
+        dtype=None,
+        output=OutputFormat.PANDAS,
+        aggregations=None,
+    ):
+        if not index_list:
+            logging.info("No variable selected")
+            return None
+
+        output = get_output_format(output)
+        aggregations = resolve_aggregations(aggregations, resolution)
+        query = self._build_data_query(sid, index_list, tss, tse, resolution, aggregations)
+        value_dtype = self._resolve_value_dtype(sid, index_list, dtype, np.float64)
+        valid_data = self._fetch_data_matrix(
+            query, index_list, resolution, deadline, nan_policy, value_dtype, aggregations
+        )
+        if valid_data is None:
+            return None
+        return self._build_output(
+            valid_data,
+            sid,
+            index_list,
+            resolution,
+            output,
+            custom_column_names,
+            timezone,
+            aggregations=aggregations,
+        )
+
+    def _resolve_value_dtype(
+        self,
+        sid: str,
+        index_list: List[str],
+        dtype: Optional[DTypeLike],
+        default: Optional[DTypeLike] = None,
+    ) -> Optional[np.dtype]:
+        """
+        Returns the dtype of the value columns for a dtype option.
+
+        Args:
+            sid (str): Stream ID.
+            index_list (List[str]): List of channel indices.
+            dtype (Optional[DTypeLike]): A float dtype, "native" or None.
+            default (Optional[DTypeLike]): dtype used if dtype is None. DataFrames are
+            built from DataArrays (np.float64) to get exact (ns) timestamps.
+
+        Returns:
+            Optional[np.dtype]: The dtype, or None for float64 matrices.
+
+        Raises:
+            ValueError: If dtype is not a float dtype.
+        """
+        if dtype is None:
+            dtype = default
+        if dtype is None:
+            return None
+        if isinstance(dtype, str) and dtype == "native":
+            variables: List[GIStreamVariable] = []
+            catalog = self._get_variable_catalog(sid)
+            if catalog is not None:
+                for index in index_list:
+                    variables.extend(catalog.find(sid=sid, index=index))
+            return native_value_dtype(variables)
+        try:
+            value_dtype = np.dtype(dtype)
+        except TypeError as e:
+            raise ValueError(f"Invalid dtype {dtype!r}") from e
+        if not np.issubdtype(value_dtype, np.floating):
+            raise ValueError(f"dtype must be a float dtype to hold NaNs, got {value_dtype}")
+        return value_dtype
+
+    def _build_data_query(
+        self,
+        sid: str,
+        index_list: List[str],
+        tss: Union[str, int],
+        tse: Union[str, int],
+        resolution: str,
+        aggregations: Optional[Sequence[str]] = None,
+    ) -> GQLQuery:
+        """
+        Builds the GraphQL query for raw ("nanos") or aggregated (analytics) stream data.
+
+        Args:
+            sid (str): Stream ID.
+            index_list (List[str]): List of channel indices (e.g., ["a10", "a11"]).
+            tss (Union[str, int]): Start timestamp in ms.
+            tse (Union[str, int]): End timestamp in ms.
+            resolution (str): Data resolution.
+            aggregations (Optional[Sequence[str]]): Aggregations per index, all selected in
+            the one analytics query. Defaults to None ("avg").
+
+        Returns:
+            GQLQuery: The query document and its variables.
+        """
+        if resolution == "nanos":
+            return query_builder.raw_query(sid, ["ts", "nanos", *index_list], tss, tse)
+        return query_builder.analytics_query(
+            sid, index_list, tss, tse, resolution, aggregations or ("avg",)
+        )
+
+    def _decode_data_matrices(
+        self,
+        chunks: Iterable[bytes],
+        selections: Dict[str, List[str]],
+        resolution: str,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        value_dtypes: Optional[Dict[str, np.dtype]] = None,
+        aggregations: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Union[np.ndarray, DataArrays]]:
+        """
+        Extracts the data matrices out of a Raw or analytics GraphQL response body.
+
+        Raw responses are decoded incrementally into NumPy arrays while the chunks arrive,
+        without building the Python lists of the whole matrices.
+
+        Args:
+            chunks (Iterable[bytes]): The (decompressed) response body in chunks.
+            selections (Dict[str, List[str]]): Channel indices per response field
+            ("Raw", "analytics" or the alias of a batch query).
+            resolution (str): Data resolution of the query.
+            nan_policy (Union[str, NaNPolicy]): Handling of rows with NaNs
+            (see apply_nan_policy). Defaults to "trim_edges".
+            value_dtypes (Optional[Dict[str, np.dtype]]): dtype of the values per response
+            field. Fields with a dtype are returned as DataArrays with int64 timestamps,
+            ts and nanos of Raw responses are fused to ns while decoding.
+            aggregations (Optional[Sequence[str]]): Aggregations of an analytics response.
+            Defaults to None ("avg").
+
+        Returns:
+            Dict[str, Union[np.ndarray, DataArrays]]: Matrix per response field with the
+            timestamps in the first column(s) and one column per index (and aggregation,
+            ordered by index, then aggregation).
+
+        Raises:
+            GraphQLError: If the response contains errors.
+            ValueError: If the response cannot be decoded.
+        """
+        if resolution == "nanos":
+            # The stdlib parser is slower than np.fromstring on the numeric rows
+            loads = None if self.json_backend is STDLIB else self.json_backend.loads
+            n_columns = {key: len(index_list) + 2 for key, index_list in selections.items()}
+            matrices = decode_raw_matrices(
+                chunks,
+                n_columns,
+                loads=loads,
+                value_dtype=value_dtypes,
+                time_columns=2,
+                fuse_nanos=True,
+            )
+        else:
+            requested_data = self.json_backend.loads(b"".join(chunks))
+            error = get_graphql_error(requested_data)
+            if error:
+                raise GraphQLError(error)
+            matrices = {}
+            for key, index_list in selections.items():
+                analytics = requested_data["data"][key]
+                value_dtype = (value_dtypes or {}).get(key)
+                columns = list(itertools.product(index_list, aggregations or ("avg",)))
+                if value_dtype is None:
+                    data = np.zeros((len(analytics["ts"]), len(columns) + 1), dtype=float)
+                    data[:, 0] = analytics["ts"]
+                    for k, (idx, aggregation) in enumerate(columns):
+                        data[:, k + 1] = analytics[idx][aggregation]
+                    matrices[key] = data
+                    continue
+                values = np.empty(
+                    (len(analytics["ts"]), len(columns)), dtype=value_dtype, order="F"
+                )
+                for k, (idx, aggregation) in enumerate(columns):
+                    values[:, k] = np.array(analytics[idx][aggregation], dtype=float)
+                timestamps = np.array(analytics["ts"], dtype=np.int64).reshape(-1, 1)
+                matrices[key] = DataArrays(timestamps, values)
+
+        return {key: apply_nan_policy(data, nan_policy) for key, data in matrices.items()}
+
+    def _decode_data_matrix(
+        self,
+        chunks: Iterable[bytes],
+        index_list: List[str],
+        resolution: str,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        value_dtype: Optional[np.dtype] = None,
+        aggregations: Optional[Sequence[str]] = None,
+    ) -> Union[np.ndarray, DataArrays]:
+        """
+        Extracts the data matrix out of a Raw or analytics GraphQL response body
+        (see _decode_data_matrices).
+        """
+        key = "Raw" if resolution == "nanos" else "analytics"
+        matrices = self._decode_data_matrices(
+            chunks, {key: index_list}, resolution, nan_policy, {key: value_dtype}, aggregations
+        )
+        return matrices[key]
+
+    def _fetch_data_matrices(
+        self,
+        query: GQLQuery,
+        selections: Dict[str, List[str]],
+        resolution: str,
+        deadline: Union[None, float, Deadline] = None,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        value_dtypes: Optional[Dict[str, np.dtype]] = None,
+        aggregations: Optional[Sequence[str]] = None,
+    ) -> Optional[Dict[str, Union[np.ndarray, DataArrays]]]:
+        """
+        Sends a data query and decodes the matrices straight from the response stream.
+
+        Args:
+            query (GQLQuery): Query built by _build_data_query or a batch query.
+            selections (Dict[str, List[str]]): Channel indices per response field.
+            resolution (str): Data resolution of the query.
+            deadline (Union[None, float, Deadline]): Time budget including retries.
+            nan_policy (Union[str, NaNPolicy]): Handling of rows with NaNs.
+            value_dtypes (Optional[Dict[str, np.dtype]]): dtype of the values per field.
+            aggregations (Optional[Sequence[str]]): Aggregations of an analytics query.
+
+        Returns:
+            Optional[Dict[str, Union[np.ndarray, DataArrays]]]: The data matrices
+            (see _decode_data_matrices), or None if the request failed.
+
+        Raises:
+            requests.RequestException: If the request could not be sent.
+        """
+        url = f"{self.url}/__api__/gql"
+        res = self._request(
+            "POST", url, retry=True, deadline=deadline, json=query.payload, stream=True
+        )
+        stats = TransferStats()
+        try:
+            chunks = iter_decoded_content(res, stats)
+            if res.status_code == 200:
+                return self._decode_data_matrices(
+                    chunks, selections, resolution, nan_policy, value_dtypes, aggregations
+                )
+            error = self._get_gql_error_message(b"".join(chunks))
+        except ValueError as e:
+            error = str(e)
+        finally:
+            res.close()
+            self._record_transfer(stats)
+
+        logging.error(
+            f"Fetching data failed!"
+            f" Response Code: {res.status_code}, Reason: {res.reason}, Msg: {error}"
+        )
+        return None
+
+    def _fetch_data_matrix(
+        self,
+        query: GQLQuery,
+        index_list: List[str],
+        resolution: str,
+        deadline: Union[None, float, Deadline] = None,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        value_dtype: Optional[np.dtype] = None,
+        aggregations: Optional[Sequence[str]] = None,
+    ) -> Optional[Union[np.ndarray, DataArrays]]:
+        """
+        Sends a query built by _build_data_query and decodes the matrix straight from the
+        response stream (see _fetch_data_matrices).
+        """
+        key = "Raw" if resolution == "nanos" else "analytics"
+        matrices = self._fetch_data_matrices(
+            query,
+            {key: index_list},
+            resolution,
+            deadline,
+            nan_policy,
+            {key: value_dtype},
+            aggregations,
+        )
+        return None if matrices is None else matrices[key]
+
+    def _fetch_data(
+        self,
+        sid: str,
+        index_list: List[str],
+        tss: Union[str, int],
+        tse: Union[str, int],
+        resolution: str,
+        deadline: Union[None, float, Deadline],
+        nan_policy: NaNPolicy,
+        value_dtype: Optional[np.dtype],
+        aggregations: Optional[Sequence[str]],
+    ) -> Optional[Union[np.ndarray, DataArrays]]:
+        """
+        Fetches the data matrix of a stream, from the result cache if one is set, then
+        from the chunk cache (see _fetch_cached), otherwise with one query. Results of
+        windows which still receive data are only cached for result_cache.open_ttl.
+        """
+        if self.result_cache is not None:
+            call_deadline = Deadline.resolve(deadline, self.retry_policy.deadline)
+            stream = self._streams.get(sid) if self._streams else None
+            last_ts = self._to_ms(stream.last_ts) if stream else None
+            is_open = self.result_cache.is_open(int(float(tse)), last_ts)
+            key = (
+                self.url,
+                sid,
+                tuple(index_list),
+                int(float(tss)),
+                int(float(tse)),
+                resolution,
+                nan_policy.value,
+                None if value_dtype is None else value_dtype.str,
+                tuple(aggregations) if aggregations else None,
+            )
+            return self.result_cache.get_or_fetch(
+                key,
+                lambda: self._request_data(
+                    sid,
+                    index_list,
+                    tss,
+                    tse,
+                    resolution,
+                    call_deadline,
+                    nan_policy,
+                    value_dtype,
+                    aggregations,
+                ),
+                call_deadline.remaining(),
+                self.result_cache.open_ttl if is_open else None,
+            )
+        return self._request_data(
+            sid, index_list, tss, tse, resolution, deadline, nan_policy, value_dtype, aggregations
+        )
+
+    def _request_data(
+        self,
+        sid: str,
+        index_list: List[str],
+        tss: Union[str, int],
+        tse: Union[str, int],
+        resolution: str,
+        deadline: Union[None, float, Deadline],
+        nan_policy: NaNPolicy,
+        value_dtype: Optional[np.dtype],
+        aggregations: Optional[Sequence[str]],
+    ) -> Optional[Union[np.ndarray, DataArrays]]:
+        """Fetches the data matrix of a stream from the chunk cache or with one query."""
+        if self.cache is not None:
+            return self._fetch_cached(
+                sid,
+                index_list,
+                int(float(tss)),
+                int(float(tse)),
+                resolution,
+                deadline,
+                nan_policy,
+                value_dtype,
+                aggregations,
+            )
+        self.query = self._build_data_query(sid, index_list, tss, tse, resolution, aggregations)
+        return self._fetch_data_matrix(
+            self.query, index_list, resolution, deadline, nan_policy, value_dtype, aggregations
+        )
+
+    def _fetch_cached(
+        self,
+        sid: str,
+        index_list: List[str],
+        tss: int,
+        tse: int,
+        resolution: str,
+        deadline: Union[None, float, Deadline],
+        nan_policy: NaNPolicy,
+        value_dtype: Optional[np.dtype],
+        aggregations: Optional[Sequence[str]],
+    ) -> Optional[Union[np.ndarray, DataArrays]]:
+        """
+        Answers a request from the buckets of the cache and fetches only the missing
+        ones, contiguous missing buckets with one query each. Fetched buckets are stored
+        unless they are still open (see ChunkCache.is_closed).
+
+        Args:
+            sid (str): Stream ID.
+            index_list (List[str]): List of channel indices.
+            tss (int): Start timestamp in ms.
+            tse (int): End timestamp in ms.
+            resolution (str): Data resolution.
+            deadline (Union[None, float, Deadline]): Time budget of all queries.
+            nan_policy (NaNPolicy): Handling of rows with NaNs (see apply_nan_policy).
+            value_dtype (Optional[np.dtype]): dtype of the values (see _fetch_data_matrix).
+            aggregations (Optional[Sequence[str]]): Aggregations per index.
+
+        Returns:
+            Optional[Union[np.ndarray, DataArrays]]: The data matrix in the format of
+            _fetch_data_matrix, or None if a query failed.
+
+        Raises:
+            requests.RequestException: If a request could not be sent.
+        """
+        cache = cast(ChunkCache, self.cache)
+        key = ChunkKey(self.url or "", sid, resolution)
+        raw = resolution == "nanos"
+        columns = [
+            f"{index}.{aggregation}"
+            for index, aggregation in itertools.product(
+                index_list, ["raw"] if raw else aggregations or ["avg"]
+            )
+        ]
+        bucket_ms = cache.bucket_ms(
+            self._get_stream_rows_per_second(sid, resolution), self._get_resolution_step(resolution)
+        )
+        stream = self.streams.get(sid) if self.streams else None
+        last_ts = self._to_ms(stream.last_ts) if stream else None
+        # Timestamps are fused to ns for raw data
+        scale = UNIT_NS["ms"] if raw else 1
+
+        buckets: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        requested = range(tss // bucket_ms, tse // bucket_ms + 1)
+        for bucket in requested:
+            if cache.is_closed(bucket_ms, bucket, last_ts):
+                stored = cache.get(key, bucket_ms, bucket, columns)
+                if stored is not None:
+                    buckets[bucket] = (stored[0], np.column_stack(stored[1]))
+        missing = np.array([b for b in requested if b not in buckets], dtype=np.int64)
+        logging.info(f"Cache: {len(buckets)} buckets stored, {len(missing)} fetched")
+
+        # One query per run of consecutive missing buckets
+        runs = np.split(missing, np.flatnonzero(np.diff(missing) > 1) + 1) if len(missing) else []
+        call_deadline = Deadline.resolve(deadline, self.retry_policy.deadline)
+        for run in runs:
+            first, last = int(run[0]), int(run[-1])
+            self.query = self._build_data_query(
+                sid,
+                index_list,
+                first * bucket_ms,
+                (last + 1) * bucket_ms - 1,
+                resolution,
+                aggregations,
+            )
+            data = self._fetch_data_matrix(
+                self.query,
+                index_list,
+                resolution,
+                call_deadline,
+                NaNPolicy.KEEP,
+                np.dtype(np.float64),
+                aggregations,
+            )
+            if data is None:
+                return None
+            timestamps = cast(DataArrays, data).timestamps[:, 0]
+            values = cast(DataArrays, data).values
+            edges = np.arange(first, last + 2, dtype=np.int64) * bucket_ms * scale
+            bounds = np.searchsorted(timestamps, edges, side="left")
+            for bucket, lo, hi in zip(range(first, last + 1), bounds[:-1], bounds[1:]):
+                buckets[bucket] = (timestamps[lo:hi], values[lo:hi])
+                if cache.is_closed(bucket_ms, bucket, last_ts):
+                    cache.put(
+                        key,
+                        bucket_ms,
+                        bucket,
+                        timestamps[lo:hi],
+                        dict(zip(columns, values[lo:hi].T)),
+                    )
+
+        ordered = [buckets[bucket] for bucket in sorted(buckets)]
+        timestamps = np.concatenate([ts for ts, _ in ordered])
+        values = np.concatenate([v for _, v in ordered])
+        lo, hi = np.searchsorted(timestamps, [tss * scale, (tse + 1) * scale], side="left")
+        return apply_nan_policy(
+            self._cached_matrix(timestamps[lo:hi], values[lo:hi], raw, value_dtype), nan_policy
+        )
+
+    @staticmethod
+    def _cached_matrix(
+        timestamps: np.ndarray, values: np.ndarray, raw: bool, value_dtype: Optional[np.dtype]
+    ) -> Union[np.ndarray, DataArrays]:
+        """
+        Returns cached rows in the format of _fetch_data_matrix: DataArrays with a value
+        dtype, otherwise a float64 matrix with ts (and nanos) columns.
+        """
+        if value_dtype is not None:
+            return DataArrays(
+                timestamps.reshape(-1, 1).astype(np.int64),
+                np.asfortranarray(values, dtype=value_dtype),
+                "ns" if raw else "ms",
+            )
+        if raw:
+            ts, nanos = np.divmod(timestamps, UNIT_NS["ms"])
+            return np.column_stack([ts, nanos, values]).astype(np.float64)
+        return np.column_stack([timestamps, values]).astype(np.float64)
+
+    def _field_infos(
+        self, sid: str, index_list: List[str], names: List[str], aggregation: str
+    ) -> List[FieldInfo]:
+        """
+        Returns the metadata of the value columns of a data fetch.
+
+        Args:
+            sid (str): Stream ID.
+            index_list (List[str]): List of channel indices of the query.
+            names (List[str]): Column names, the variable names are used for missing ones.
+            aggregation (str): Aggregation of the values, "" for raw data.
+
+        Returns:
+            List[FieldInfo]: The metadata per index.
+        """
+        variables = {var.index: var for var in self.filter_var_attr("sid", sid) or []}
+        stream = (self._get_stream_name_for_sid(sid) or "") if variables else ""
+        fields = []
+        for k, index in enumerate(index_list):
+            var = variables.get(index)
+            name = names[k] if k < len(names) else (var.name if var else index)
+            fields.append(FieldInfo(name, index, stream, var.unit if var else "", aggregation))
+        return fields
+
+    def _build_output(
+        self,
+        data: Union[np.ndarray, DataArrays],
+        sid: str,
+        index_list: List[str],
+        resolution: str,
+        output: OutputFormat,
+        custom_column_names: Optional[List[str]] = None,
+        timezone: Optional[str] = "UTC",
+        time_index: bool = False,
+        aggregations: Optional[Sequence[str]] = None,
+    ) -> DataOutput:
+        """
+        Converts a parsed data matrix into the output format (see _build_dataframe).
 
-        Args:
-            indices (List[str]): A list of sensor indices.
-            aggregations (Optional[List[str]]): A list of aggregations to apply.
-            Defaults to ["avg"] if not provided.
+        With aggregations, the numpy output has (rows, variables, aggregations) values
+        (see split_aggregations) and the Arrow columns are named "<variable>.<aggregation>".
 
         Returns:
-            str: The constructed query string.
+            DataOutput: DataFrame, the DataArrays themselves, pyarrow.Table or
+            polars.DataFrame.
         """
-        # Default aggregation to "avg" if none are provided
-        if not aggregations:
-            aggregations = ["avg"]
-
-        # Create the aggregation string
-        agg_str = " ".join(aggregations)
-
-        # Build the query string for each index
-        query_parts = [
-            f"""
-            {i} {{
-                {agg_str}
-            }}
-            """
-            for i in indices
-        ]
+        if output is OutputFormat.PANDAS:
+            return self._build_dataframe(
+                data, sid, index_list, custom_column_names, timezone, time_index, aggregations
+            )
+        if not isinstance(data, DataArrays):
+            data = self._matrix_to_arrays(data, resolution)
+        if output is OutputFormat.NUMPY:
+            return split_aggregations(data, len(aggregations)) if aggregations else data
+
+        column_names = custom_column_names or self.__get_column_names(sid, index_list)
+        fields = self._field_infos(
+            sid, index_list, column_names[1:], "" if resolution == "nanos" else "avg"
+        )
+        if aggregations:
+            fields = [
+                replace(info, name=f"{info.name}.{aggregation}", aggregation=aggregation)
+                for info in fields
+                for aggregation in aggregations
+            ]
+        table = arrow_table(data.times, data.values, column_names[0], fields, timezone)
+        return table if output is OutputFormat.ARROW else polars_frame(table)
 
-        return "\n".join(query_parts)
+    @staticmethod
+    def _matrix_to_arrays(data: np.ndarray, resolution: str) -> DataArrays:
+        """
+        Splits a float64 matrix into DataArrays, the ts and nanos columns of raw data are
+        fused to ns.
+        """
+        time_columns = 2 if resolution == "nanos" else 1
+        timestamps = data[:, :time_columns].astype(np.int64)
+        if time_columns == 2:
+            timestamps = timestamps[:, :1] * NANOS_PER_MS + timestamps[:, 1:]
+        return DataArrays(
+            timestamps,
+            np.asfortranarray(data[:, time_columns:]),
+            time_unit="ns" if time_columns == 2 else "ms",
+        )
 
-    def get_var_data_batched(
+    def _build_dataframe(
         self,
+        data: Union[np.ndarray, DataArrays],
         sid: str,
-        index_list: List,
-        start_date: str,
-        end_date: str,
-        resolution: str = "nanos",
+        index_list: List[str],
         custom_column_names: Optional[List[str]] = None,
-        timezone: str = "UTC",
-        max_points: int = 700_000,
-    ):
-        """BETA: This makes batched calls to GraphQL. Not recommended.
-        This is still about 2x slower than get_data_as_csv() since we make more http requests"""
-        if custom_column_names is None:
-            custom_column_names = []
-        tss, tse = map(self.convert_datetime_to_unix, [start_date, end_date])
-        duration_seconds = (tse - tss) // 1000
-        sample_rate = get_sample_rate(resolution)
-        total_points = sample_rate * len(index_list) * duration_seconds
-
-        if total_points > max_points:
-            num_batches = (total_points // max_points) + 1
-            timestamps = np.linspace(tss, tse, num_batches + 1, dtype=int)
-            logging.info(f"Total points: {total_points}, Num batches: {num_batches}")
-            return pd.concat(
-                [
-                    self.get_var_data_batch(
-                        sid,
-                        index_list,
-                        timestamps[i],
-                        timestamps[i + 1],
-                        resolution,
-                        custom_column_names,
-                        timezone,
-                    )
-                    for i in range(num_batches)
-                ]
-            ).reset_index(drop=True)
-        return self.get_var_data_batch(
-            sid, index_list, tss, tse, resolution, custom_column_names, timezone
-        )
+        timezone: Optional[str] = "UTC",
+        time_index: bool = False,
+        aggregations: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Wraps a parsed data matrix into a DataFrame with a datetime "Time" column or index.
 
-    def get_var_data_batch(
-        self, sid, index_list, tss, tse, resolution, custom_column_names, timezone
-    ):
-        selected_index_string = (
-            ",".join([f'"{index}"' for index in index_list]) if index_list else ""
-        )
-        if not selected_index_string:
-            logging.info("No variable selected")
-            return None
+        The value columns are a view of data and the ms timestamps are reinterpreted as
+        datetime64[ms] (datetime64[ns] before pandas 2), so the matrix is not copied.
 
-        query = f"""
-                {{
-                    analytics(
-                        from: {tss},
-                        to: {tse},
-                        resolution: {resolution},
-                        sid: "{sid}"
-                    ) {{
-                        ts
-                        {self._build_sensorid_querystring(index_list)}
-                    }}
-                }}
-            """
-
-        res = self._execute_gql_request(query)
-        if not res:
-            return None
+        Args:
+            data (Union[np.ndarray, DataArrays]): Parsed data matrix (see _decode_data_matrix).
+            sid (str): Stream ID.
+            index_list (List[str]): List of channel indices of the query.
+            custom_column_names (Optional[List[str]]): Custom column names for the DataFrame,
+            the first one names the time column.
+            timezone (Optional[str]): Timezone for the data. Defaults to "UTC".
+            None skips the timezone handling and returns naive UTC timestamps.
+            time_index (bool): Return the timestamps as DatetimeIndex instead of a column.
+            aggregations (Optional[Sequence[str]]): Aggregations per variable, the columns
+            are then a (variable, aggregation) MultiIndex and the time column is
+            (time name, ""). Defaults to None (one column per variable).
 
-        requested_data = res.json()
-        if resolution == "nanos":
-            data_matrix = requested_data["data"]["Raw"]["data"]
-        else:
-            data_matrix = np.column_stack(
-                (
-                    [requested_data["data"]["analytics"]["ts"]]
-                    + [requested_data["data"]["analytics"][idx]["avg"] for idx in index_list]
-                )
+        Returns:
+            pd.DataFrame: The data as DataFrame.
+        """
+        column_names = custom_column_names or self.__get_column_names(sid, index_list)
+        time_name, value_names = column_names[0], column_names[1:]
+        if aggregations:
+            value_names = pd.MultiIndex.from_product(
+                [value_names, list(aggregations)], names=["variable", "aggregation"]
             )
 
-        data_matrix = np.array(data_matrix, dtype=float)
-        valid_data = data_matrix[~np.isnan(data_matrix).any(axis=1)]
-
-        columns = (
-            custom_column_names if custom_column_names else self.__get_column_names(sid, index_list)
-        )
-        df = pd.DataFrame(valid_data, columns=columns)
-        df["Time"] = pd.to_datetime(df["Time"], unit="ms")
-        self.__convert_df_time_from_utc_to_tz(df, timezone)
+        if isinstance(data, DataArrays):
+            times, values = data.times, data.values
+        else:
+            times, values = data[:, 0].astype(np.int64).view("datetime64[ms]"), data[:, 1:]
+        times = pd.DatetimeIndex(times, name=time_name)
+        if timezone is not None:
+            times = self.__convert_times_from_utc_to_tz(times, timezone)
+
+        if time_index:
+            return pd.DataFrame(values, columns=value_names, index=times, copy=False)
+        df = pd.DataFrame(values, columns=value_names, copy=False)
+        df.insert(0, (time_name, "") if aggregations else time_name, times)
         return df
 
-    def _execute_gql_request(self, query):
-        url = f"{self.url}/__api__/gql"
-        headers = {"Authorization": f"Bearer {self.login_token['access_token']}"}
-        res = requests.post(url, json={"query": query}, headers=headers)
-
-        if res.status_code == 200 and "errors" not in res.text:
-            return res
-        elif res.status_code in [401, 403]:
-            logging.info("Token expired. Renewing...")
-            self.refresh_access_token()
-            return self._execute_gql_request(query)
-        logging.error(f"Request failed with code {res.status_code}: {res.text}")
-        return None
-
     def get_var_data(
         self,
         sid: str,
         index_list: List[str],
-        start_date: str,
-        end_date: str,
+        start_date: Union[TimeLike, TimeRange],
+        end_date: Optional[TimeLike] = None,
         resolution: str = "nanos",
         custom_column_names: Optional[List[str]] = None,
-        timezone: str = "UTC",
-    ) -> Optional[pd.DataFrame]:
+        timezone: Optional[str] = "UTC",
+        deadline: Optional[float] = None,
+        time_index: bool = False,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        dtype: Optional[DTypeLike] = None,
+        output: Union[str, OutputFormat] = OutputFormat.PANDAS,
+        aggregations: Union[None, str, Sequence[str]] = None,
+        target_points: Optional[int] = None,
+    ) -> Optional[DataOutput]:
         """
         Returns a pandas DataFrame with timestamps and values directly from a data stream.
 
         Args:
             sid (str): Stream ID.
             index_list (List[str]): List of channel indices (e.g., ["a10", "a11"]).
-            start_date (str): Start date in format "YYYY-MM-DD HH:MM:SS".
-            end_date (str): End date in format "YYYY-MM-DD HH:MM:SS".
+            start_date (Union[TimeLike, TimeRange]): Start date, e.g. "YYYY-MM-DD HH:MM:SS[.fff]"
+            (UTC), datetime, np.datetime64 or epoch ms, or the TimeRange to fetch.
+            end_date (Optional[TimeLike]): End date (inclusive), None if start_date is a
+            TimeRange. Defaults to None.
             resolution (str, optional): Data resolution. Defaults to "nanos".
             custom_column_names (Optional[List[str]], optional):
             Custom column names for the DataFrame.
-            timezone (str, optional): Timezone for the data. Defaults to "UTC".
+            timezone (Optional[str], optional): Timezone for the data. Defaults to "UTC".
+            None skips the timezone conversion (naive UTC timestamps).
+            deadline (Optional[float], optional): Time budget in seconds including retries.
+            Defaults to retry_policy.deadline.
+            time_index (bool, optional): Return the timestamps as DatetimeIndex instead of
+            a "Time" column. Defaults to False.
+            nan_policy (Union[str, NaNPolicy], optional): Handling of rows with NaNs
+            (see apply_nan_policy). Defaults to "trim_edges".
+            dtype (Optional[DTypeLike], optional): dtype of the value columns, e.g. "float32",
+            or "native" (see get_data_np). Defaults to None (float64).
+            output (Union[str, OutputFormat], optional): "pandas", "numpy" (DataArrays),
+            "arrow" (pyarrow.Table) or "polars". Arrow fields carry the variable name, index,
+            stream, unit and aggregation as metadata. Defaults to "pandas".
+            aggregations (Union[None, str, Sequence[str]], optional): Aggregations per
+            variable fetched in one analytics query, e.g. ["min", "max", "avg"]. The
+            DataFrame columns are then a (variable, aggregation) MultiIndex, the numpy
+            output has (rows, variables, aggregations) values. Defaults to None ("avg").
+            target_points (Optional[int], optional): Maximum number of rows. The finest
+            resolution (not finer than resolution) which fits the budget is chosen from the
+            time range and the stream's sample rate (see select_resolution), e.g. 2000 for
+            a plot. Defaults to None (use resolution).
 
         Returns:
-            Optional[pd.DataFrame]: DataFrame containing the requested data,
-            or None if the request failed.
-        """
-        tss = str(self.convert_datetime_to_unix(start_date))
-        tse = str(self.convert_datetime_to_unix(end_date))
-
-        # Build the query
-        if resolution == "nanos" and index_list:
-            selected_index_string = ", ".join(f'"{idx}"' for idx in index_list)
-            self.query = f"""
-            {{
-                Raw(columns: ["ts", "nanos", {selected_index_string}],
-                sid: "{sid}",
-                from: {tss},
-                to: {tse}) {{
-                    data
-                }}
-            }}
-            """
-        elif index_list:
-            selected_index_string = self._build_sensorid_querystring(index_list)
-            self.query = f"""
-            {{
-                analytics(
-                    from: {tss},
-                    to: {tse},
-                    resolution: {resolution},
-                    sid: "{sid}"
-                ) {{
-                    ts
-                    {selected_index_string}
-                }}
-            }}
-            """
-        else:
+            Optional[DataOutput]: DataFrame (or the output format) containing the requested
+            data, or None if the request failed.
+        """
+        if not index_list:
             logging.info("No variable selected")
             return None
+        time_range = self._get_time_range(start_date, end_date)
+        if time_range is None:
+            return None
+        tss, tse = time_range.start_ms, time_range.end_ms
 
-        # Send the request
-        url_list = f"{self.url}/__api__/gql"
         try:
-            res = requests.post(url_list, json={"query": self.query}, headers=self.headers)
-            if res.status_code == 200 and "errors" not in res.text:
-                requested_data = res.json()
-
-                # Filter data out of the request
-                if resolution == "nanos":
-                    data_matrix = requested_data["data"]["Raw"]["data"]
-                    self.data = np.array(data_matrix, dtype=float)
-                else:
-                    self.data = np.zeros(
-                        (
-                            len(requested_data["data"]["analytics"]["ts"]),
-                            len(index_list) + 1,
-                        )
-                    )
-                    self.data[:, 0] = requested_data["data"]["analytics"]["ts"]
-                    for k, idx in enumerate(index_list):
-                        self.data[:, k + 1] = requested_data["data"]["analytics"][idx]["avg"]
-
-                # Clean the data by removing leading/trailing NaNs
-                valid_rows = ~np.isnan(self.data).any(axis=1)
-                self.data = self.data[valid_rows]
-
-                # Create the DataFrame
-                column_names = custom_column_names or self.__get_column_names(sid, index_list)
-                self.df = pd.DataFrame(self.data, columns=column_names)
-
-                # Convert time column to datetime and adjust timezone
-                self.df["Time"] = pd.to_datetime(self.df["Time"], unit="ms")
-                self.__convert_df_time_from_utc_to_tz(self.df, timezone)
+            # Build the query
+            nan_policy = NaNPolicy(nan_policy)
+            value_dtype = self._resolve_value_dtype(sid, index_list, dtype, np.float64)
+            output = get_output_format(output)
+            if target_points is not None:
+                resolution = self.select_resolution(
+                    sid, tss, tse, target_points, resolution, aggregations is None
+                )
+            aggregations = resolve_aggregations(aggregations, resolution)
+
+            # Send the request and decode the data while it is received
+            data = self._fetch_data(
+                sid,
+                index_list,
+                tss,
+                tse,
+                resolution,
+                deadline,
+                nan_policy,
+                value_dtype,
+                aggregations,
+            )
+            if data is not None:
+                self.data = data
 
-                return self.df
-            elif res.status_code in {401, 403}:
-                logging.info("Token expired. Renewing...")
-                self.refresh_access_token()
-                # Retry once after refreshing the token
-                return self.get_var_data(
+                # Create the DataFrame (or the requested output)
+                self.df = self._build_output(
+                    self.data,
                     sid,
                     index_list,
-                    start_date,
-                    end_date,
                     resolution,
+                    output,
                     custom_column_names,
                     timezone,
+                    time_index,
+                    aggregations,
                 )
-            else:
-                error = res.json().get("errors", [{}])[0].get("message", "Unknown error")
-                logging.error(
-                    f"Fetching data failed!"
-                    f"Response Code: {res.status_code}, Reason: {res.reason}, Msg: {error}"
-                )
+                return self.df
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
         except requests.RequestException as e:
             logging.warning(f"Request error while fetching variable data: {e}")
 
@@ -836,96 +2428,363 @@ class CloudRequest:
         self,
         sid: str,
         index_list: List[str],
-        tss: str,
-        tse: str,
+        tss: Union[str, int, TimeRange],
+        tse: Union[None, str, int] = None,
         resolution: str = "nanos",
-    ) -> Optional[np.ndarray]:
+        deadline: Optional[float] = None,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        dtype: Optional[DTypeLike] = None,
+        aggregations: Union[None, str, Sequence[str]] = None,
+        target_points: Optional[int] = None,
+    ) -> Optional[Union[np.ndarray, DataArrays]]:
         """
         Returns a numpy matrix of data with timestamps and values directly from a data stream.
 
         Args:
             sid (str): Stream ID.
             index_list (List[str]): List of channel indices (e.g., ["a10", "a11"]).
-            tss (str): Start timestamp.
-            tse (str): End timestamp.
+            tss (Union[str, int, TimeRange]): Start timestamp in ms, or the TimeRange.
+            tse (Union[None, str, int]): End timestamp in ms, None if tss is a TimeRange.
+            Defaults to None.
             resolution (str, optional): Data resolution. Defaults to "nanos".
+            deadline (Optional[float], optional): Time budget in seconds including retries.
+            Defaults to retry_policy.deadline.
+            nan_policy (Union[str, NaNPolicy], optional): Handling of rows with NaNs
+            (see apply_nan_policy). Defaults to "trim_edges".
+            dtype (Optional[DTypeLike], optional): dtype of the values, e.g. "float32", or
+            "native" for the smallest float dtype holding the variables' DataFormat. The
+            timestamps are then returned as exact int64, in ns fused from ts and nanos for
+            "nanos". Defaults to None (float64 matrix with ts, nanos columns for "nanos").
+            aggregations (Union[None, str, Sequence[str]], optional): Aggregations per
+            variable fetched in one analytics query, e.g. ["min", "max", "avg"]. Returns
+            DataArrays (float64 by default) with (rows, variables, aggregations) values.
+            Defaults to None ("avg").
+            target_points (Optional[int], optional): Maximum number of rows, the resolution
+            is chosen to fit (see get_var_data). Defaults to None (use resolution).
 
         Returns:
-            Optional[np.ndarray]: Numpy matrix containing the requested data,
-             or None if the request failed.
+            Optional[Union[np.ndarray, DataArrays]]: Numpy matrix containing the requested
+             data (DataArrays if a dtype or aggregations are given), or None if the request
+             failed.
         """
         if not index_list:
             logging.info("No variable selected.")
             return None
 
-        # Build the query
-        if resolution == "nanos":
-            selected_index_string = ", ".join(f'"{idx}"' for idx in index_list)
-            self.query = f"""
-            {{
-                Raw(columns: ["ts", "nanos", {selected_index_string}],
-                sid: "{sid}",
-                from: {tss},
-                to: {tse}) {{
-                    data
-                }}
-            }}
-            """
-        else:
-            selected_index_string = self._build_sensorid_querystring(index_list)
-            self.query = f"""
-            {{
-                analytics(
-                    from: {tss},
-                    to: {tse},
-                    resolution: {resolution},
-                    sid: "{sid}"
-                ) {{
-                    ts
-                    {selected_index_string}
-                }}
-            }}
-            """
-
-        # Send the request
-        url_list = f"{self.url}/__api__/gql"
         try:
-            res = requests.post(url_list, json={"query": self.query}, headers=self.headers)
-            if res.status_code == 200 and "errors" not in res.text:
-                requested_data = res.json()
-
-                # Filter data out of the request
-                if resolution == "nanos":
-                    data_matrix = requested_data["data"]["Raw"]["data"]
-                    self.data = np.array(data_matrix, dtype=float)
-                else:
-                    ts_data = requested_data["data"]["analytics"]["ts"]
-                    self.data = np.zeros((len(ts_data), len(index_list) + 1), dtype=float)
-                    self.data[:, 0] = ts_data
-                    for k, idx in enumerate(index_list):
-                        self.data[:, k + 1] = requested_data["data"]["analytics"][idx]["avg"]
-
-                # Clean the data by removing leading/trailing NaNs
-                valid_rows = ~np.isnan(self.data).any(axis=1)
-                self.data = self.data[valid_rows]
+            # Build the query
+            tss, tse = self._ms_bounds(tss, tse)
+            nan_policy = NaNPolicy(nan_policy)
+            if target_points is not None:
+                resolution = self.select_resolution(
+                    sid, tss, tse, target_points, resolution, aggregations is None
+                )
+            aggregations = resolve_aggregations(aggregations, resolution)
+            value_dtype = self._resolve_value_dtype(
+                sid, index_list, dtype, np.float64 if aggregations else None
+            )
 
+            # Send the request and decode the data while it is received
+            data = self._fetch_data(
+                sid,
+                index_list,
+                tss,
+                tse,
+                resolution,
+                deadline,
+                nan_policy,
+                value_dtype,
+                aggregations,
+            )
+            if data is not None:
+                self.data = split_aggregations(data, len(aggregations)) if aggregations else data
                 return self.data
-            elif res.status_code in {401, 403}:
-                logging.info("Token expired. Renewing...")
-                self.refresh_access_token()
-                # Retry once after refreshing the token
-                return self.get_data_np(sid, index_list, tss, tse, resolution)
-            else:
-                error = res.json().get("errors", [{}])[0].get("message", "Unknown error")
-                logging.error(
-                    f"Fetching data failed!"
-                    f" Response Code: {res.status_code}, Reason: {res.reason}, Msg: {error}"
-                )
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
         except requests.RequestException as e:
             logging.warning(f"Request error while fetching data: {e}")
 
         return None
 
+    @staticmethod
+    def _pack_selections(
+        selections: List[Tuple[str, List[str]]], max_streams: int, max_columns: int
+    ) -> List[List[int]]:
+        """
+        Groups the positions of the selections into batches of at most max_streams
+        selections and max_columns channels (a larger selection gets a batch of its own).
+
+        Args:
+            selections (List[Tuple[str, List[str]]]): (stream ID, indices) pairs.
+            max_streams (int): Maximum number of selections per batch.
+            max_columns (int): Maximum number of channels per batch.
+
+        Returns:
+            List[List[int]]: Positions of the selections per batch, in order.
+        """
+        batches: List[List[int]] = []
+        columns = 0
+        for position, (_, index_list) in enumerate(selections):
+            if (
+                not batches
+                or len(batches[-1]) >= max_streams
+                or columns + len(index_list) > max_columns
+            ):
+                batches.append([])
+                columns = 0
+            batches[-1].append(position)
+            columns += len(index_list)
+        return batches
+
+    def get_streams_data_np(
+        self,
+        selections: List[Tuple[str, List[str]]],
+        tss: Union[str, int, TimeRange],
+        tse: Union[None, str, int] = None,
+        resolution: str = "nanos",
+        max_streams_per_query: int = 20,
+        max_columns_per_query: int = 500,
+        deadline: Optional[float] = None,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        dtype: Optional[DTypeLike] = None,
+        aggregations: Union[None, str, Sequence[str]] = None,
+        target_points: Optional[int] = None,
+    ) -> List[Optional[Union[np.ndarray, DataArrays]]]:
+        """
+        Returns numpy matrices for several streams in the same time range.
+        The selections are packed into as few aliased GraphQL queries as the limits allow,
+        so many streams cost one or a few round trips instead of one per stream.
+        Like get_data_np, only numpy results are returned, see get_streams_var_data for
+        the other output formats.
+
+        Args:
+            selections (List[Tuple[str, List[str]]]): (stream ID, channel indices) pairs,
+            e.g. [("sid1", ["a1", "a2"]), ("sid2", ["a1"])].
+            tss (Union[str, int, TimeRange]): Start timestamp in ms, or the TimeRange.
+            tse (Union[None, str, int]): End timestamp in ms, None if tss is a TimeRange.
+            Defaults to None.
+            resolution (str, optional): Data resolution. Defaults to "nanos".
+            max_streams_per_query (int, optional): Maximum number of selections per query.
+            max_columns_per_query (int, optional): Maximum number of channels per query.
+            deadline (Optional[float], optional): Time budget in seconds for all queries
+            including retries. Defaults to retry_policy.deadline.
+            nan_policy (Union[str, NaNPolicy], optional): Handling of rows with NaNs
+            (see apply_nan_policy). Defaults to "trim_edges".
+            dtype (Optional[DTypeLike], optional): dtype of the values, resolved per stream
+            for "native" (see get_data_np). Defaults to None (float64).
+            aggregations (Union[None, str, Sequence[str]], optional): Aggregations per
+            variable (see get_data_np). Defaults to None ("avg").
+            target_points (Optional[int], optional): Maximum number of rows, the resolution
+            is chosen per stream (see select_resolution) and streams with the same
+            resolution share the queries. Defaults to None (use resolution).
+
+        Returns:
+            List[Optional[Union[np.ndarray, DataArrays]]]: One matrix per selection in the
+            same order (see get_data_np), None for selections whose query failed.
+        """
+        results, _, aggregations = self._fetch_streams_data(
+            selections,
+            tss,
+            tse,
+            resolution,
+            max_streams_per_query,
+            max_columns_per_query,
+            deadline,
+            nan_policy,
+            dtype,
+            None,
+            aggregations,
+            target_points,
+        )
+        if not aggregations:
+            return results
+        return [
+            None if data is None else split_aggregations(data, len(aggregations))
+            for data in results
+        ]
+
+    def _fetch_streams_data(
+        self,
+        selections: List[Tuple[str, List[str]]],
+        tss: Union[str, int, TimeRange],
+        tse: Union[None, str, int],
+        resolution: str,
+        max_streams_per_query: int,
+        max_columns_per_query: int,
+        deadline: Optional[float],
+        nan_policy: Union[str, NaNPolicy],
+        dtype: Optional[DTypeLike],
+        default_dtype: Optional[DTypeLike],
+        aggregations: Union[None, str, Sequence[str]],
+        target_points: Optional[int],
+    ) -> Tuple[
+        List[Optional[Union[np.ndarray, DataArrays]]], List[str], Optional[Tuple[str, ...]]
+    ]:
+        """
+        Fetches the data of several streams (see get_streams_data_np), the values of
+        several aggregations are the columns of one 2-D matrix.
+
+        Returns:
+            Tuple[List[Optional[Union[np.ndarray, DataArrays]]], List[str],
+            Optional[Tuple[str, ...]]]: The matrix and the resolution per selection,
+            and the aggregations.
+        """
+        results: List[Optional[Union[np.ndarray, DataArrays]]] = [None] * len(selections)
+        resolutions = [resolution] * len(selections)
+        try:
+            tss, tse = self._ms_bounds(tss, tse)
+            nan_policy = NaNPolicy(nan_policy)
+            if target_points is not None:
+                resolutions = [
+                    self.select_resolution(
+                        sid, tss, tse, target_points, resolution, aggregations is None
+                    )
+                    for sid, _ in selections
+                ]
+            # With aggregations, target_points only selects aggregated resolutions
+            resolved = resolve_aggregations(
+                aggregations, resolutions[0] if resolutions else resolution
+            )
+            if resolved:
+                default_dtype = np.float64
+            value_dtypes = [
+                self._resolve_value_dtype(sid, index_list, dtype, default_dtype)
+                for sid, index_list in selections
+            ]
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
+            return results, resolutions, None
+        call_deadline = Deadline.resolve(deadline, self.retry_policy.deadline)
+
+        # Streams with the same resolution share the queries
+        groups: Dict[str, List[int]] = {}
+        for position, selected in enumerate(resolutions):
+            groups.setdefault(selected, []).append(position)
+        for selected, group in groups.items():
+            batches = self._pack_selections(
+                [selections[position] for position in group],
+                max_streams_per_query,
+                max_columns_per_query,
+            )
+            for batch_positions in batches:
+                positions = [group[i] for i in batch_positions]
+                batch = [selections[position] for position in positions]
+                try:
+                    if selected == "nanos":
+                        query = query_builder.raw_batch_query(
+                            [(sid, ["ts", "nanos", *index_list]) for sid, index_list in batch],
+                            tss,
+                            tse,
+                        )
+                    else:
+                        query = query_builder.analytics_batch_query(
+                            batch, tss, tse, selected, resolved or ("avg",)
+                        )
+                    aliases = {
+                        query_builder.batch_alias(i): index_list
+                        for i, (_, index_list) in enumerate(batch)
+                    }
+                    dtypes = {
+                        query_builder.batch_alias(i): value_dtypes[position]
+                        for i, position in enumerate(positions)
+                    }
+                    matrices = self._fetch_data_matrices(
+                        query, aliases, selected, call_deadline, nan_policy, dtypes, resolved
+                    )
+                except ValueError as e:
+                    logging.error(f"Invalid query parameters: {e}")
+                    continue
+                except requests.RequestException as e:
+                    logging.warning(f"Request error while fetching data: {e}")
+                    continue
+                if matrices is None:
+                    continue
+                for i, position in enumerate(positions):
+                    results[position] = matrices[query_builder.batch_alias(i)]
+
+        return results, resolutions, resolved
+
+    def get_streams_var_data(
+        self,
+        selections: List[Tuple[str, List[str]]],
+        start_date: Union[TimeLike, TimeRange],
+        end_date: Optional[TimeLike] = None,
+        resolution: str = "nanos",
+        timezone: str = "UTC",
+        max_streams_per_query: int = 20,
+        max_columns_per_query: int = 500,
+        deadline: Optional[float] = None,
+        nan_policy: Union[str, NaNPolicy] = NaNPolicy.TRIM_EDGES,
+        dtype: Optional[DTypeLike] = None,
+        output: Union[str, OutputFormat] = OutputFormat.PANDAS,
+        aggregations: Union[None, str, Sequence[str]] = None,
+        target_points: Optional[int] = None,
+    ) -> List[Optional[DataOutput]]:
+        """
+        Returns pandas DataFrames for several streams in the same time range,
+        fetched with as few round trips as possible (see get_streams_data_np).
+
+        Args:
+            selections (List[Tuple[str, List[str]]]): (stream ID, channel indices) pairs.
+            start_date (Union[TimeLike, TimeRange]): Start date, e.g. "YYYY-MM-DD HH:MM:SS[.fff]"
+            (UTC), datetime, np.datetime64 or epoch ms, or the TimeRange to fetch.
+            end_date (Optional[TimeLike]): End date (inclusive), None if start_date is a
+            TimeRange. Defaults to None.
+            resolution (str, optional): Data resolution. Defaults to "nanos".
+            timezone (str, optional): Timezone for the data. Defaults to "UTC".
+            max_streams_per_query (int, optional): Maximum number of selections per query.
+            max_columns_per_query (int, optional): Maximum number of channels per query.
+            deadline (Optional[float], optional): Time budget in seconds for all queries
+            including retries. Defaults to retry_policy.deadline.
+            nan_policy (Union[str, NaNPolicy], optional): Handling of rows with NaNs
+            (see apply_nan_policy). Defaults to "trim_edges".
+            dtype (Optional[DTypeLike], optional): dtype of the values, resolved per stream
+            for "native" (see get_data_np). Defaults to None (float64).
+            output (Union[str, OutputFormat], optional): Output format (see get_var_data).
+            Defaults to "pandas".
+            aggregations (Union[None, str, Sequence[str]], optional): Aggregations per
+            variable (see get_var_data). Defaults to None ("avg").
+            target_points (Optional[int], optional): Maximum number of rows, the resolution
+            is chosen per stream (see get_streams_data_np). Defaults to None.
+
+        Returns:
+            List[Optional[DataOutput]]: One DataFrame (or the output format) per selection
+            in the same order (see get_var_data), None for selections whose query failed.
+        """
+        output = get_output_format(output)
+        time_range = self._get_time_range(start_date, end_date)
+        if time_range is None:
+            return [None] * len(selections)
+        matrices, resolutions, aggregations = self._fetch_streams_data(
+            selections,
+            time_range.start_ms,
+            time_range.end_ms,
+            resolution,
+            max_streams_per_query,
+            max_columns_per_query,
+            deadline,
+            nan_policy,
+            dtype,
+            np.float64,
+            aggregations,
+            target_points,
+        )
+        return [
+            None
+            if data is None
+            else self._build_output(
+                data,
+                sid,
+                index_list,
+                selected,
+                output,
+                None,
+                timezone,
+                aggregations=aggregations,
+            )
+            for data, (sid, index_list), selected in zip(matrices, selections, resolutions)
+        ]
+
     def _get_stream_name_for_sid_vid(self, sid: str, vid: str) -> Optional[str]:
         """
         Retrieves the stream name for a given stream ID (sid) and variable ID (vid).
@@ -937,8 +2796,9 @@ class CloudRequest:
         Returns:
             Optional[str]: The stream name if found, otherwise None.
         """
-        if self.stream_variables is not None:
-            stream = [k for k, v in self.stream_variables.items() if v.sid == sid and v.id == vid]
+        catalog = self._get_variable_catalog(sid)
+        if catalog is not None:
+            stream = catalog.find_names(sid=sid, id=vid)
             if len(stream) == 1:
                 return stream[0].split("__")[0]
 
@@ -955,7 +2815,7 @@ class CloudRequest:
         Returns:
             Optional[str]: The stream name if found, otherwise None.
         """
-        if self.stream_variables is not None and self.streams is not None:
+        if self.streams is not None:
             stream = [
                 gi_stream.name
                 for gi_stream in self.streams.values()
@@ -964,7 +2824,7 @@ class CloudRequest:
             if len(stream) == 1:
                 return stream[0]
 
-        logging.info("No stream variables available or matching stream not found.")
+        logging.info("No streams available or matching stream not found.")
         return None
 
     def get_all_vars_of_stream(self, sid: str) -> List[GIStreamVariable]:
@@ -977,8 +2837,9 @@ class CloudRequest:
         Returns:
             List[GIStreamVariable]: A list of variables for the given stream ID.
         """
-        if self.stream_variables is not None:
-            return [v for v in self.stream_variables.values() if v.sid == sid]
+        variables = self._get_stream_variables(sid)
+        if variables is not None:
+            return variables
 
         logging.info("No stream variables available.")
         return []
@@ -987,8 +2848,8 @@ class CloudRequest:
         self,
         variables: List[GIStreamVariable],
         resolution: str,
-        start: str,
-        end: str,
+        start: Union[TimeLike, TimeRange],
+        end: Optional[TimeLike] = None,
         filepath: str = "",
         streaming: bool = True,
         return_df: bool = True,
@@ -998,15 +2859,19 @@ class CloudRequest:
         timezone: str = "UTC",
         aggregation: str = "avg",
         batch: Optional[str] = None,
-    ) -> Optional[pd.DataFrame]:
+        deadline: Union[None, float, Deadline] = None,
+        output: Union[str, OutputFormat] = OutputFormat.PANDAS,
+    ) -> Optional[DataOutput]:
         """
         Returns a CSV file with the data of a given list of variables.
 
         Args:
             variables (List[GIStreamVariable]): List of variables to include in the export.
             resolution (str): Data resolution.
-            start (str): Start date in "YYYY-MM-DD HH:MM:SS" format.
-            end (str): End date in "YYYY-MM-DD HH:MM:SS" format.
+            start (Union[TimeLike, TimeRange]): Start date, e.g. "YYYY-MM-DD HH:MM:SS[.fff]"
+            (UTC), or the TimeRange to export.
+            end (Optional[TimeLike]): End date, None if start is a TimeRange.
+            Defaults to None.
             filepath (str, optional): Path to save the file. Defaults to "".
             streaming (bool, optional): Whether to stream the response. Defaults to True.
             return_df (bool, optional): Whether to return a DataFrame. Defaults to True.
@@ -1015,22 +2880,30 @@ class CloudRequest:
             delimiter (str, optional): Field delimiter for the CSV. Defaults to ";".
             timezone (str, optional): Timezone for the export. Defaults to "UTC".
             aggregation (str, optional): Aggregation type. Defaults to "avg".
-            batch (str, optional): Batch size for the export e.g "monthly", "yearly".
-             Defaults to None.
+            batch (str, optional): Batch size for the export, "daily", "weekly", "monthly"
+             or "yearly" (UTC calendar), or "auto" for the fewest batches within the default
+             QueryLimits (see plan_export). Defaults to None.
+            deadline (Union[None, float, Deadline], optional): Time budget in seconds for the
+            whole export including all batches and retries. Defaults to retry_policy.deadline.
+            If a batch fails or the deadline runs out, the whole export fails.
+            output (Union[str, OutputFormat], optional): "pandas" (the file as is, metadata
+            rows included), "numpy" (DataArrays of the "time" column in ms and the values),
+            "arrow" (pyarrow.Table parsed by Arrow, the header rows as field metadata) or
+            "polars". With batch, only "pandas" writes one combined file, the other outputs
+            write the file of every batch. Defaults to "pandas".
 
         Returns:
-            Optional[pd.DataFrame]: The data as a pandas DataFrame if return_df is True,
-            otherwise None.
+            Optional[DataOutput]: The data as a pandas DataFrame (or the output format)
+            if return_df is True, otherwise None.
         """
+        deadline = Deadline.resolve(deadline, self.retry_policy.deadline)
+        output = get_output_format(output)
         # Handle batch processing
         if batch is not None:
-            if batch not in ['monthly', 'yearly']:
-                raise ValueError("batch must be 'monthly', 'yearly', or None")
-
-            intervals = self._generate_date_intervals(start, end, batch)
+            intervals = self._export_intervals(variables, resolution, start, end, batch)
             all_dfs = []
 
-            for i, (batch_start, batch_end) in enumerate(intervals):
+            for batch_start, batch_end in intervals:
                 logging.info(f"Fetching batch: {batch_start}-{batch_end}")
                 batch_df = self.get_data_as_csv(
                     variables=variables,
@@ -1040,32 +2913,39 @@ class CloudRequest:
                     filepath=filepath,
                     streaming=streaming,
                     return_df=True,
-                    write_file=False,  # Prevent writing individual batch files
+                    # Only pandas writes one combined file, others keep the batch files
+                    write_file=write_file and output is not OutputFormat.PANDAS,
                     decimal_sep=decimal_sep,
                     delimiter=delimiter,
                     timezone=timezone,
                     aggregation=aggregation,
                     batch=None,  # Prevent recursion
+                    deadline=deadline,
+                    output=output,
                 )
-                if batch_df is not None:
-                    if i == 0:
-                        all_dfs.append(batch_df)
-                    else:
-                        # Remove first four metadata rows from subsequent batches
-                        all_dfs.append(batch_df.iloc[3:])
+                if batch_df is None:
+                    # A partial export would pass for the complete one
+                    logging.error(
+                        f"Fetching batch {batch_start}-{batch_end} failed, export aborted"
+                    )
+                    return None
+                if not all_dfs or output is not OutputFormat.PANDAS:
+                    all_dfs.append(batch_df)
+                else:
+                    # Remove first four metadata rows from subsequent batches
+                    all_dfs.append(batch_df.iloc[3:])
 
             if not all_dfs:
                 return None
+            if output is not OutputFormat.PANDAS:
+                return self._concat_outputs(all_dfs, output) if return_df else None
 
             combined_df = pd.concat(all_dfs, ignore_index=True)
 
             if write_file:
-                streams = set()
-                for var in variables:
-                    stream = self._get_stream_name_for_sid_vid(var.sid, var.id)
-                    streams.add(stream)
-                filename = (f"{'_'.join(filter(None, streams))}_"
-                            f"{start}_{end}_{resolution}_{aggregation}.csv")
+                _, filename = self._build_export_csv_query(
+                    variables, resolution, start, end, timezone, aggregation
+                )
                 full_path = f"{filepath}{filename}"
                 combined_df.to_csv(
                     full_path,
@@ -1076,116 +2956,312 @@ class CloudRequest:
 
             return combined_df if return_df else None
         # Build query and filename
-        substring = ""
-        streams = set()
-        for var in variables:
-            stream = self._get_stream_name_for_sid_vid(var.sid, var.id)
-            streams.add(stream)
-            substring += f"""{{
-                field: "{var.sid}:{var.index}.{aggregation}",
-                headers: ["{var.name}", "{stream}", "{aggregation}", "{var.unit or ''}"]
-            }},"""
-
-        filename = f"{'_'.join(filter(None, streams))}_{start}_{end}_{resolution}_{aggregation}.csv"
-        start_unix = str(self.convert_datetime_to_unix(start))
-        end_unix = str(self.convert_datetime_to_unix(end))
-        self.query = f"""
-        {{
-            exportCSV(
-                resolution: {resolution}
-                from: {start_unix},
-                to: {end_unix},
-                timezone: "{timezone}",
-                filename: "{filename}"
-                columns: [
-                    {{
-                        field: "ts",
-                        headers: ["datetime"],
-                        dateFormat: "%Y-%m-%dT%H:%M:%S"
-                    }},
-                    {{
-                        field: "ts",
-                        headers: ["time", "", "", "[s since 01.01.1970]"]
-                    }},
-                    {substring}
-                ]
-            ) {{
-                file
-            }}
-        }}
-        """
+        try:
+            self.query, filename = self._build_export_csv_query(
+                variables, resolution, start, end, timezone, aggregation
+            )
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
+            return None
         # Send request
         url_list = f"{self.url}/__api__/gql"
         try:
-            res = requests.post(
+            res = self._request(
+                "POST",
                 url_list,
-                json={"query": self.query},
-                headers=self.headers,
-                stream=streaming,
+                retry=True,
+                deadline=deadline,
+                json=self.query.payload,
+                stream=True,
             )
-            if res.status_code == 200 and "errors" not in res.text:
-                if write_file:
-                    with open(f"{filepath}{filename}", "wb") as csv_file:
-                        if not streaming:
-                            csv_file.write(res.content)
-                        else:
-                            for chunk in res.iter_content(chunk_size=1024):
-                                csv_file.write(chunk)
-                                csv_file.flush()
-                        if not return_df:
-                            return None
-
-                # Return as DataFrame
-                if return_df:
-                    if not streaming or not write_file:
-                        return pd.read_csv(
-                            BytesIO(res.content),
-                            delimiter=delimiter,
-                            decimal=decimal_sep,
-                        )
-                    else:
-                        return pd.read_csv(
-                            f"{filepath}{filename}",
-                            delimiter=delimiter,
-                            decimal=decimal_sep,
-                        )
+            stats = TransferStats()
+            chunks = iter_decoded_content(res, stats)
+            if not streaming:
+                chunks = iter([b"".join(chunks)])
+            first_chunk = next(chunks, b"")
+
+            # Errors are sent as JSON document instead of the CSV file
+            if res.status_code != 200 or first_chunk.lstrip(b"\xef\xbb\xbf \t\r\n")[:1] == b"{":
+                body = first_chunk + b"".join(chunks)
+                if res.status_code != 200 or self._has_gql_errors(body):
+                    self._record_transfer(stats)
+                    error_message = self._get_gql_error_message(body)
+                    logging.error(
+                        f"Fetching CSV data failed!"
+                        f" Response Code: {res.status_code}, Reason: {res.reason},"
+                        f" Msg: {error_message}"
+                    )
+                    return None
+                chunks = iter([body])
             else:
-                error_message = res.json().get("errors", [{}])[0].get("message", "Unknown error")
-                logging.error(
-                    f"Fetching CSV data failed!"
-                    f" Response Code: {res.status_code}, Reason: {res.reason}, Msg: {error_message}"
+                chunks = itertools.chain([first_chunk], chunks)
+
+            if write_file:
+                with open(f"{filepath}{filename}", "wb") as csv_file:
+                    for chunk in chunks:
+                        csv_file.write(chunk)
+                self._record_transfer(stats)
+                if not return_df:
+                    return None
+                return self._read_export_csv(
+                    f"{filepath}{filename}", variables, aggregation, delimiter, decimal_sep, output
                 )
+
+            # Return as DataFrame, parsed while the body is still being received
+            if return_df:
+                df = self._read_export_csv(
+                    io.BufferedReader(IteratorReader(chunks), buffer_size=CHUNK_SIZE),
+                    variables,
+                    aggregation,
+                    delimiter,
+                    decimal_sep,
+                    output,
+                )
+                self._record_transfer(stats)
+                return df
+            res.close()
         except requests.RequestException as e:
             logging.warning(f"Request error while fetching CSV data: {e}")
 
         return None
 
-    def _generate_date_intervals(self, start_str: str, end_str: str, batch: str) -> \
-            List[Tuple[str, str]]:
-        """Generates monthly or yearly intervals between start and end dates."""
-        start_dt = datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S")
-        end_dt = datetime.strptime(end_str, "%Y-%m-%d %H:%M:%S")
-        intervals = []
-        current_start = start_dt
-
-        while current_start < end_dt:
-            if batch == 'monthly':
-                next_start = (current_start.replace(day=1) + relativedelta.relativedelta(months=1))
-            elif batch == 'yearly':
-                next_start = (current_start.replace(month=1, day=1) + relativedelta.relativedelta(
-                    years=1))
-            else:
-                raise ValueError("Invalid batch parameter")
+    def _read_export_csv(
+        self,
+        source: Union[str, io.BufferedIOBase],
+        variables: List[GIStreamVariable],
+        aggregation: str,
+        delimiter: str,
+        decimal_sep: str,
+        output: OutputFormat = OutputFormat.PANDAS,
+    ) -> DataOutput:
+        """
+        Parses an exportCSV file (see _build_export_csv_query) into the output format.
+
+        Args:
+            source (Union[str, io.BufferedIOBase]): Path or stream of the file.
+            variables (List[GIStreamVariable]): The exported variables.
+            aggregation (str): Aggregation of the export.
+            delimiter (str): Field delimiter of the file.
+            decimal_sep (str): Decimal separator of the file.
+            output (OutputFormat): The output format.
+
+        Returns:
+            DataOutput: The parsed file.
+        """
+        if output is OutputFormat.PANDAS:
+            return pd.read_csv(source, delimiter=delimiter, decimal=decimal_sep)
+        if output is OutputFormat.NUMPY:
+            # Skip the stream, aggregation and unit rows below the names
+            df = pd.read_csv(
+                source, delimiter=delimiter, decimal=decimal_sep, skiprows=[1, 2, 3]
+            )
+            seconds = df.iloc[:, 1].to_numpy(dtype=float)
+            return DataArrays(
+                np.round(seconds * 1000).astype(np.int64).reshape(-1, 1),
+                np.asfortranarray(df.iloc[:, 2:].to_numpy(dtype=float)),
+            )
+
+        fields = [
+            FieldInfo(
+                var.name,
+                var.index,
+                self._get_stream_name_for_sid_vid(var.sid, var.id) or "",
+                var.unit or "",
+                aggregation,
+            )
+            for var in variables
+        ]
+        table = read_csv_table(source, fields, delimiter, decimal_sep, float_columns=["time"])
+        return table if output is OutputFormat.ARROW else polars_frame(table)
+
+    @staticmethod
+    def _concat_outputs(parts: List[DataOutput], output: OutputFormat) -> DataOutput:
+        """Concatenates the numpy, arrow or polars results of consecutive time ranges."""
+        if output is OutputFormat.NUMPY:
+            skips = [0] * len(parts)
+            return DataArrays(
+                CloudRequest._concat_rows([part.timestamps for part in parts], skips),
+                CloudRequest._concat_rows([part.values for part in parts], skips),
+            )
+        return concat_tables(parts, output)
+
+    def _build_export_csv_query(
+        self,
+        variables: List[GIStreamVariable],
+        resolution: str,
+        start: Union[TimeLike, TimeRange],
+        end: Optional[TimeLike] = None,
+        timezone: str = "UTC",
+        aggregation: str = "avg",
+    ) -> Tuple[GQLQuery, str]:
+        """
+        Builds the exportCSV GraphQL query and the matching file name.
+
+        Args:
+            variables (List[GIStreamVariable]): List of variables to include in the export.
+            resolution (str): Data resolution.
+            start (Union[TimeLike, TimeRange]): Start date or the TimeRange to export.
+            end (Optional[TimeLike]): End date, None if start is a TimeRange.
+            Defaults to None.
+            timezone (str, optional): Timezone for the export. Defaults to "UTC".
+            aggregation (str, optional): Aggregation type. Defaults to "avg".
+
+        Returns:
+            Tuple[GQLQuery, str]: The query and the file name.
+
+        Raises:
+            ValueError: If the time range is invalid.
+        """
+        time_range = to_time_range(start, end)
+        start, end = format_timestamps([time_range.start_ns, time_range.end_ns])
+        columns: List[Dict[str, Any]] = [
+            {"field": "ts", "headers": ["datetime"], "dateFormat": "%Y-%m-%dT%H:%M:%S"},
+            {"field": "ts", "headers": ["time", "", "", "[s since 01.01.1970]"]},
+        ]
+        streams = set()
+        for var in variables:
+            stream = self._get_stream_name_for_sid_vid(var.sid, var.id)
+            streams.add(stream)
+            columns.append(
+                {
+                    "field": f"{var.sid}:{var.index}.{aggregation}",
+                    "headers": [var.name, stream or "", aggregation, var.unit or ""],
+                }
+            )
+
+        filename = f"{'_'.join(filter(None, streams))}_{start}_{end}_{resolution}_{aggregation}.csv"
+        query = query_builder.export_csv_query(
+            columns,
+            resolution,
+            time_range.start_ms,
+            time_range.end_ms,
+            timezone,
+            filename,
+        )
+        return query, filename
+
+    def plan_export(
+        self,
+        variables: List[GIStreamVariable],
+        resolution: str,
+        start: Union[TimeLike, TimeRange],
+        end: Optional[TimeLike] = None,
+        limits: Optional[QueryLimits] = None,
+    ) -> Optional[QueryPlan]:
+        """
+        Returns the plan of get_data_as_csv with batch="auto": the fewest time windows of
+        which every export stays under the limits. The rows are estimated from the fastest
+        stream of the variables (see plan_query), the columns are not split.
+
+        Args:
+            variables (List[GIStreamVariable]): List of variables to include in the export.
+            resolution (str): Data resolution.
+            start (Union[TimeLike, TimeRange]): Start date or the TimeRange to export.
+            end (Optional[TimeLike]): End date, None if start is a TimeRange.
+            Defaults to None.
+            limits (Optional[QueryLimits], optional): Limits per export.
+            Defaults to None (QueryLimits()).
+
+        Returns:
+            Optional[QueryPlan]: The plan, or None if the parameters are invalid.
+        """
+        try:
+            return self._plan_export(variables, resolution, to_time_range(start, end), limits)
+        except ValueError as e:
+            logging.error(f"Invalid query parameters: {e}")
+            return None
+
+    def _plan_export(
+        self,
+        variables: List[GIStreamVariable],
+        resolution: str,
+        time_range: TimeRange,
+        limits: Optional[QueryLimits] = None,
+    ) -> QueryPlan:
+        """
+        Plans an export of variables of one or more streams (see plan_export).
+
+        Raises:
+            ValueError: If the time range or the variables are empty.
+        """
+        tss, tse = time_range.start_ms, time_range.end_ms
+        sids = sorted({var.sid for var in variables})
+        streams = [self.streams[sid] for sid in sids if self.streams and sid in self.streams]
+        first = [ts for ts in (self._to_ms(s.first_ts) for s in streams) if ts]
+        last = [ts for ts in (self._to_ms(s.last_ts) for s in streams) if ts]
+        active = query_plan.active_periods(
+            tss,
+            tse,
+            min(first) if len(first) == len(sids) else None,
+            max(last) if len(last) == len(sids) else None,
+        )
+        rows_per_second = max(
+            [self._get_stream_rows_per_second(sid, resolution) for sid in sids], default=0.0
+        )
+        return query_plan.plan_query(
+            [f"{var.sid}:{var.index}" for var in variables],
+            tss,
+            tse,
+            rows_per_second,
+            resolution,
+            step=self._get_resolution_step(resolution),
+            # datetime and time columns
+            time_columns=2,
+            active=active,
+            limits=limits,
+            split_columns=False,
+        )
+
+    def _export_intervals(
+        self,
+        variables: List[GIStreamVariable],
+        resolution: str,
+        start: Union[TimeLike, TimeRange],
+        end: Optional[TimeLike],
+        batch: str,
+    ) -> List[Tuple[str, str]]:
+        """
+        Returns the (start, end) strings of the batches of an export, the end of a batch
+        is the start of the next one.
+
+        Raises:
+            ValueError: If the time range or batch is invalid.
+        """
+        if batch != "auto":
+            if batch not in CALENDAR_FREQS:
+                raise ValueError(f"batch must be one of {(*CALENDAR_FREQS, 'auto')}, or None")
+            return self._generate_date_intervals(start, end, batch)
+        time_range = to_time_range(start, end)
+        plan = self._plan_export(variables, resolution, time_range)
+        logging.info(str(plan))
+        inner = [window_start * UNIT_NS["ms"] for window_start, _ in plan.windows[1:]]
+        times = format_timestamps([time_range.start_ns, *inner, time_range.end_ns])
+        return list(zip(times[:-1], times[1:]))
 
-            current_end = min(next_start, end_dt)  # Do NOT subtract seconds here!
+    @staticmethod
+    def _generate_date_intervals(
+        start: Union[TimeLike, TimeRange], end: Optional[TimeLike], batch: str
+    ) -> List[Tuple[str, str]]:
+        """
+        Generates the calendar intervals (UTC) of a batched export between start and end,
+        the end of an interval is the start of the next one.
 
-            current_start_str = current_start.strftime("%Y-%m-%d %H:%M:%S")
-            current_end_str = current_end.strftime("%Y-%m-%d %H:%M:%S")
-            intervals.append((current_start_str, current_end_str))
+        Args:
+            start (Union[TimeLike, TimeRange]): Start date or the TimeRange to export.
+            end (Optional[TimeLike]): End date, None if start is a TimeRange.
+            batch (str): "daily", "weekly", "monthly" or "yearly".
 
-            current_start = next_start
+        Returns:
+            List[Tuple[str, str]]: The (start, end) strings of the intervals.
 
-        return intervals
+        Raises:
+            ValueError: If the time range or batch is invalid.
+        """
+        time_range = to_time_range(start, end)
+        windows = time_range.calendar_windows(batch)
+        edges = [w.start_ns for w in windows if w.start_ns < time_range.end_ns]
+        times = format_timestamps(edges + [time_range.end_ns])
+        return list(zip(times[:-1], times[1:]))
 
     def __get_column_names(self, sid: str, index_list: List[str]) -> List[str]:
         """
@@ -1199,34 +3275,68 @@ class CloudRequest:
             List[str]: List of column names for the DataFrame.
         """
         col_names = ["Time"]
-        res = self.filter_var_attr("sid", sid)
-        if res is not None:
+        catalog = self._get_variable_catalog(sid)
+        if catalog is not None:
             for i in index_list:
-                for x in res:
-                    if x.index == i:
-                        col_names.append(x.name)
+                col_names.extend(x.name for x in catalog.find(sid=sid, index=i))
         return col_names
 
     @staticmethod
-    def convert_datetime_to_unix(datetime_str: str) -> Optional[float]:
+    def convert_datetime_to_unix(datetime_str: TimeLike) -> Optional[int]:
         """
-        Converts a datetime string to a Unix timestamp in milliseconds.
+        Converts a datetime to a Unix timestamp in milliseconds.
 
         Args:
-            datetime_str (str): The datetime string in "YYYY-MM-DD HH:MM:SS" format.
+            datetime_str (TimeLike): The datetime, e.g. a "YYYY-MM-DD HH:MM:SS[.fff]" string
+            (UTC), datetime, np.datetime64 or epoch ms (see time_range.to_epoch_ns).
 
         Returns:
-            Optional[float]: The Unix timestamp in milliseconds, or None if conversion fails.
+            Optional[int]: The Unix timestamp in milliseconds (rounded down), or None if
+            conversion fails.
         """
         try:
-            date_time_obj = dt.datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S")
-            timestamp_utc = date_time_obj.replace(tzinfo=tz.gettz("UTC"))
-            timestamp = int(dt.datetime.timestamp(timestamp_utc)) * 1000
-            return timestamp
+            return to_epoch_ns(datetime_str) // UNIT_NS["ms"]
         except ValueError as err:
             logging.error(f"Error converting '{datetime_str}' to Unix timestamp: {err}")
             return None
 
+    @staticmethod
+    def _ms_bounds(
+        tss: Union[str, int, TimeRange], tse: Union[None, str, int]
+    ) -> Tuple[Union[str, int], Union[str, int]]:
+        """
+        Returns the start and end timestamp in ms of the tss and tse arguments of the
+        numpy fetches, tss may be a TimeRange (with tse None).
+
+        Raises:
+            ValueError: If tse is None and tss is not a TimeRange.
+        """
+        if isinstance(tss, TimeRange) or tse is None:
+            time_range = to_time_range(tss, tse)
+            return time_range.start_ms, time_range.end_ms
+        return tss, tse
+
+    @staticmethod
+    def _get_time_range(
+        start: Union[TimeLike, TimeRange], end: Optional[TimeLike] = None
+    ) -> Optional[TimeRange]:
+        """
+        Returns the time range of the start and end arguments of the fetch and export APIs.
+
+        Args:
+            start (Union[TimeLike, TimeRange]): Start of the range, or the range itself.
+            end (Optional[TimeLike]): End of the range (inclusive), None if start is a
+            TimeRange. Defaults to None.
+
+        Returns:
+            Optional[TimeRange]: The time range, or None if it is invalid.
+        """
+        try:
+            return to_time_range(start, end)
+        except ValueError as err:
+            logging.error(f"Invalid time range '{start}' - '{end}': {err}")
+            return None
+
     def set_timezone(self, timezone: str = "Europe/Vienna") -> None:
         """
         Sets the timezone if it is valid.
@@ -1257,20 +3367,27 @@ class CloudRequest:
         except pytz.UnknownTimeZoneError:
             return False
 
-    def __convert_df_time_from_utc_to_tz(self, df: pd.DataFrame, timezone: str = "UTC") -> None:
+    @staticmethod
+    def __convert_times_from_utc_to_tz(
+        times: pd.DatetimeIndex, timezone: str = "UTC"
+    ) -> pd.DatetimeIndex:
         """
-        Converts the timestamps of the DataFrame to the desired time zone.
+        Converts UTC timestamps to the desired time zone. Only the dtype changes,
+        the underlying UTC values are kept.
 
         Args:
+            times (pd.DatetimeIndex): Naive UTC timestamps.
             timezone (str): The target time zone. Defaults to "UTC".
 
-        The data is initially in UTC, and the default conversion is to 'UTC'.
+        Returns:
+            pd.DatetimeIndex: The timezone aware timestamps (UTC if the conversion failed).
         """
+        times = times.tz_localize("UTC")
         try:
-            df["Time"] = df["Time"].dt.tz_localize("UTC")
-            df["Time"] = df["Time"].dt.tz_convert(timezone)
-        except (AttributeError, TypeError) as err:
+            return times.tz_convert(timezone)
+        except (AttributeError, TypeError, ValueError, KeyError) as err:
             logging.error(f"Error converting DataFrame time to timezone '{timezone}': {err}")
+            return times
 
     def get_measurement_limit(
         self,
@@ -1279,6 +3396,7 @@ class CloudRequest:
         start_ts: int = 0,
         end_ts: int = 9999999999999,
         sort: str = "DESC",
+        deadline: Optional[float] = None,
     ) -> Optional[dict]:
         """
         Retrieves measurement periods for a given stream ID (sid) with a specified limit.
@@ -1290,30 +3408,21 @@ class CloudRequest:
             start_ts (int, optional): The start timestamp. Defaults to 0.
             end_ts (int, optional): The end timestamp. Defaults to 9999999999999.
             sort (str, optional): The sort order. Defaults to 'DESC'.
+            deadline (Optional[float], optional): Time budget in seconds including retries.
+            Defaults to retry_policy.deadline.
 
         Returns:
             Optional[dict]: The response JSON if the request is successful, otherwise None.
         """
-        query_measurement = f"""
-        {{
-            measurementPeriods(
-                sid: "{sid}",
-                from: {start_ts},
-                to: {end_ts},
-                limit: {limit},
-                sort: {sort}
-            ) {{
-                minTs
-                maxTs
-                mid
-                sampleRate
-            }}
-        }}
-        """
+        query_measurement = query_builder.measurement_periods_query(
+            sid, start_ts, end_ts, limit, sort
+        )
         url_list = f"{self.url}/__api__/gql"
 
         try:
-            res = requests.post(url_list, json={"query": query_measurement}, headers=self.headers)
+            res = self._request(
+                "POST", url_list, retry=True, deadline=deadline, json=query_measurement.payload
+            )
             if res.status_code == 200:
                 self.request_measurement_res = res.json()
                 return self.request_measurement_res
@@ -1374,7 +3483,7 @@ class CloudRequest:
             "AutoCreateMetaData": "true",
         }
         try:
-            res = requests.post(url_list, headers=self.headers, json=param)
+            res = self._request("POST", url_list, json=param)
             if res.status_code == 200:
                 self.import_session_res_udbf = res.json()
                 logging.info(
@@ -1410,12 +3519,9 @@ class CloudRequest:
 
         self.session_ID = str(self.import_session_res_udbf["Data"]["SessionID"])
         url_list = f"{self.url}/history/data/import/{self.session_ID}"
-        header_list = {
-            "Content-Type": "application/octet-stream",
-            "Authorization": f"Bearer {self.login_token['access_token']}",
-        }
+        header_list = {"Content-Type": "application/octet-stream"}
         try:
-            res = requests.post(url_list, headers=header_list, data=file)
+            res = self._request("POST", url_list, retry=False, headers=header_list, data=file)
             if res.status_code == 200:
                 logging.info("UDBF file successfully imported.")
                 return res
@@ -1467,7 +3573,7 @@ class CloudRequest:
 
         try:
             logging.debug(f"CSV import parameters: {param}")
-            res = requests.post(url_list, headers=self.headers, json=param)
+            res = self._request("POST", url_list, json=param)
             if res.status_code == 200:
                 self.import_session_res_csv = res.json()
                 self.import_session_csv_current = {
@@ -1503,13 +3609,10 @@ class CloudRequest:
 
         self.session_ID = str(self.import_session_res_csv["Data"]["SessionID"])
         url_list = f"{self.url}/history/data/import/{self.session_ID}"
-        headers = {
-            "Content-Type": "text/csv",
-            "Authorization": f"Bearer {self.login_token['access_token']}",
-        }
+        headers = {"Content-Type": "text/csv"}
 
         try:
-            res = requests.post(url_list, headers=headers, data=file)
+            res = self._request("POST", url_list, retry=False, headers=headers, data=file)
             if res.status_code == 200:
                 logging.info("CSV file successfully imported.")
                 return res
@@ -1701,10 +3804,9 @@ class CloudRequest:
             return None
 
         url_list = f"{self.url}/history/data/import/{self.session_ID}"
-        headers = {"Authorization": f"Bearer {self.login_token['access_token']}"}
 
         try:
-            res = requests.delete(url_list, headers=headers)
+            res = self._request("DELETE", url_list)
             if res.status_code == 200:
                 logging.info("Import session closed successfully.")
                 return res
@@ -1737,7 +3839,7 @@ class CloudRequest:
         param = {"Variables": var_ids, "Function": "read"}
 
         try:
-            res = requests.post(url_list, headers=self.headers, json=param)
+            res = self._request("POST", url_list, retry=True, json=param)
             if res.status_code == 200:
                 current_live_value = res.json()
                 logging.info(f"Current live value: {current_live_value}")
@@ -1772,7 +3874,7 @@ class CloudRequest:
         }
 
         try:
-            res = requests.post(url_list, headers=self.headers, json=param)
+            res = self._request("POST", url_list, json=param)
             if res.status_code == 200:
                 write_value_res = res.json()
                 logging.info("Data successfully written.")
@@ -1799,8 +3901,13 @@ class CloudRequest:
             otherwise None for each not found.
         """
         gi_vars = []
+        catalog = self.stream_variables
         for var in variables:
-            result = self.find_var(f"{stream}__{var}")
+            name = f"{stream}__{var}"
+            if catalog is not None and name in catalog:
+                gi_vars.append(catalog[name])
+                continue
+            result = self.find_var(name)
             if result:
                 gi_vars.append(list(result.values())[0])
         return gi_vars
@@ -1819,6 +3926,7 @@ class CloudRequest:
         csv_settings: Optional[CSVSettings] = None,
         log_settings: Optional[LogSettings] = None,
         target: Optional[str] = None,
+        deadline: Optional[float] = None,
     ) -> Union[Dict, bytes]:
         """
         Fetch data from a buffer data source via API.
@@ -1838,6 +3946,8 @@ class CloudRequest:
         - log_settings (Optional[LogSettings]): Configuration for UDBF format.
         Required if data_format is DataFormat.UDBF.
         - target (Optional[str]): For DataFormat.UDBF format. Options: 'file', 'record'.
+        - deadline (Optional[float]): Time budget in seconds including retries.
+        Defaults to retry_policy.deadline.
 
         Returns:
         - Union[Dict, bytes]: The response data from the API.
@@ -1880,11 +3990,14 @@ class CloudRequest:
         if data_format == DataFormat.UDBF and target:
             payload["Target"] = target
 
-        response = requests.post(url, json=payload, headers=self.headers)
+        response = self._request(
+            "POST", url, retry=True, deadline=deadline, json=payload, stream=True
+        )
         response.raise_for_status()
+        body = self._read_body(response)
 
         if data_format in {DataFormat.COL, DataFormat.ROW, DataFormat.JSON}:
-            return response.json()
+            return self.json_backend.loads(body)
         else:
             # Results given in bytes
-            return response.content
+            return body
@@ -0,0 +1,422 @@
+"""
+Module to decode the data matrix of Raw GraphQL responses incrementally from a response stream.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+# Closing bracket of the last row directly followed by the closing bracket of the matrix,
+# rows only contain numbers and nulls so this cannot match earlier
+_MATRIX_END = re.compile(rb"\]\s*\]")
+_ROW_SEPARATOR = b"],"
+_STRIP = b"[] \t\r\n"
+# Bytes re-searched for the start of a matrix when a new chunk arrives
+_START_OVERLAP = 256
+NANOS_PER_MS = 1_000_000
+
+
+class GraphQLError(ValueError):
+    """Raised if a GraphQL response contains errors instead of data."""
+
+
+def get_graphql_error(document: Any) -> Optional[str]:
+    """
+    Returns the first error message of a decoded GraphQL response.
+
+    Args:
+        document (Any): The decoded JSON response.
+
+    Returns:
+        Optional[str]: The message, or None if the response has no errors.
+    """
+    if not isinstance(document, dict) or not document.get("errors"):
+        return None
+    errors = document["errors"]
+    first = errors[0] if isinstance(errors, list) else errors
+    if isinstance(first, dict):
+        return str(first.get("message", "Unknown error"))
+    return str(first)
+
+
+@dataclass(frozen=True)
+class DataArrays:
+    """Object for tracking the timestamps and values of a data matrix in their own dtypes"""
+
+    # int64 with shape (rows, time columns), e.g. ts in ms or ts and nanos fused to ns
+    timestamps: np.ndarray
+    # Shape (rows, channels), column-major so every channel is contiguous
+    values: np.ndarray
+    # Unit of the first timestamp column, "ms" or "ns"
+    time_unit: str = "ms"
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def times(self) -> np.ndarray:
+        """the first timestamp column as datetime64 (a view, not a copy)"""
+        return self.timestamps[:, 0].view(f"datetime64[{self.time_unit}]")
+
+
+class _MatrixBuilder:
+    """
+    Growing array the rows of one matrix are appended to. With a value_dtype the leading
+    time columns are stored as int64 and the other columns in value_dtype (DataArrays),
+    otherwise all columns as float64. fuse_nanos combines ts (ms) and nanos (ns within the
+    ms) into one exact int64 ns column. The arrays of DataArrays are column-major.
+    """
+
+    # Growth factor of the arrays once expected_rows is exceeded
+    GROWTH = 1.5
+
+    def __init__(
+        self,
+        n_columns: Optional[int],
+        expected_rows: int,
+        loads: Optional[Callable[[bytes], Any]],
+        value_dtype: Optional[DTypeLike] = None,
+        time_columns: int = 1,
+        fuse_nanos: bool = False,
+    ) -> None:
+        self.n_columns = n_columns
+        self.expected_rows = expected_rows
+        self.loads = loads
+        self.value_dtype = None if value_dtype is None else np.dtype(value_dtype)
+        self.time_columns = time_columns
+        self.fuse_nanos = fuse_nanos and value_dtype is not None and time_columns == 2
+        self.rows = 0
+        self.done = False
+        self._arrays: Optional[List[np.ndarray]] = None
+
+    def consume(self, buffer: bytearray) -> None:
+        """Decodes the complete rows at the start of buffer and removes them from it."""
+        if buffer.lstrip().startswith(b"]"):
+            # Empty matrix (rows are only cut off in front of another row)
+            del buffer[: buffer.index(b"]") + 1]
+            self.done = True
+            return
+        match = _MATRIX_END.search(buffer)
+        if match is not None:
+            self._append_rows(buffer[: match.start() + 1])
+            del buffer[: match.end()]
+            self.done = True
+            return
+        cut = buffer.rfind(_ROW_SEPARATOR)
+        if cut != -1:
+            self._append_rows(buffer[: cut + 1])
+            del buffer[: cut + len(_ROW_SEPARATOR)]
+
+    def result(self) -> Union[np.ndarray, DataArrays]:
+        """Returns the matrix with shape (rows, n_columns), or its DataArrays."""
+        if self._arrays is None:
+            self._arrays = [
+                np.empty((0, width), dtype=dtype, order=self._order)
+                for _, width, dtype in self._layout()
+            ]
+        for array in self._arrays:
+            if len(array) > self.rows:
+                if not array.flags.c_contiguous:
+                    _compact_columns(array, self.rows)
+                # Shrinks in place, no view of the array has been handed out yet
+                array.resize((self.rows, array.shape[1]), refcheck=False)
+        if self.value_dtype is None:
+            return self._arrays[0]
+        return DataArrays(*self._arrays, time_unit="ns" if self.fuse_nanos else "ms")
+
+    @property
+    def _order(self) -> str:
+        return "C" if self.value_dtype is None else "F"
+
+    def _layout(self) -> List[Tuple[slice, int, np.dtype]]:
+        """Returns the columns, width and dtype of every array."""
+        n_columns = self.n_columns or 0
+        if self.value_dtype is None:
+            return [(slice(None), n_columns, np.dtype(float))]
+        time_columns = min(self.time_columns, n_columns)
+        return [
+            (slice(None, time_columns), 1 if self.fuse_nanos else time_columns, np.dtype(np.int64)),
+            (slice(time_columns, None), n_columns - time_columns, self.value_dtype),
+        ]
+
+    def _append_rows(self, segment: bytearray) -> None:
+        """Converts a segment of complete rows, e.g. b"[1,2],[3,null]", and appends it."""
+        n_rows = segment.count(b"[")
+        if self.n_columns is None:
+            first_row = segment[: segment.index(b"]")]
+            self.n_columns = first_row.count(b",") + 1
+        if self.loads is not None:
+            values = np.array(self.loads(b"[" + bytes(segment) + b"]"), dtype=float)
+        else:
+            text = bytes(segment).translate(None, _STRIP).replace(b"null", b"nan")
+            values = np.fromstring(text.decode("ascii"), dtype=float, sep=",")
+        if values.size != n_rows * self.n_columns:
+            raise ValueError(
+                f"Malformed Raw data matrix: expected {n_rows} rows of {self.n_columns} values"
+            )
+
+        self._reserve(n_rows)
+        values = values.reshape(n_rows, self.n_columns)
+        for (columns, _, _), array in zip(self._layout(), self._arrays):
+            target = array[self.rows: self.rows + n_rows]
+            if self.fuse_nanos and array is self._arrays[0]:
+                # ts and nanos are exact in float64, their fused ns epoch is not
+                np.multiply(values[:, 0].astype(np.int64), NANOS_PER_MS, out=target[:, 0])
+                target[:, 0] += values[:, 1].astype(np.int64)
+            else:
+                target[:] = values[:, columns]
+        self.rows += n_rows
+
+    def _reserve(self, n_rows: int) -> None:
+        """Makes sure the arrays have room for n_rows more rows."""
+        needed = self.rows + n_rows
+        if self._arrays is None:
+            self._arrays = [
+                np.empty((max(needed, self.expected_rows), width), dtype=dtype, order=self._order)
+                for _, width, dtype in self._layout()
+            ]
+        elif needed > len(self._arrays[0]):
+            size = max(needed, int(len(self._arrays[0]) * self.GROWTH))
+            for k, array in enumerate(self._arrays):
+                grown = np.empty((size, array.shape[1]), dtype=array.dtype, order=self._order)
+                grown[: self.rows] = array[: self.rows]
+                self._arrays[k] = grown
+
+
+def _compact_columns(array: np.ndarray, rows: int) -> None:
+    """
+    Moves the first rows of every column of a column-major array to the front of its
+    buffer, so resizing it to rows keeps the data.
+    """
+    capacity = len(array)
+    flat = array.reshape(-1, order="F")
+    for k in range(1, array.shape[1]):
+        flat[k * rows: (k + 1) * rows] = flat[k * capacity: k * capacity + rows]
+
+
+class RawMatrixDecoder:
+    """
+    Incremental decoder of the data matrices of a GraphQL response, e.g. data.Raw.data or
+    the data of aliased Raw fields (data.s0.data, data.s1.data, ...).
+
+    Complete rows are converted to float64 in bulk and copied into a preallocated array
+    which grows geometrically, so the response is never materialised as Python objects.
+    JSON nulls become NaN. If a (fast) loads function is given, rows are parsed with it
+    one received chunk at a time instead of with np.fromstring. Everything around the
+    matrices is kept and validated on close, so GraphQL errors are still detected.
+
+    With a value_dtype, each matrix is returned as DataArrays instead: the leading
+    time_columns as exact int64 and the other columns in value_dtype (e.g. float32).
+    With fuse_nanos, the ts (ms) and nanos columns become one int64 ns column.
+    """
+
+    def __init__(
+        self,
+        n_columns: Union[None, int, Dict[str, int]] = None,
+        expected_rows: int = 0,
+        loads: Optional[Callable[[bytes], Any]] = None,
+        keys: Sequence[str] = ("Raw",),
+        value_dtype: Union[None, DTypeLike, Dict[str, DTypeLike]] = None,
+        time_columns: int = 1,
+        fuse_nanos: bool = False,
+    ) -> None:
+        """
+        Args:
+            n_columns (Union[None, int, Dict[str, int]]): Number of columns of the matrices,
+            or per key. Inferred from the first row if None.
+            expected_rows (int): Number of rows to preallocate per matrix.
+            loads (Optional[Callable[[bytes], Any]]): JSON decode function used for the rows,
+            e.g. orjson.loads. Defaults to np.fromstring.
+            keys (Sequence[str]): Names of the fields holding a {"data": [[...]]} matrix.
+            value_dtype (Union[None, DTypeLike, Dict[str, DTypeLike]]): dtype of the value
+            columns, or per key. None returns float64 matrices.
+            time_columns (int): Number of leading timestamp columns, e.g. 2 for ts, nanos.
+            fuse_nanos (bool): Fuse the ts and nanos columns of DataArrays to ns.
+        """
+        self.n_columns = n_columns
+        self.expected_rows = expected_rows
+        self.loads = loads
+        self.keys = list(keys)
+        self.value_dtype = value_dtype
+        self.time_columns = time_columns
+        self.fuse_nanos = fuse_nanos
+        self._start = re.compile(
+            rb'"('
+            + b"|".join(re.escape(key.encode()) for key in self.keys)
+            + rb')"\s*:\s*\{\s*"data"\s*:\s*\['
+        )
+        self._matrices: Dict[str, _MatrixBuilder] = {}
+        self._current: Optional[_MatrixBuilder] = None
+        # The document without the matrices, validated on close
+        self._skeleton = bytearray()
+        self._buffer = bytearray()
+        self._searched = 0
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Decodes all complete rows of the next chunk of the response body.
+
+        Args:
+            chunk (bytes): The chunk.
+
+        Raises:
+            ValueError: If a matrix is malformed.
+        """
+        self._buffer += chunk
+        while True:
+            if self._current is None:
+                match = self._start.search(self._buffer, max(0, self._searched - _START_OVERLAP))
+                if match is None:
+                    self._searched = len(self._buffer)
+                    return
+                key = match.group(1).decode()
+                self._skeleton += self._buffer[: match.end() - 1] + b"[]"
+                del self._buffer[: match.end()]
+                self._searched = 0
+                n_columns = (
+                    self.n_columns.get(key) if isinstance(self.n_columns, dict)
+                    else self.n_columns
+                )
+                value_dtype = (
+                    self.value_dtype.get(key) if isinstance(self.value_dtype, dict)
+                    else self.value_dtype
+                )
+                self._current = _MatrixBuilder(
+                    n_columns,
+                    self.expected_rows,
+                    self.loads,
+                    value_dtype,
+                    self.time_columns,
+                    self.fuse_nanos,
+                )
+                self._matrices[key] = self._current
+            self._current.consume(self._buffer)
+            if not self._current.done:
+                return
+            self._current = None
+
+    def close_all(self) -> Dict[str, Union[np.ndarray, DataArrays]]:
+        """
+        Finishes decoding and returns the matrices.
+
+        Returns:
+            Dict[str, Union[np.ndarray, DataArrays]]: The matrix with shape
+            (rows, n_columns), or its DataArrays if a value_dtype is set, per key.
+
+        Raises:
+            GraphQLError: If the response contains errors.
+            ValueError: If the response does not contain all complete matrices.
+        """
+        if self._current is not None:
+            raise ValueError("Raw data matrix is truncated")
+
+        # Validate the document around the matrices
+        error = get_graphql_error(json.loads(bytes(self._skeleton + self._buffer)))
+        if error:
+            raise GraphQLError(error)
+        missing = [key for key in self.keys if key not in self._matrices]
+        if missing:
+            raise ValueError(f"Response contains no data for {', '.join(missing)}")
+        return {key: matrix.result() for key, matrix in self._matrices.items()}
+
+    def close(self) -> Union[np.ndarray, DataArrays]:
+        """
+        Finishes decoding and returns the matrix of the first key.
+
+        Returns:
+            Union[np.ndarray, DataArrays]: The matrix with shape (rows, n_columns).
+
+        Raises:
+            GraphQLError: If the response contains errors.
+            ValueError: If the response is not a complete Raw data response.
+        """
+        return self.close_all()[self.keys[0]]
+
+
+def decode_raw_matrix(
+    chunks: Iterable[bytes],
+    n_columns: Optional[int] = None,
+    expected_rows: int = 0,
+    loads: Optional[Callable[[bytes], Any]] = None,
+    value_dtype: Optional[DTypeLike] = None,
+    time_columns: int = 1,
+    fuse_nanos: bool = False,
+) -> Union[np.ndarray, DataArrays]:
+    """
+    Decodes the data.Raw.data matrix of a GraphQL response body given as chunks.
+
+    Args:
+        chunks (Iterable[bytes]): The (decompressed) body, e.g. from iter_decoded_content.
+        n_columns (Optional[int]): Number of columns, inferred from the first row if None.
+        expected_rows (int): Number of rows to preallocate.
+        loads (Optional[Callable[[bytes], Any]]): JSON decode function used for the rows.
+        value_dtype (Optional[DTypeLike]): dtype of the value columns (see RawMatrixDecoder).
+        time_columns (int): Number of leading timestamp columns.
+        fuse_nanos (bool): Fuse the ts and nanos columns of DataArrays to ns.
+
+    Returns:
+        Union[np.ndarray, DataArrays]: The float64 matrix with shape (rows, n_columns),
+        or its DataArrays if a value_dtype is given.
+
+    Raises:
+        GraphQLError: If the response contains errors.
+        ValueError: If the response is not a complete Raw data response.
+    """
+    decoder = RawMatrixDecoder(
+        n_columns=n_columns,
+        expected_rows=expected_rows,
+        loads=loads,
+        value_dtype=value_dtype,
+        time_columns=time_columns,
+        fuse_nanos=fuse_nanos,
+    )
+    for chunk in chunks:
+        decoder.feed(chunk)
+    return decoder.close()
+
+
+def decode_raw_matrices(
+    chunks: Iterable[bytes],
+    n_columns: Dict[str, int],
+    loads: Optional[Callable[[bytes], Any]] = None,
+    value_dtype: Union[None, DTypeLike, Dict[str, DTypeLike]] = None,
+    time_columns: int = 1,
+    fuse_nanos: bool = False,
+) -> Dict[str, Union[np.ndarray, DataArrays]]:
+    """
+    Decodes the matrices of aliased Raw fields of a GraphQL response body given as chunks.
+
+    Args:
+        chunks (Iterable[bytes]): The (decompressed) body, e.g. from iter_decoded_content.
+        n_columns (Dict[str, int]): Number of columns per alias.
+        loads (Optional[Callable[[bytes], Any]]): JSON decode function used for the rows.
+        value_dtype (Union[None, DTypeLike, Dict[str, DTypeLike]]): dtype of the value
+        columns, or per alias (see RawMatrixDecoder).
+        time_columns (int): Number of leading timestamp columns.
+        fuse_nanos (bool): Fuse the ts and nanos columns of DataArrays to ns.
+
+    Returns:
+        Dict[str, Union[np.ndarray, DataArrays]]: The float64 matrix, or its DataArrays,
+        per alias.
+
+    Raises:
+        GraphQLError: If the response contains errors.
+        ValueError: If the response does not contain all complete matrices.
+    """
+    decoder = RawMatrixDecoder(
+        n_columns=n_columns,
+        loads=loads,
+        keys=list(n_columns),
+        value_dtype=value_dtype,
+        time_columns=time_columns,
+        fuse_nanos=fuse_nanos,
+    )
+    for chunk in chunks:
+        decoder.feed(chunk)
+    return decoder.close_all()
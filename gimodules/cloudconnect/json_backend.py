@@ -0,0 +1,71 @@
+"""
+Module with the pluggable JSON decoders used for the responses of the Cloud clients.
+
+orjson and pysimdjson are optional, the standard library is used if neither is installed.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+
+@dataclass(frozen=True)
+class JSONBackend:
+    """Object for tracking a JSON library and its decode function"""
+
+    name: str
+    # Decodes a JSON document given as bytes or str, raises ValueError if it is invalid
+    loads: Callable[[Union[bytes, str]], Any]
+
+
+STDLIB = JSONBackend("json", json.loads)
+
+_BACKENDS: Dict[str, Optional[JSONBackend]] = {
+    "orjson": JSONBackend("orjson", orjson.loads) if orjson is not None else None,
+    "simdjson": JSONBackend("simdjson", simdjson.loads) if simdjson is not None else None,
+    "json": STDLIB,
+}
+
+
+def available_backends() -> List[str]:
+    """Returns the names of the installed backends, fastest first."""
+    return [name for name, backend in _BACKENDS.items() if backend is not None]
+
+
+def get_json_backend(backend: Union[None, str, JSONBackend] = None) -> JSONBackend:
+    """
+    Returns a JSON backend by name.
+
+    Args:
+        backend (Union[None, str, JSONBackend]): "orjson", "simdjson", "json", a custom
+        JSONBackend, or None / "auto" for the fastest installed backend.
+
+    Returns:
+        JSONBackend: The backend.
+
+    Raises:
+        ImportError: If the requested backend is not installed.
+        ValueError: If the backend name is unknown.
+    """
+    if isinstance(backend, JSONBackend):
+        return backend
+    if backend is None or backend == "auto":
+        return _BACKENDS[available_backends()[0]] or STDLIB
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{backend}', choose from {list(_BACKENDS)}")
+    selected = _BACKENDS[backend]
+    if selected is None:
+        raise ImportError(f"JSON backend '{backend}' is not installed")
+    return selected
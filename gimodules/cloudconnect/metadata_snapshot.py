@@ -0,0 +1,130 @@
+"""
+Module for persisting the stream and variable metadata of a tenant between processes.
+
+Loading the variables of all streams is the slowest part of a login. A snapshot stores
+the streams and variables as JSON rows together with the tenant, its creation time and a
+fingerprint of the stream list, so a new process can use it while it is younger than a
+TTL and, with one request for the stream list, check that no stream was added, removed or
+changed since (see CloudRequest.login(metadata_snapshot=...)).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Optional, Sequence
+
+from gimodules.cloudconnect.json_backend import JSONBackend, get_json_backend
+
+# Incremented whenever the layout of the rows changes, older snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+
+@dataclass
+class MetadataSnapshot:
+    """Object for tracking the stream and variable metadata of a tenant"""
+
+    url: str
+    # Fingerprint of the stream list (see stream_fingerprint)
+    fingerprint: str
+    # Field rows of GIStream
+    streams: List[List[Any]]
+    # Unique variable name followed by the field row of GIStreamVariable
+    variables: List[List[Any]]
+    # Epoch seconds
+    created: float = field(default_factory=time.time)
+    version: int = SNAPSHOT_VERSION
+
+    @property
+    def age(self) -> float:
+        """the seconds since the snapshot was taken"""
+        return time.time() - self.created
+
+
+def stream_fingerprint(streams: Iterable[Sequence[Any]]) -> str:
+    """
+    Returns a hash of the stream list which changes if a stream is added, removed or
+    changed. Only pass fields which change with the configuration, e.g. not the last
+    timestamp.
+
+    Args:
+        streams (Iterable[Sequence[Any]]): One row of fields per stream.
+
+    Returns:
+        str: The hex digest.
+    """
+    rows = sorted(json.dumps(list(row), default=str) for row in streams)
+    return hashlib.sha256("\n".join(rows).encode()).hexdigest()
+
+
+def save_snapshot(path: str, snapshot: MetadataSnapshot) -> bool:
+    """
+    Writes a snapshot atomically (temporary file, then rename).
+
+    Args:
+        path (str): File path, its directory is created if missing.
+        snapshot (MetadataSnapshot): The snapshot.
+
+    Returns:
+        bool: True if the snapshot was written.
+    """
+    path = os.path.expanduser(path)
+    temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(vars(snapshot), file, separators=(",", ":"))
+        os.replace(temporary, path)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        logging.warning(f"Writing metadata snapshot {path} failed: {e}")
+        return False
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def load_snapshot(
+    path: str,
+    url: Optional[str] = None,
+    ttl: Optional[float] = None,
+    json_backend: Optional[JSONBackend] = None,
+) -> Optional[MetadataSnapshot]:
+    """
+    Reads a snapshot if it exists, has the current version and belongs to url.
+
+    Args:
+        path (str): File path.
+        url (Optional[str]): Tenant the snapshot must belong to. Defaults to None (any).
+        ttl (Optional[float]): Maximum age in seconds. Defaults to None (any age).
+        json_backend (Optional[JSONBackend]): JSON decoder. Defaults to the fastest one.
+
+    Returns:
+        Optional[MetadataSnapshot]: The snapshot, None if it is missing, unreadable,
+        of another version or tenant, or expired.
+    """
+    path = os.path.expanduser(path)
+    try:
+        with open(path, "rb") as file:
+            content = (json_backend or get_json_backend()).loads(file.read())
+        snapshot = MetadataSnapshot(**content)
+    except FileNotFoundError:
+        return None
+    except (OSError, TypeError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable metadata snapshot {path}: {e}")
+        return None
+    if snapshot.version != SNAPSHOT_VERSION:
+        logging.info(f"Ignoring metadata snapshot {path} of version {snapshot.version}")
+        return None
+    if url is not None and snapshot.url != url:
+        logging.info(f"Ignoring metadata snapshot {path} of {snapshot.url}")
+        return None
+    if ttl is not None and snapshot.age > ttl:
+        logging.info(f"Metadata snapshot {path} expired ({snapshot.age:.0f} s old)")
+        return None
+    return snapshot
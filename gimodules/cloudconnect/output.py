@@ -0,0 +1,175 @@
+"""
+Module to convert decoded data into the output formats of the data fetches.
+
+Apache Arrow tables are built straight from the decoded arrays: the value columns of
+DataArrays are column-major, so every column is handed to Arrow without a copy.
+pyarrow and polars are optional, polars frames are created from the Arrow table.
+"""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import asdict, dataclass
+from enum import Enum
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+
+class OutputFormat(Enum):
+    PANDAS = "pandas"
+    NUMPY = "numpy"
+    ARROW = "arrow"
+    POLARS = "polars"
+
+
+# Result of a data fetch: pandas.DataFrame, DataArrays, pyarrow.Table or polars.DataFrame
+DataOutput = Any
+
+
+@dataclass(frozen=True)
+class FieldInfo:
+    """Object for tracking the metadata of a value column"""
+
+    name: str
+    index: str = ""
+    stream: str = ""
+    unit: str = ""
+    aggregation: str = ""
+
+    def metadata(self) -> Dict[bytes, bytes]:
+        """the Arrow field metadata"""
+        return {key.encode(): str(value).encode() for key, value in asdict(self).items()}
+
+
+def get_output_format(output: Union[str, OutputFormat]) -> OutputFormat:
+    """
+    Returns the output format and checks that its libraries are installed.
+
+    Args:
+        output (Union[str, OutputFormat]): "pandas", "numpy", "arrow" or "polars".
+
+    Returns:
+        OutputFormat: The output format.
+
+    Raises:
+        ValueError: If the output format is unknown.
+        ImportError: If pyarrow (arrow, polars) or polars is not installed.
+    """
+    output = OutputFormat(output)
+    if output in (OutputFormat.ARROW, OutputFormat.POLARS) and pa is None:
+        raise ImportError(f"Output '{output.value}' requires pyarrow (pip install pyarrow)")
+    if output is OutputFormat.POLARS and pl is None:
+        raise ImportError("Output 'polars' requires polars (pip install polars)")
+    return output
+
+
+def arrow_table(
+    times: np.ndarray,
+    values: np.ndarray,
+    time_name: str,
+    fields: List[FieldInfo],
+    timezone: Optional[str] = "UTC",
+) -> Any:
+    """
+    Builds a pyarrow.Table from a datetime64 column and the value columns.
+
+    The timestamps are reinterpreted as Arrow timestamps of the same unit (UTC instants,
+    annotated with timezone) and contiguous value columns are wrapped without copying.
+
+    Args:
+        times (np.ndarray): The timestamps as datetime64.
+        values (np.ndarray): The values with shape (rows, len(fields)).
+        time_name (str): Name of the time column.
+        fields (List[FieldInfo]): Name and metadata per value column.
+        timezone (Optional[str]): Timezone of the time column, None for naive UTC.
+
+    Returns:
+        pyarrow.Table: The table.
+    """
+    unit = np.datetime_data(times.dtype)[0]
+    time_type = pa.timestamp(unit, tz=timezone)
+    columns = [pa.array(times.view(np.int64)).view(time_type)]
+    schema = [pa.field(time_name, time_type)]
+    for k, info in enumerate(fields):
+        columns.append(pa.array(values[:, k]))
+        schema.append(pa.field(info.name, columns[-1].type, metadata=info.metadata()))
+    return pa.Table.from_arrays(columns, schema=pa.schema(schema))
+
+
+def read_csv_table(
+    source: Union[str, BinaryIO],
+    fields: List[FieldInfo],
+    delimiter: str = ";",
+    decimal_sep: str = ".",
+    header_rows: int = 3,
+    float_columns: Sequence[str] = (),
+) -> Any:
+    """
+    Parses an exportCSV file into a pyarrow.Table with typed columns.
+
+    Args:
+        source (Union[str, BinaryIO]): Path or stream of the file.
+        fields (List[FieldInfo]): Metadata of the value columns after the two time columns.
+        delimiter (str): Field delimiter of the file.
+        decimal_sep (str): Decimal separator of the file.
+        header_rows (int): Number of metadata rows below the column names.
+        float_columns (Sequence[str]): Other columns parsed as float64 instead of inferred,
+        so the tables of several files share one schema.
+
+    Returns:
+        pyarrow.Table: The table, the value fields carry the metadata.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as file:
+            return read_csv_table(file, fields, delimiter, decimal_sep, header_rows, float_columns)
+
+    # Variables of different streams can share a name, the columns are typed by position
+    header = source.readline().decode("utf-8-sig").rstrip("\r\n")
+    names = next(csv.reader([header], delimiter=delimiter))
+    offset = len(names) - len(fields)
+    positions = [str(k) for k in range(len(names))]
+    table = pa_csv.read_csv(
+        source,
+        read_options=pa_csv.ReadOptions(column_names=positions, skip_rows=header_rows),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(
+            decimal_point=decimal_sep,
+            column_types={
+                positions[k]: pa.float64()
+                for k, name in enumerate(names)
+                if k >= offset or name in float_columns
+            },
+        ),
+    ).rename_columns(names)
+    schema = pa.schema(
+        [
+            field if k < offset else field.with_metadata(fields[k - offset].metadata())
+            for k, field in enumerate(table.schema)
+        ]
+    )
+    return table.cast(schema)
+
+
+def concat_tables(parts: List[Any], output: OutputFormat) -> Any:
+    """Concatenates the pyarrow.Tables or polars.DataFrames of consecutive time ranges."""
+    if output is OutputFormat.ARROW:
+        return pa.concat_tables(parts)
+    return pl.concat(parts)
+
+
+def polars_frame(table: Any) -> Any:
+    """Returns the pyarrow.Table as polars.DataFrame (zero-copy where possible)."""
+    return pl.from_arrow(table)
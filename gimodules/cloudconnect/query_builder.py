@@ -0,0 +1,313 @@
+"""
+Module to build compact, parameterized GraphQL query documents for the Cloud GraphQL API.
+
+The stream IDs and raw columns are sent as GraphQL variables of the documented types
+(String!, [String!]!). Timestamps and the other scalars are inlined as literals like in
+the original queries, as the server's types for them are not part of the public schema
+description. The documents are built once per shape as templates and only the time range
+is filled in per call.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+# GraphQL types of the variables
+VARIABLE_TYPES: Dict[str, str] = {
+    "sid": "String!",
+    "columns": "[String!]!",
+}
+
+# Inline time range of the templates, filled in with the %-operator (templates hold no other
+# "%", their names are checked identifiers)
+_TIME_RANGE = "from:%(from)d,to:%(to)d"
+
+# Names which are inlined into documents (fields, enum values) must be plain identifiers
+_NAME = re.compile(r"^[_A-Za-z][_0-9A-Za-z]*$")
+
+Timestamp = Optional[Union[int, float, str]]
+
+
+@dataclass(frozen=True)
+class GQLQuery:
+    """Object for tracking a GraphQL document and the variables it is sent with"""
+
+    document: str
+    variables: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        """the JSON body of the http request"""
+        if not self.variables:
+            return {"query": self.document}
+        return {"query": self.document, "variables": self.variables}
+
+    def __str__(self) -> str:
+        return self.document
+
+
+def _check_name(name: str) -> str:
+    """Returns name if it can be inlined into a document, raises ValueError otherwise."""
+    if not _NAME.match(name):
+        raise ValueError(f"Invalid GraphQL name: {name!r}")
+    return name
+
+
+def _to_timestamp(value: Timestamp) -> int:
+    """Converts a timestamp in ms given as int, float or numeric string to int."""
+    if value is None:
+        raise ValueError("Timestamp is missing")
+    return int(value) if isinstance(value, int) else int(float(value))
+
+
+def _declare(*names: str) -> str:
+    """
+    Returns the variable definitions of an operation, e.g. ($sid:String!,$columns:[String!]!).
+    Numbered names (sid0, sid1, ...) have the type of the base name.
+    """
+    return (
+        "("
+        + ",".join(f"${name}:{VARIABLE_TYPES[name.rstrip('0123456789')]}" for name in names)
+        + ")"
+    )
+
+
+def batch_alias(position: int) -> str:
+    """Returns the response field alias of the selection at position of a batch query."""
+    return f"s{position}"
+
+
+def _fill(template: str, start: Timestamp, end: Timestamp) -> str:
+    """Returns a document template with the time range filled in."""
+    return template % {"from": _to_timestamp(start), "to": _to_timestamp(end)}
+
+
+def _literal(value: Any) -> str:
+    """Renders a value as compact GraphQL input literal (object keys unquoted)."""
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{_check_name(k)}:{_literal(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_literal(v) for v in value) + "]"
+    return json.dumps(value)
+
+
+@lru_cache(maxsize=1)
+def _raw_document() -> str:
+    return (
+        f"query{_declare('sid', 'columns')}"
+        f"{{Raw(columns:$columns,sid:$sid,{_TIME_RANGE}){{data}}}}"
+    )
+
+
+@lru_cache(maxsize=256)
+def _analytics_document(
+    indices: Tuple[str, ...], aggregations: Tuple[str, ...], resolution: str
+) -> str:
+    selection = " ".join(aggregations)
+    fields = "".join(f" {index}{{{selection}}}" for index in indices)
+    return (
+        f"query{_declare('sid')}"
+        f"{{analytics({_TIME_RANGE},resolution:{resolution},sid:$sid){{ts{fields}}}}}"
+    )
+
+
+@lru_cache(maxsize=64)
+def _raw_batch_document(count: int) -> str:
+    names = [name for i in range(count) for name in (f"sid{i}", f"columns{i}")]
+    fields = "".join(
+        f"{batch_alias(i)}:Raw(columns:$columns{i},sid:$sid{i},{_TIME_RANGE}){{data}}"
+        for i in range(count)
+    )
+    return f"query{_declare(*names)}{{{fields}}}"
+
+
+@lru_cache(maxsize=128)
+def _analytics_batch_document(
+    indices: Tuple[Tuple[str, ...], ...], aggregations: Tuple[str, ...], resolution: str
+) -> str:
+    selection = " ".join(aggregations)
+    fields = "".join(
+        f"{batch_alias(i)}:analytics({_TIME_RANGE},resolution:{resolution},sid:$sid{i})"
+        f"{{ts{''.join(f' {index}{{{selection}}}' for index in stream_indices)}}}"
+        for i, stream_indices in enumerate(indices)
+    )
+    names = [f"sid{i}" for i in range(len(indices))]
+    return f"query{_declare(*names)}{{{fields}}}"
+
+
+@lru_cache(maxsize=8)
+def _measurement_periods_document(sort: str) -> str:
+    return (
+        f"query{_declare('sid')}"
+        f"{{measurementPeriods(sid:$sid,{_TIME_RANGE},limit:%(limit)d,sort:{sort})"
+        "{minTs maxTs mid sampleRate}}"
+    )
+
+
+def raw_query(sid: str, columns: Sequence[str], start: Timestamp, end: Timestamp) -> GQLQuery:
+    """
+    Builds the query for the raw samples of a stream.
+
+    Args:
+        sid (str): Stream ID.
+        columns (Sequence[str]): Columns to return, e.g. ["ts", "nanos", "a1"].
+        start (Timestamp): Start timestamp in ms.
+        end (Timestamp): End timestamp in ms.
+
+    Returns:
+        GQLQuery: The query.
+    """
+    variables = {"sid": sid, "columns": list(columns)}
+    return GQLQuery(_fill(_raw_document(), start, end), variables)
+
+
+def analytics_query(
+    sid: str,
+    indices: Sequence[str],
+    start: Timestamp,
+    end: Timestamp,
+    resolution: str,
+    aggregations: Sequence[str] = ("avg",),
+) -> GQLQuery:
+    """
+    Builds the query for aggregated data of a stream.
+    The selected fields cannot be variables, so the document template is cached per
+    indices, aggregations and resolution.
+
+    Args:
+        sid (str): Stream ID.
+        indices (Sequence[str]): Channel indices, e.g. ["a1", "a2"].
+        start (Timestamp): Start timestamp in ms.
+        end (Timestamp): End timestamp in ms.
+        resolution (str): Resolution, e.g. "SECOND".
+        aggregations (Sequence[str]): Aggregations per index. Defaults to ("avg",).
+
+    Returns:
+        GQLQuery: The query.
+
+    Raises:
+        ValueError: If an index, aggregation or the resolution is not a valid name.
+    """
+    template = _analytics_document(
+        tuple(_check_name(index) for index in indices),
+        tuple(_check_name(aggregation) for aggregation in aggregations),
+        _check_name(resolution),
+    )
+    return GQLQuery(_fill(template, start, end), {"sid": sid})
+
+
+def raw_batch_query(
+    selections: Sequence[Tuple[str, Sequence[str]]], start: Timestamp, end: Timestamp
+) -> GQLQuery:
+    """
+    Builds one query for the raw samples of several streams in the same time range.
+    The result of the selection at position i is the field batch_alias(i) of the response.
+
+    Args:
+        selections (Sequence[Tuple[str, Sequence[str]]]): (stream ID, columns) pairs.
+        start (Timestamp): Start timestamp in ms.
+        end (Timestamp): End timestamp in ms.
+
+    Returns:
+        GQLQuery: The query.
+    """
+    variables: Dict[str, Any] = {}
+    for i, (sid, columns) in enumerate(selections):
+        variables[f"sid{i}"] = sid
+        variables[f"columns{i}"] = list(columns)
+    return GQLQuery(_fill(_raw_batch_document(len(selections)), start, end), variables)
+
+
+def analytics_batch_query(
+    selections: Sequence[Tuple[str, Sequence[str]]],
+    start: Timestamp,
+    end: Timestamp,
+    resolution: str,
+    aggregations: Sequence[str] = ("avg",),
+) -> GQLQuery:
+    """
+    Builds one query for aggregated data of several streams in the same time range.
+    The result of the selection at position i is the field batch_alias(i) of the response.
+
+    Args:
+        selections (Sequence[Tuple[str, Sequence[str]]]): (stream ID, indices) pairs.
+        start (Timestamp): Start timestamp in ms.
+        end (Timestamp): End timestamp in ms.
+        resolution (str): Resolution, e.g. "SECOND".
+        aggregations (Sequence[str]): Aggregations per index. Defaults to ("avg",).
+
+    Returns:
+        GQLQuery: The query.
+
+    Raises:
+        ValueError: If an index, aggregation or the resolution is not a valid name.
+    """
+    template = _analytics_batch_document(
+        tuple(tuple(_check_name(index) for index in indices) for _, indices in selections),
+        tuple(_check_name(aggregation) for aggregation in aggregations),
+        _check_name(resolution),
+    )
+    variables = {f"sid{i}": sid for i, (sid, _) in enumerate(selections)}
+    return GQLQuery(_fill(template, start, end), variables)
+
+
+def measurement_periods_query(
+    sid: str, start: Timestamp, end: Timestamp, limit: int, sort: str = "DESC"
+) -> GQLQuery:
+    """
+    Builds the query for the measurement periods of a stream.
+
+    Args:
+        sid (str): Stream ID.
+        start (Timestamp): Start timestamp in ms.
+        end (Timestamp): End timestamp in ms.
+        limit (int): Maximum number of periods.
+        sort (str): "ASC" or "DESC". Defaults to "DESC".
+
+    Returns:
+        GQLQuery: The query.
+    """
+    template = _measurement_periods_document(_check_name(sort))
+    document = template % {
+        "from": _to_timestamp(start),
+        "to": _to_timestamp(end),
+        "limit": int(limit),
+    }
+    return GQLQuery(document, {"sid": sid})
+
+
+def export_csv_query(
+    columns: List[Dict[str, Any]],
+    resolution: str,
+    start: Timestamp,
+    end: Timestamp,
+    timezone: str,
+    filename: str,
+) -> GQLQuery:
+    """
+    Builds the exportCSV query. All values are rendered compactly into the document as
+    literals.
+
+    Args:
+        columns (List[Dict[str, Any]]): Column definitions, e.g.
+        [{"field": "ts", "headers": ["time"]}].
+        resolution (str): Resolution, e.g. "SECOND".
+        start (Timestamp): Start timestamp in ms.
+        end (Timestamp): End timestamp in ms.
+        timezone (str): Timezone of the exported timestamps.
+        filename (str): Name of the exported file.
+
+    Returns:
+        GQLQuery: The query.
+    """
+    document = (
+        f"{{exportCSV(resolution:{_check_name(resolution)},"
+        f"from:{_to_timestamp(start)},to:{_to_timestamp(end)},"
+        f"timezone:{_literal(timezone)},filename:{_literal(filename)},"
+        f"columns:{_literal(columns)}){{file}}}}"
+    )
+    return GQLQuery(document)
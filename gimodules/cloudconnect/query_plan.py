@@ -0,0 +1,230 @@
+"""
+Module for cost-based planning of data requests.
+
+A plan estimates the rows, values and response bytes of a request from the stream's
+sample rate and the periods which hold data (first/last timestamp of the stream and its
+measurement periods), then picks the time windows and column groups which stay under the
+server limits with the fewest round trips. Windows are balanced by the estimated rows, so
+gaps between measurements do not count.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class QueryLimits:
+    """Object for tracking the limits of a single request and the cost model"""
+
+    # Values (rows * value columns) per request
+    max_points: int = 700_000
+    # Estimated response bytes per request
+    max_bytes: int = 32 * 2**20
+    # Value columns per request
+    max_columns: int = 500
+    # Estimated response bytes per value (JSON or CSV text incl. separators)
+    bytes_per_value: float = 16.0
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """Object for tracking how a data request is split into requests"""
+
+    resolution: str
+    # Inclusive (start, end) windows in ms
+    windows: List[Tuple[int, int]]
+    # Columns fetched together, every group is fetched for every window
+    column_groups: List[List[str]]
+    # Estimated rows per second while the stream has data
+    rows_per_second: float
+    # Seconds of the range with data
+    active_seconds: float
+    # Estimates for the whole request
+    rows: float
+    points: float
+    bytes: float
+    limits: QueryLimits = field(default_factory=QueryLimits)
+
+    @property
+    def requests(self) -> int:
+        """the number of round trips"""
+        return len(self.windows) * len(self.column_groups)
+
+    def __str__(self) -> str:
+        return (
+            f"QueryPlan({self.resolution}): {self.requests} requests = "
+            f"{len(self.windows)} windows x {len(self.column_groups)} column groups, "
+            f"~{self.rows:.0f} rows ({self.rows_per_second:g}/s over "
+            f"{self.active_seconds:.0f} s), ~{self.points:.0f} values, "
+            f"~{self.bytes / 2**20:.1f} MB"
+        )
+
+
+def active_periods(
+    tss: int,
+    tse: int,
+    first_ts: Optional[int] = None,
+    last_ts: Optional[int] = None,
+    periods: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Returns the parts of [tss, tse] which can hold data: within the first and last
+    timestamp of the stream and, if given, within its measurement periods.
+
+    Args:
+        tss (int): Start timestamp in ms.
+        tse (int): End timestamp in ms.
+        first_ts (Optional[int]): First timestamp of the stream in ms. Defaults to None.
+        last_ts (Optional[int]): Last timestamp of the stream in ms. Defaults to None.
+        periods (Optional[np.ndarray]): (start, stop) rows in ms, e.g. the result of
+        CloudRequest.print_measurement. Defaults to None.
+
+    Returns:
+        np.ndarray: Sorted, non-overlapping (start, stop) rows in ms, maybe empty.
+    """
+    start = max(tss, first_ts) if first_ts else tss
+    stop = min(tse, last_ts) if last_ts else tse
+    if periods is None or not len(periods):
+        return np.array([[start, stop]] if start <= stop else [], dtype=np.int64).reshape(-1, 2)
+
+    periods = np.asarray(periods, dtype=np.int64).reshape(-1, 2)
+    periods = periods[np.argsort(periods[:, 0], kind="stable")]
+    clipped = np.column_stack([np.maximum(periods[:, 0], start), np.minimum(periods[:, 1], stop)])
+    clipped = clipped[clipped[:, 0] <= clipped[:, 1]]
+    if not len(clipped):
+        return clipped
+    # Merge overlapping periods: a new one starts after the end of all previous ones
+    ends = np.maximum.accumulate(clipped[:, 1])
+    new = np.concatenate([[True], clipped[1:, 0] > ends[:-1]])
+    starts = clipped[new, 0]
+    stops = ends[np.concatenate([np.flatnonzero(new)[1:] - 1, [len(clipped) - 1]])]
+    return np.column_stack([starts, stops])
+
+
+def balanced_windows(
+    tss: int, tse: int, active: np.ndarray, n: int, step: int = 1
+) -> List[Tuple[int, int]]:
+    """
+    Splits [tss, tse] into up to n gap-free windows with about the same active time each.
+    Inner edges are multiples of step (e.g. the length of an aggregation interval).
+
+    Args:
+        tss (int): Start timestamp in ms.
+        tse (int): End timestamp in ms.
+        active (np.ndarray): Periods with data (see active_periods).
+        n (int): Number of windows.
+        step (int): Alignment of the inner edges in ms. Defaults to 1.
+
+    Returns:
+        List[Tuple[int, int]]: The inclusive windows in ms.
+    """
+    if len(active) and n > 1:
+        lengths = (active[:, 1] - active[:, 0] + 1).astype(np.float64)
+        cumulative = np.concatenate([[0.0], np.cumsum(lengths)])
+        targets = cumulative[-1] * np.arange(1, n) / n
+        idx = np.searchsorted(cumulative, targets, side="right") - 1
+        inner = active[idx, 0] + np.floor(targets - cumulative[idx]).astype(np.int64)
+        inner = -(-inner // step) * step
+        inner = np.unique(inner[(inner > tss) & (inner <= tse)])
+    else:
+        inner = np.empty(0, dtype=np.int64)
+    edges = np.concatenate([[tss], inner, [tse + 1]]).astype(np.int64).tolist()
+    return list(zip(edges[:-1], [edge - 1 for edge in edges[1:]]))
+
+
+def _group_columns(columns: Sequence[str], n_groups: int) -> List[List[str]]:
+    """Splits the columns in order into n_groups groups of about the same size."""
+    size = math.ceil(len(columns) / n_groups)
+    return [list(columns[i: i + size]) for i in range(0, len(columns), size)]
+
+
+def plan_query(
+    columns: Sequence[str],
+    tss: int,
+    tse: int,
+    rows_per_second: float,
+    resolution: str,
+    step: int = 1,
+    time_columns: int = 1,
+    values_per_column: int = 1,
+    active: Optional[np.ndarray] = None,
+    limits: Optional[QueryLimits] = None,
+    split_columns: bool = True,
+) -> QueryPlan:
+    """
+    Plans a data request: estimates its size and picks the number of windows and column
+    groups with the fewest requests (then the fewest bytes, as every column group repeats
+    the time columns) which keep every request under the limits.
+
+    Args:
+        columns (Sequence[str]): Columns of the request, e.g. channel indices.
+        tss (int): Start timestamp in ms.
+        tse (int): End timestamp in ms.
+        rows_per_second (float): Estimated rows per second with data, 0 if unknown.
+        resolution (str): Data resolution.
+        step (int): Length of a row at the resolution in ms, windows are aligned to it.
+        Defaults to 1.
+        time_columns (int): Time columns of every response, 2 for (ts, nanos).
+        Defaults to 1.
+        values_per_column (int): Values per column and row, e.g. the number of
+        aggregations. Defaults to 1.
+        active (Optional[np.ndarray]): Periods with data (see active_periods).
+        Defaults to None (the whole range).
+        limits (Optional[QueryLimits]): Limits per request. Defaults to QueryLimits().
+        split_columns (bool): Allow column groups. Defaults to True.
+
+    Returns:
+        QueryPlan: The plan.
+
+    Raises:
+        ValueError: If the range or the columns are empty.
+    """
+    if tse < tss:
+        raise ValueError("The end of the time range must not be before its start")
+    if not columns:
+        raise ValueError("No columns to plan")
+    limits = limits or QueryLimits()
+    active = active_periods(tss, tse) if active is None else active
+    active_seconds = float((active[:, 1] - active[:, 0]).sum()) / 1000 if len(active) else 0.0
+    rows = rows_per_second * active_seconds
+    max_windows = max(1, (tse - tss + 1) // max(step, 1))
+
+    # (requests, bytes, column groups, windows) of the cheapest split
+    best = (math.inf, math.inf, 1, 1)
+    min_groups = math.ceil(len(columns) * values_per_column / limits.max_columns)
+    candidates = range(min(min_groups, len(columns)), len(columns) + 1) if split_columns else [1]
+    for n_groups in candidates:
+        group_size = math.ceil(len(columns) / n_groups)
+        n_groups = math.ceil(len(columns) / group_size)
+        group_columns = group_size * values_per_column
+        request_bytes = rows * (group_columns + time_columns) * limits.bytes_per_value
+        n_windows = max(
+            1,
+            math.ceil(rows * group_columns / limits.max_points),
+            math.ceil(request_bytes / limits.max_bytes),
+        )
+        n_windows = min(n_windows, max_windows)
+        total_bytes = rows * (len(columns) * values_per_column + n_groups * time_columns)
+        cost = (n_groups * n_windows, total_bytes * limits.bytes_per_value, n_groups, n_windows)
+        best = min(best, cost)
+        if n_windows == 1:
+            # More groups only add requests
+            break
+
+    _, total_bytes, n_groups, n_windows = best
+    return QueryPlan(
+        resolution=resolution,
+        windows=balanced_windows(tss, tse, active, n_windows, step),
+        column_groups=_group_columns(columns, n_groups),
+        rows_per_second=rows_per_second,
+        active_seconds=active_seconds,
+        rows=rows,
+        points=rows * len(columns) * values_per_column,
+        bytes=total_bytes,
+        limits=limits,
+    )
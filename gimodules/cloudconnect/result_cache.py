@@ -0,0 +1,233 @@
+"""
+Module for an in-memory cache of decoded data results shared between threads.
+
+Results are kept least recently used first up to a total number of bytes (the sizes of
+their arrays) and optionally for a limited time. Identical requests made while the first
+one is still running wait for it instead of sending their own (single flight). Every caller
+gets its own copy of the arrays, so results can be changed as without the cache. Windows
+which still receive data (see ResultCache.is_open) are only kept for a short time.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from gimodules.cloudconnect.decoder import DataArrays
+from gimodules.cloudconnect.retry import DeadlineExceeded
+
+
+@dataclass
+class ResultCacheStats:
+    """Object for tracking the use of a ResultCache"""
+
+    # Results returned from the cache
+    hits: int = 0
+    # Fetches run because a result was not cached
+    misses: int = 0
+    # Callers which waited for the identical fetch of another caller
+    shared: int = 0
+    # Results removed to stay within max_bytes or because they expired
+    evictions: int = 0
+    # Cached results and their bytes
+    entries: int = 0
+    nbytes: int = 0
+
+
+def result_nbytes(result: Any) -> int:
+    """Returns the bytes of the arrays of a numpy matrix or DataArrays, 0 otherwise."""
+    if isinstance(result, DataArrays):
+        return result.timestamps.nbytes + result.values.nbytes
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    return 0
+
+
+def _freeze(result: Any) -> None:
+    """Makes the arrays of a cached result read-only, they are only copied from."""
+    arrays = [result.timestamps, result.values] if isinstance(result, DataArrays) else [result]
+    for array in arrays:
+        if isinstance(array, np.ndarray):
+            array.flags.writeable = False
+
+
+def _copy(result: Any) -> Any:
+    """Returns writable copies of the arrays of a result in their memory layout."""
+    if isinstance(result, DataArrays):
+        return dataclasses.replace(
+            result,
+            timestamps=result.timestamps.copy(order="K"),
+            values=result.values.copy(order="K"),
+        )
+    if isinstance(result, np.ndarray):
+        return result.copy(order="K")
+    return result
+
+
+class _Flight:
+    """A running fetch the callers with the same key wait for."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of data results (see CloudRequest(result_cache=...)).
+
+    The cached arrays are read-only and every caller gets a writable copy of them. Failed
+    fetches (None or an exception) are not cached, but passed on to the callers waiting
+    for them.
+
+    Args:
+        max_bytes (int): Limit of the bytes of all cached results, the least recently used
+        ones are evicted beyond it. Defaults to 256 MiB.
+        ttl (Optional[float]): Seconds a result of a closed window is used.
+        Defaults to 3600.
+        open_ttl (float): Seconds a result of an open window is used, identical requests
+        made while it is fetched still share the fetch. Defaults to 5.
+        open_margin (float): Windows ending less than open_margin seconds before the
+        stream's last timestamp (or now) are open. Defaults to 3600.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 2**20,
+        ttl: Optional[float] = 3600.0,
+        open_ttl: float = 5.0,
+        open_margin: float = 3600.0,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.open_ttl = open_ttl
+        self.open_margin = open_margin
+        self._lock = threading.Lock()
+        # key -> (result, bytes, expiry), the least recently used first
+        self._entries: OrderedDict[Hashable, Tuple[Any, int, float]] = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._stats = ResultCacheStats()
+
+    @property
+    def stats(self) -> ResultCacheStats:
+        """a copy of the counters"""
+        with self._lock:
+            return ResultCacheStats(**vars(self._stats))
+
+    def is_open(self, end_ms: int, last_ts: Optional[int] = None) -> bool:
+        """
+        Returns whether a window may still receive data, i.e. it ends less than
+        open_margin before the stream's last timestamp or now (see ChunkCache.is_closed).
+
+        Args:
+            end_ms (int): End of the window in ms.
+            last_ts (Optional[int]): Last timestamp of the stream in ms. Defaults to None.
+
+        Returns:
+            bool: True if the result is only kept for open_ttl.
+        """
+        now = int(time.time() * 1000)
+        cutoff = min(last_ts, now) if last_ts else now
+        return end_ms > cutoff - self.open_margin * 1000
+
+    def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Any],
+        timeout: Optional[float] = None,
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """
+        Returns the cached result for key, otherwise the result of fetch. If the same key
+        is being fetched by another thread, its result is awaited and returned.
+
+        Args:
+            key (Hashable): Normalized parameters of the request.
+            fetch (Callable[[], Any]): Fetches the result, None if it failed.
+            timeout (Optional[float]): Seconds to wait for the fetch of another thread.
+            Defaults to None (no limit).
+            ttl (Optional[float]): Seconds the result is used, e.g. open_ttl for an open
+            window. Defaults to None (the ttl of the cache).
+
+        Returns:
+            Any: A copy of the (shared) result.
+
+        Raises:
+            DeadlineExceeded: If the fetch of another thread took longer than timeout.
+        """
+        cached = flight = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                cached = entry[0]
+            else:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                    self._stats.misses += 1
+                else:
+                    self._stats.shared += 1
+
+        # Copied outside of the lock
+        if flight is None:
+            return _copy(cached)
+        if not leader:
+            if not flight.done.wait(timeout):
+                raise DeadlineExceeded(f"Identical request still running after {timeout}s")
+            if flight.error is not None:
+                raise flight.error
+            return _copy(flight.result)
+
+        try:
+            flight.result = fetch()
+            if flight.result is not None:
+                _freeze(flight.result)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None and flight.result is not None:
+                    self._store(key, flight.result, self.ttl if ttl is None else ttl)
+            flight.done.set()
+        return _copy(flight.result)
+
+    def clear(self) -> None:
+        """Removes all cached results, running fetches are not affected."""
+        with self._lock:
+            self._entries.clear()
+            self._stats.entries = self._stats.nbytes = 0
+
+    def _store(self, key: Hashable, result: Any, ttl: Optional[float]) -> None:
+        """Adds a result and evicts the least recently used ones beyond max_bytes."""
+        nbytes = result_nbytes(result)
+        if nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key, evicted=False)
+        expiry = time.monotonic() + ttl if ttl is not None else float("inf")
+        self._entries[key] = (result, nbytes, expiry)
+        self._stats.entries += 1
+        self._stats.nbytes += nbytes
+        while self._stats.nbytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable, evicted: bool = True) -> None:
+        _, nbytes, _ = self._entries.pop(key)
+        self._stats.entries -= 1
+        self._stats.nbytes -= nbytes
+        self._stats.evictions += evicted
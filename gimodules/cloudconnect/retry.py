@@ -0,0 +1,150 @@
+"""
+Module with the retry/backoff policy and deadline budgets used by the Cloud clients.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import FrozenSet, Optional, Tuple, Union
+
+import requests
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Raised when the time budget of a call is used up before a request could be sent."""
+
+
+@dataclass
+class RetryPolicy:
+    """Object for tracking when and how long to wait before a request is repeated"""
+
+    # Total number of attempts per request (1 disables retries)
+    max_attempts: int = 5
+    # Backoff before attempt n + 1 is backoff_factor * 2 ** (n - 1), capped at max_backoff
+    backoff_factor: float = 0.5
+    max_backoff: float = 30.0
+    # Full jitter: wait a random time between 0 and the backoff
+    jitter: bool = True
+    status_forcelist: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+    # Methods retried unless a request opts in or out, others may change state on the server
+    retry_methods: FrozenSet[str] = frozenset({"GET", "HEAD", "OPTIONS"})
+    respect_retry_after: bool = True
+    # Default time budget in seconds of one public call including all retries, None = unbounded
+    deadline: Optional[float] = None
+
+    def should_retry_status(self, status_code: int) -> bool:
+        return status_code in self.status_forcelist
+
+    def should_retry_method(self, method: str) -> bool:
+        return method.upper() in self.retry_methods
+
+    def get_backoff(self, attempt: int) -> float:
+        """
+        Returns the exponential backoff after a failed attempt.
+
+        Args:
+            attempt (int): Number of the failed attempt, starting at 1.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        backoff = min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+    def get_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Returns the time to wait after a failed attempt, the Retry-After header of the
+        response takes precedence over the backoff if respected.
+
+        Args:
+            attempt (int): Number of the failed attempt, starting at 1.
+            retry_after (Optional[str]): Value of the Retry-After response header.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        if self.respect_retry_after and retry_after:
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                return delay
+        return self.get_backoff(attempt)
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """
+    Parses a Retry-After header given as seconds or HTTP date.
+
+    Args:
+        value (str): The header value.
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the value cannot be parsed.
+    """
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class Deadline:
+    """Time budget of one public call, shared by all requests and retries it makes."""
+
+    def __init__(self, seconds: Optional[float]) -> None:
+        """
+        Args:
+            seconds (Optional[float]): Budget in seconds from now, None means unbounded.
+        """
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    @classmethod
+    def resolve(cls, deadline: Union[None, float, Deadline], default: Optional[float]) -> Deadline:
+        """Returns the given Deadline, or a new one for a budget in seconds or the default."""
+        if isinstance(deadline, Deadline):
+            return deadline
+        return cls(default if deadline is None else deadline)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, None if unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def allows(self, delay: float) -> bool:
+        """Returns True if waiting delay seconds still leaves time for another attempt."""
+        remaining = self.remaining()
+        return remaining is None or delay < remaining
+
+    def clamp_timeout(
+        self, timeout: Tuple[float, Optional[float]]
+    ) -> Tuple[float, Optional[float]]:
+        """
+        Limits a (connect, read) timeout to the remaining budget.
+
+        Raises:
+            DeadlineExceeded: If the budget is used up.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s exceeded")
+        connect, read = timeout
+        return min(connect, remaining), remaining if read is None else min(read, remaining)
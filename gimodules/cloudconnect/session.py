@@ -0,0 +1,183 @@
+"""
+Module to create the pooled, keep-alive HTTP sessions used by the Cloud clients.
+"""
+
+from __future__ import annotations
+
+import io
+import threading
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def _get_accept_encoding() -> str:
+    """Returns the content codings urllib3 can decode in this environment."""
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return ", ".join(encodings)
+    encodings.append("br")
+    return ", ".join(encodings)
+
+
+# Negotiated on every request, brotli is only offered if a brotli package is installed
+ACCEPT_ENCODING = _get_accept_encoding()
+
+# Chunk size used when streaming (and decompressing) response bodies
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class SessionConfig:
+    """Object for tracking the connection pool and timeout parameters of a session"""
+
+    # Number of per-host pools kept (one per tenant is usually enough)
+    pool_connections: int = 4
+    # Maximum number of connections kept alive per host
+    pool_maxsize: int = 16
+    # Block instead of opening throw-away connections once pool_maxsize is reached
+    pool_block: bool = False
+    keep_alive: bool = True
+    # Timeouts in seconds, read_timeout=None waits forever between two received bytes
+    connect_timeout: float = 10.0
+    read_timeout: Optional[float] = 300.0
+
+    @property
+    def timeout(self) -> Tuple[float, Optional[float]]:
+        """returns the (connect, read) timeout tuple understood by requests"""
+        return self.connect_timeout, self.read_timeout
+
+
+def create_session(config: Optional[SessionConfig] = None) -> requests.Session:
+    """
+    Creates a requests session with a connection pool mounted for http and https.
+
+    The underlying urllib3 pool is thread-safe, so one session can be shared by all
+    threads using the same CloudRequest instance.
+
+    Args:
+        config (Optional[SessionConfig]): Pool and timeout configuration.
+        Defaults to SessionConfig().
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    config = config or SessionConfig()
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        pool_block=config.pool_block,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    if not config.keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+@dataclass
+class TransferStats:
+    """Object for tracking transferred (compressed) vs. decoded bytes of responses"""
+
+    wire_bytes: int = 0
+    decoded_bytes: int = 0
+    content_encoding: str = ""
+    responses: int = 0
+
+    @property
+    def compression_ratio(self) -> float:
+        """decoded / transferred bytes, 1.0 for uncompressed transfers"""
+        return self.decoded_bytes / self.wire_bytes if self.wire_bytes else 1.0
+
+    def add(self, other: TransferStats) -> None:
+        """Adds the counts of other to this object."""
+        self.wire_bytes += other.wire_bytes
+        self.decoded_bytes += other.decoded_bytes
+        self.responses += other.responses
+        if other.content_encoding:
+            self.content_encoding = other.content_encoding
+
+
+class TransferCounter:
+    """Thread-safe accumulator of TransferStats over the lifetime of a client."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals = TransferStats()
+
+    def record(self, stats: TransferStats) -> None:
+        with self._lock:
+            self._totals.add(stats)
+
+    @property
+    def totals(self) -> TransferStats:
+        """A copy of the accumulated counts."""
+        with self._lock:
+            totals = TransferStats()
+            totals.add(self._totals)
+            return totals
+
+
+def iter_decoded_content(
+    res: requests.Response, stats: TransferStats, chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Yields the decompressed body of a (streamed) response chunk by chunk and keeps stats
+    up to date with the bytes received on the wire and the decoded bytes.
+
+    Args:
+        res (requests.Response): The response, ideally requested with stream=True.
+        stats (TransferStats): Stats object updated while iterating.
+        chunk_size (int): Size of the chunks read from the connection.
+
+    Yields:
+        bytes: Decoded chunks of the body.
+    """
+    stats.content_encoding = res.headers.get("Content-Encoding", "")
+    stats.responses += 1
+    for chunk in res.iter_content(chunk_size=chunk_size):
+        stats.decoded_bytes += len(chunk)
+        stats.wire_bytes = _get_wire_bytes(res, stats.decoded_bytes)
+        yield chunk
+    stats.wire_bytes = _get_wire_bytes(res, stats.decoded_bytes)
+
+
+def _get_wire_bytes(res: requests.Response, default: int) -> int:
+    """Bytes pulled from the connection so far (before decompression)."""
+    tell = getattr(res.raw, "tell", None)
+    try:
+        wire_bytes = tell() if tell is not None else default
+    except (OSError, ValueError):
+        return default
+    return wire_bytes if isinstance(wire_bytes, int) and wire_bytes > 0 else default
+
+
+class IteratorReader(io.RawIOBase):
+    """Read-only file object over an iterator of bytes, e.g. to feed pd.read_csv."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
@@ -0,0 +1,257 @@
+"""
+Module for time ranges with nanosecond precision and their splitting into windows.
+
+Time values can be datetime/date, pandas.Timestamp, np.datetime64, strings (e.g.
+"2024-01-01 00:00:00", "2024-01-01 00:00:00.250" or ISO 8601 with UTC offset) or epoch
+numbers (ms by default). Naive values are UTC. Ranges are split with int64 arithmetic on
+arrays of window edges instead of parsing and formatting strings per window.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+TimeLike = Union[str, dt.datetime, dt.date, np.datetime64, int, float]
+DurationLike = Union[str, dt.timedelta, np.timedelta64, int, float]
+
+# Nanoseconds per unit of epoch numbers
+UNIT_NS = {"s": 1_000_000_000, "ms": 1_000_000, "us": 1_000, "ns": 1}
+
+# Frequencies of TimeRange.calendar_windows
+CALENDAR_FREQS = ("daily", "weekly", "monthly", "yearly")
+
+# numpy datetime units of the calendar windows
+_CALENDAR_UNITS = {"daily": "D", "monthly": "M", "yearly": "Y"}
+
+# Weeks start on Monday, 1970-01-05
+_FIRST_MONDAY_NS = 4 * 86_400 * UNIT_NS["s"]
+
+
+def to_epoch_ns(value: TimeLike, unit: str = "ms") -> int:
+    """
+    Converts a time value to nanoseconds since the epoch (UTC).
+
+    Args:
+        value (TimeLike): The time value.
+        unit (str): Unit of epoch numbers, "s", "ms", "us" or "ns". Defaults to "ms".
+
+    Returns:
+        int: The timestamp in ns.
+
+    Raises:
+        ValueError: If the value cannot be converted.
+    """
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return int(value) * UNIT_NS[unit]
+    if isinstance(value, (float, np.floating)):
+        if not np.isfinite(value):
+            raise ValueError(f"Invalid time {value!r}")
+        # Whole and fractional part separately, a float64 epoch in ns is not exact
+        whole = math.floor(value)
+        return int(whole) * UNIT_NS[unit] + round((float(value) - whole) * UNIT_NS[unit])
+    if isinstance(value, np.datetime64):
+        if np.isnat(value):
+            raise ValueError("Invalid time NaT")
+        return int(value.astype("datetime64[ns]").astype(np.int64))
+    if isinstance(value, (str, dt.date)):
+        try:
+            timestamp = pd.Timestamp(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid time {value!r}: {e}") from e
+        if timestamp is pd.NaT:
+            raise ValueError(f"Invalid time {value!r}")
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert("UTC")
+        return int(timestamp.value)
+    raise ValueError(f"Unsupported time value {value!r}")
+
+
+def to_duration_ns(value: DurationLike) -> int:
+    """
+    Converts a duration (numbers in ms, e.g. 1000, or "15min", timedelta) to nanoseconds.
+
+    Raises:
+        ValueError: If the value cannot be converted.
+    """
+    if isinstance(value, np.timedelta64):
+        return int(value.astype("timedelta64[ns]").astype(np.int64))
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+        return int(round(float(value) * UNIT_NS["ms"]))
+    try:
+        return int(pd.Timedelta(value).value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid duration {value!r}: {e}") from e
+
+
+def split_edges(start: int, end: int, n: int, step: int = 1) -> np.ndarray:
+    """
+    Returns the edges of up to n gap-free windows of the inclusive range [start, end]:
+    start, the inner edges (multiples of step) and end + 1.
+
+    Args:
+        start (int): First timestamp of the range.
+        end (int): Last timestamp of the range.
+        n (int): Number of windows.
+        step (int): Inner edges are rounded up to multiples of step. Defaults to 1.
+
+    Returns:
+        np.ndarray: The int64 edges, window i is [edges[i], edges[i + 1] - 1].
+    """
+    span = end - start + 1
+    idx = np.arange(1, max(n, 1), dtype=np.int64)
+    # start + span * idx // n without overflowing int64
+    inner = start + (span // n) * idx + (span % n) * idx // n
+    inner = -(-inner // step) * step
+    inner = np.unique(inner[(inner > start) & (inner <= end)])
+    return np.concatenate([[start], inner, [end + 1]]).astype(np.int64)
+
+
+def format_timestamps(timestamps: Sequence[int], unit: Optional[str] = None) -> List[str]:
+    """
+    Formats ns timestamps as "YYYY-MM-DD HH:MM:SS" (UTC) strings, with as many fractional
+    digits as needed to keep them exact.
+
+    Args:
+        timestamps (Sequence[int]): Timestamps in ns since the epoch.
+        unit (Optional[str]): Unit of the formatted strings, e.g. "s" (truncated).
+        Defaults to None (the coarsest exact unit).
+
+    Returns:
+        List[str]: The formatted timestamps.
+    """
+    times = np.asarray(timestamps, dtype=np.int64)
+    if unit is None:
+        unit = next(u for u in ("s", "ms", "us", "ns") if not np.any(times % UNIT_NS[u]))
+    strings = np.datetime_as_string(times.astype("datetime64[ns]"), unit=unit)
+    return np.char.replace(strings, "T", " ").tolist()
+
+
+@dataclass(frozen=True)
+class TimeRange:
+    """Object for tracking an inclusive time range in ns since the epoch (UTC)"""
+
+    start_ns: int
+    end_ns: int
+
+    def __post_init__(self) -> None:
+        if self.end_ns < self.start_ns:
+            raise ValueError("The end of a time range must not be before its start")
+
+    @classmethod
+    def parse(cls, start: TimeLike, end: TimeLike, unit: str = "ms") -> TimeRange:
+        """
+        Returns the time range between two time values (see to_epoch_ns).
+
+        Raises:
+            ValueError: If a value cannot be converted or end is before start.
+        """
+        return cls(to_epoch_ns(start, unit), to_epoch_ns(end, unit))
+
+    @property
+    def start_ms(self) -> int:
+        """the start in ms (rounded down)"""
+        return self.start_ns // UNIT_NS["ms"]
+
+    @property
+    def end_ms(self) -> int:
+        """the end in ms (rounded down), so the ms range covers the range"""
+        return self.end_ns // UNIT_NS["ms"]
+
+    @property
+    def duration(self) -> float:
+        """the length in seconds"""
+        return (self.end_ns - self.start_ns) / UNIT_NS["s"]
+
+    def split(self, n: int, step: Optional[DurationLike] = None) -> List[TimeRange]:
+        """
+        Splits the range into up to n gap-free windows of about the same length.
+
+        Args:
+            n (int): Number of windows.
+            step (Optional[DurationLike]): Inner edges are multiples of step, e.g. the
+            length of an aggregation interval. Defaults to None.
+
+        Returns:
+            List[TimeRange]: The windows in order.
+        """
+        step_ns = 1 if step is None else to_duration_ns(step)
+        return self._windows(split_edges(self.start_ns, self.end_ns, n, step_ns))
+
+    def windows(self, size: DurationLike, origin: TimeLike = 0) -> List[TimeRange]:
+        """
+        Splits the range into gap-free windows at multiples of size after origin,
+        the first and last window are cut at the ends of the range.
+
+        Args:
+            size (DurationLike): Window length, e.g. "1h" or 3_600_000 (ms).
+            origin (TimeLike): Alignment of the windows. Defaults to 0 (the epoch).
+
+        Returns:
+            List[TimeRange]: The windows in order.
+
+        Raises:
+            ValueError: If size is not positive.
+        """
+        size_ns = to_duration_ns(size)
+        if size_ns <= 0:
+            raise ValueError(f"Window size must be positive, got {size!r}")
+        origin_ns = to_epoch_ns(origin)
+        first = (self.start_ns - origin_ns) // size_ns + 1
+        last = (self.end_ns - origin_ns) // size_ns
+        inner = origin_ns + np.arange(first, last + 1, dtype=np.int64) * size_ns
+        return self._windows(np.concatenate([[self.start_ns], inner, [self.end_ns + 1]]))
+
+    def calendar_windows(self, freq: str) -> List[TimeRange]:
+        """
+        Splits the range at the starts of calendar days, weeks (Monday), months or years
+        (UTC).
+
+        Args:
+            freq (str): "daily", "weekly", "monthly" or "yearly".
+
+        Returns:
+            List[TimeRange]: The windows in order.
+
+        Raises:
+            ValueError: If freq is unknown.
+        """
+        if freq == "weekly":
+            return self.windows(np.timedelta64(7, "D"), np.datetime64(_FIRST_MONDAY_NS, "ns"))
+        if freq not in _CALENDAR_UNITS:
+            raise ValueError(f"freq must be one of {CALENDAR_FREQS}, got {freq!r}")
+        unit = f"datetime64[{_CALENDAR_UNITS[freq]}]"
+        first = np.datetime64(self.start_ns, "ns").astype(unit)
+        last = np.datetime64(self.end_ns, "ns").astype(unit)
+        inner = np.arange(first + 1, last + 1).astype("datetime64[ns]").astype(np.int64)
+        return self._windows(np.concatenate([[self.start_ns], inner, [self.end_ns + 1]]))
+
+    @staticmethod
+    def _windows(edges: np.ndarray) -> List[TimeRange]:
+        """Returns the windows [edges[i], edges[i + 1] - 1]."""
+        bounds = edges.astype(np.int64).tolist()
+        return [TimeRange(start, end - 1) for start, end in zip(bounds, bounds[1:])]
+
+
+def to_time_range(
+    start: Union[TimeLike, TimeRange], end: Optional[TimeLike] = None, unit: str = "ms"
+) -> TimeRange:
+    """
+    Returns start if it is a TimeRange (and end is None), otherwise the range between
+    start and end (see to_epoch_ns).
+
+    Raises:
+        ValueError: If a value cannot be converted or end is before start.
+    """
+    if isinstance(start, TimeRange):
+        if end is not None:
+            raise ValueError("end must be None if start is a TimeRange")
+        return start
+    if end is None:
+        raise ValueError("end is missing")
+    return TimeRange.parse(start, end, unit)
@@ -0,0 +1,164 @@
+"""
+Module to manage the access/refresh token pair of a Cloud client across threads.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# Called with the refresh token, returns (access_token, refresh_token) or None on failure
+RefreshFunc = Callable[[str], Optional[Tuple[str, Optional[str]]]]
+
+
+def decode_jwt_expiry(token: Optional[str]) -> Optional[float]:
+    """
+    Reads the expiry ("exp" claim) of a JWT without verifying its signature.
+
+    Args:
+        token (Optional[str]): The encoded JWT.
+
+    Returns:
+        Optional[float]: The expiry as unix timestamp in seconds, or None if the token
+        is no JWT or has no expiry.
+    """
+    if not token:
+        return None
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+class TokenManager:
+    """
+    Thread-safe holder of the access/refresh token pair.
+
+    The access token is refreshed proactively once it expires within refresh_margin
+    seconds (if its expiry can be decoded from the JWT) or on demand after a 401/403.
+    Only one refresh runs at a time: concurrent callers wait for it and then reuse
+    the new token instead of firing their own refresh request. After a failed refresh
+    the current token is used without proactive refreshes for refresh_backoff seconds.
+    """
+
+    def __init__(
+        self,
+        refresh_func: Optional[RefreshFunc] = None,
+        refresh_margin: float = 60.0,
+        refresh_backoff: float = 30.0,
+    ):
+        """
+        Args:
+            refresh_func (Optional[RefreshFunc]): Function exchanging a refresh token for a
+            new token pair.
+            refresh_margin (float): Seconds before expiry at which the token is refreshed.
+            Defaults to 60.
+            refresh_backoff (float): Seconds without proactive refresh after a failed
+            refresh, refreshes after a 401/403 are still sent. Defaults to 30.
+        """
+        self.refresh_func = refresh_func
+        self.refresh_margin = refresh_margin
+        self.refresh_backoff = refresh_backoff
+        self._lock = threading.Lock()
+        self._access_token: Optional[str] = None
+        self._refresh_token: Optional[str] = None
+        self._expires_at: Optional[float] = None
+        # Monotonic time before which no proactive refresh is sent
+        self._backoff_until = 0.0
+
+    @property
+    def access_token(self) -> Optional[str]:
+        return self._access_token
+
+    @property
+    def refresh_token(self) -> Optional[str]:
+        return self._refresh_token
+
+    @refresh_token.setter
+    def refresh_token(self, refresh_token: Optional[str]) -> None:
+        self._refresh_token = refresh_token
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        return self._expires_at
+
+    def set_tokens(self, access_token: Optional[str], refresh_token: Optional[str] = None) -> None:
+        """
+        Stores a new token pair. A missing refresh token keeps the current one.
+
+        Args:
+            access_token (Optional[str]): The access (bearer) token.
+            refresh_token (Optional[str]): The refresh token.
+        """
+        self._access_token = access_token
+        if refresh_token:
+            self._refresh_token = refresh_token
+        self._expires_at = decode_jwt_expiry(access_token)
+        self._backoff_until = 0.0
+
+    def clear(self) -> None:
+        """Forgets both tokens."""
+        self._access_token = None
+        self._refresh_token = None
+        self._expires_at = None
+
+    def needs_refresh(self) -> bool:
+        """Returns True if the access token expires within the refresh margin."""
+        if self._expires_at is None or not self._refresh_token:
+            return False
+        return time.time() >= self._expires_at - self.refresh_margin
+
+    def get_access_token(self) -> Optional[str]:
+        """
+        Returns the current access token, refreshing it first if it is about to expire
+        and the last refresh did not fail within refresh_backoff seconds.
+        """
+        if self.needs_refresh() and time.monotonic() >= self._backoff_until:
+            self._refresh(stale_token=self._access_token, proactive=True)
+        return self._access_token
+
+    def auth_header(self) -> Dict[str, str]:
+        """Returns the Authorization header with the current bearer token."""
+        token = self.get_access_token()
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+    def refresh(self, stale_token: Optional[str] = None) -> bool:
+        """
+        Refreshes the access token, only one refresh runs at a time.
+
+        Args:
+            stale_token (Optional[str]): The token that was found to be expired. If another
+            caller already replaced it while waiting for the lock, no new refresh is sent.
+
+        Returns:
+            bool: True if a different (new) access token is available.
+        """
+        return self._refresh(stale_token)
+
+    def _refresh(self, stale_token: Optional[str], proactive: bool = False) -> bool:
+        with self._lock:
+            if stale_token is not None and self._access_token != stale_token:
+                return True
+            if proactive and time.monotonic() < self._backoff_until:
+                # Another caller's refresh failed while this one waited for the lock
+                return False
+            if not self._refresh_token or self.refresh_func is None:
+                logging.error("No refresh token available for refreshing access token.")
+                self._backoff_until = time.monotonic() + self.refresh_backoff
+                return False
+
+            tokens = self.refresh_func(self._refresh_token)
+            if not tokens or not tokens[0]:
+                self._backoff_until = time.monotonic() + self.refresh_backoff
+                return False
+            self.set_tokens(*tokens)
+            return True
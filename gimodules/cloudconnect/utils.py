@@ -1,7 +1,11 @@
 import re
 import uuid
 from datetime import datetime
-from typing import List
+from typing import List, Tuple
+
+import numpy as np
+
+from gimodules.cloudconnect.time_range import format_timestamps, split_edges, to_epoch_ns
 
 
 def remove_hex_from_string(str):
@@ -17,29 +21,23 @@ def is_valid_uuid(val):
         return False
 
 
-def _split_dates_gen(test_date1, test_date2, N):
-
-    diff = (test_date2 - test_date1) / N
-    for idx in range(N):
-
-        # using generator function to solve problem
-        # returns intermediate result
-        yield (test_date1 + diff * idx)
-    yield test_date2
-
-
 def split_dates(test_date1, test_date2, N):
     """Split dates in N equally distanced date ranges in list
     date obj e.g.:
     test_date1 = datetime.datetime(1997, 1, 1)"""
-    temp = list(_split_dates_gen(test_date1, test_date2, N))
-
-    # using strftime to convert to userfriendly format
-    res = []
-    for sub in temp:
-        res.append(sub.strftime("%Y-%m-%d %H:%M:%S"))
-
-    return res
+    start, end = to_epoch_ns(test_date1), to_epoch_ns(test_date2)
+    span, idx = end - start, np.arange(N, dtype=np.int64)
+    points = start + (span // N) * idx + (span % N) * idx // N
+    # userfriendly format of the query strings
+    return format_timestamps(np.append(points, end), unit="s")
+
+
+def split_time_range(start: int, end: int, n: int, step: int = 1) -> List[Tuple[int, int]]:
+    """Split the inclusive time range [start, end] in ms into up to n non-overlapping,
+    gap-free inclusive windows [(start, t1 - 1), (t1, t2 - 1), ..., (tn-1, end)].
+    Inner boundaries are multiples of step (e.g. the length of an aggregation interval)."""
+    edges = split_edges(start, end, n, step).tolist()
+    return list(zip(edges[:-1], [edge - 1 for edge in edges[1:]]))
 
 
 def get_dates_from_string(text: str) -> List[datetime]:
@@ -0,0 +1,195 @@
+"""
+Module for an indexed catalog of stream variables.
+
+The catalog is a mapping of unique variable names ("<stream>__<variable>") to
+GIStreamVariable with hash indexes for the lookups of CloudRequest (by sid, (sid, index),
+(sid, id), unit and data type) and a trigram index for substring search of the names.
+Indexes are built on first use and kept up to date when variables are added or removed,
+so loading metadata stays as fast as filling a dict.
+"""
+
+from __future__ import annotations
+
+from collections.abc import MutableMapping
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from gimodules.cloudconnect.cloud_request import GIStreamVariable
+
+# Fields of the hash indexes
+INDEXED_FIELDS: List[Tuple[str, ...]] = [
+    ("sid",),
+    ("sid", "index"),
+    ("sid", "id"),
+    ("unit",),
+    ("data_type",),
+]
+
+# Length of the substrings of the search index
+NGRAM = 3
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i: i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class VariableCatalog(MutableMapping):
+    """
+    Variables by unique name with hash and trigram indexes (see CloudRequest.stream_variables).
+
+    Variables must not be changed in place while they are in the catalog, assign a new
+    one instead so the indexes are updated.
+
+    Args:
+        variables (Optional[Mapping[str, GIStreamVariable]]): Initial variables.
+        Defaults to None.
+    """
+
+    def __init__(self, variables: Optional[Mapping[str, GIStreamVariable]] = None) -> None:
+        self._variables: Dict[str, GIStreamVariable] = {}
+        # fields -> field values -> names (dict as ordered set), built on first use
+        self._indexes: Dict[Tuple[str, ...], Dict[Tuple[Any, ...], Dict[str, None]]] = {}
+        # trigram -> names, built on first search
+        self._ngrams: Optional[Dict[str, Set[str]]] = None
+        # Insertion position of every name, orders search results
+        self._positions: Dict[str, int] = {}
+        self._count = 0
+        if variables:
+            self.update(variables)
+
+    def __getitem__(self, name: str) -> GIStreamVariable:
+        return self._variables[name]
+
+    def __setitem__(self, name: str, variable: GIStreamVariable) -> None:
+        if name in self._variables:
+            self._unindex(name, self._variables[name])
+        else:
+            self._positions[name] = self._count
+            self._count += 1
+        self._variables[name] = variable
+        for fields, index in self._indexes.items():
+            index.setdefault(self._key(variable, fields), {})[name] = None
+        if self._ngrams is not None:
+            for ngram in _ngrams(name):
+                self._ngrams.setdefault(ngram, set()).add(name)
+
+    def __delitem__(self, name: str) -> None:
+        variable = self._variables.pop(name)
+        self._unindex(name, variable)
+        del self._positions[name]
+        if self._ngrams is not None:
+            for ngram in _ngrams(name):
+                self._ngrams[ngram].discard(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._variables)
+
+    def __len__(self) -> int:
+        return len(self._variables)
+
+    def __repr__(self) -> str:
+        return f"VariableCatalog({len(self)} variables)"
+
+    def find_names(self, **fields: Any) -> List[str]:
+        """
+        Returns the names of the variables with the given field values, e.g.
+        find_names(sid="...", index="a1"), in insertion order.
+
+        The index with the most of the fields is used and the other fields are compared
+        on its matches, without an index all variables are compared.
+
+        Raises:
+            ValueError: If no field is given.
+        """
+        if not fields:
+            raise ValueError("No field to look up")
+        usable = [f for f in INDEXED_FIELDS if set(f) <= set(fields)]
+        if not usable:
+            names: Sequence[str] = list(self._variables)
+            rest = dict(fields)
+        else:
+            best = max(usable, key=len)
+            names = list(self._index(best).get(tuple(fields[f] for f in best), ()))
+            rest = {f: v for f, v in fields.items() if f not in best}
+        if not rest:
+            return list(names)
+        return [
+            name
+            for name in names
+            if all(getattr(self._variables[name], f, None) == v for f, v in rest.items())
+        ]
+
+    def find(self, **fields: Any) -> List[GIStreamVariable]:
+        """Returns the variables with the given field values (see find_names)."""
+        return [self._variables[name] for name in self.find_names(**fields)]
+
+    def search(self, text: Union[str, Sequence[str]]) -> List[str]:
+        """
+        Returns the names which contain text (or any of several texts) in insertion order.
+
+        Texts of at least NGRAM characters are looked up in the trigram index, the
+        candidates sharing all trigrams are then checked.
+
+        Args:
+            text (Union[str, Sequence[str]]): Substring or substrings (case-sensitive).
+
+        Returns:
+            List[str]: The matching names.
+        """
+        texts = [text] if isinstance(text, str) else list(text)
+        matches: Set[str] = set()
+        for part in texts:
+            if len(part) < NGRAM:
+                matches.update(name for name in self._variables if part in name)
+                continue
+            postings = sorted(
+                (self._ngram_index().get(ngram, set()) for ngram in _ngrams(part)), key=len
+            )
+            if not postings[0]:
+                continue
+            candidates = postings[0].intersection(*postings[1:])
+            matches.update(name for name in candidates if part in name)
+        return sorted(matches, key=self._positions.__getitem__)
+
+    def _index(self, fields: Tuple[str, ...]) -> Dict[Tuple[Any, ...], Dict[str, None]]:
+        """Returns the hash index of the fields, built on first use."""
+        index = self._indexes.get(fields)
+        if index is None:
+            index = {}
+            for name, variable in self._variables.items():
+                index.setdefault(self._key(variable, fields), {})[name] = None
+            self._indexes[fields] = index
+        return index
+
+    def _ngram_index(self) -> Dict[str, Set[str]]:
+        """Returns the trigram index of the names, built on first use."""
+        if self._ngrams is None:
+            self._ngrams = {}
+            for name in self._variables:
+                for ngram in _ngrams(name):
+                    self._ngrams.setdefault(ngram, set()).add(name)
+        return self._ngrams
+
+    def _unindex(self, name: str, variable: GIStreamVariable) -> None:
+        """Removes a name from the hash indexes."""
+        for fields, index in self._indexes.items():
+            key = self._key(variable, fields)
+            index[key].pop(name, None)
+            if not index[key]:
+                del index[key]
+
+    @staticmethod
+    def _key(variable: GIStreamVariable, fields: Tuple[str, ...]) -> Tuple[Any, ...]:
+        return tuple(getattr(variable, f, None) for f in fields)
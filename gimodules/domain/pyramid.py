@@ -0,0 +1,299 @@
+"""
+Module for a multi-resolution min/max/mean pyramid over a time series, e.g. the result of
+CloudRequest.get_data_np, to browse long measurements without re-fetching or re-reducing.
+
+Level k of the pyramid holds buckets of 2**k consecutive rows, built pairwise from level
+k - 1 with vectorized NumPy operations. Bucket j of level k covers the rows
+[j * 2**k, (j + 1) * 2**k), so a viewport (t0, t1, n_pixels) is mapped to the level with
+about n_pixels buckets and answered by slicing it, in O(n_pixels) after two binary
+searches. The finest levels are not stored but reduced from the rows on query (at most
+2**first_level rows per bucket), so the stored levels take a fraction of the memory of
+the values.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from gimodules.cloudconnect.decoder import DataArrays
+
+# Aggregates per bucket: first and last timestamp, min, max, sum and count of non-NaN values
+_FIELDS = ("start", "end", "min", "max", "sum", "count")
+
+
+@dataclass(frozen=True)
+class PyramidSlice:
+    """Object for tracking the buckets of a pyramid viewport"""
+
+    level: int
+    start: np.ndarray
+    end: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    mean: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+
+class _Buffer:
+    """Array with amortized O(1) appends along the first axis."""
+
+    def __init__(self, shape: Tuple[int, ...], dtype: np.dtype) -> None:
+        self._data = np.empty((0, *shape), dtype=dtype)
+        self._size = 0
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._data[: self._size]
+
+    def append(self, rows: np.ndarray) -> None:
+        size = self._size + len(rows)
+        if size > len(self._data):
+            shape = (max(size, 2 * len(self._data)), *self._data.shape[1:])
+            data = np.empty(shape, dtype=self._data.dtype)
+            data[: self._size] = self._data[: self._size]
+            self._data = data
+        self._data[self._size: size] = rows
+        self._size = size
+
+
+class MinMaxPyramid:
+    """
+    Min/max/mean pyramid at power-of-two decimations over (timestamps, values).
+
+    Values may contain NaNs, they are ignored by the aggregates (a bucket of NaNs only
+    has NaN as min, max and mean). The timestamps must be non-decreasing.
+
+    Args:
+        timestamps (np.ndarray): Timestamps of the rows, e.g. int64 ns or float ms.
+        values (np.ndarray): Values with shape (rows,) or (rows, channels).
+        first_level (int): Finest stored level, finer levels are reduced from the rows
+        on query. Defaults to 4 (buckets of 16 rows).
+
+    Raises:
+        ValueError: If the shapes do not match, the timestamps are not sorted or
+        first_level is below 1.
+    """
+
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray, first_level: int = 4) -> None:
+        if first_level < 1:
+            raise ValueError(f"first_level must be at least 1, got {first_level}")
+        timestamps = np.asarray(timestamps)
+        values = np.asarray(values)
+        self._squeeze = values.ndim == 1
+        values = values[:, None] if self._squeeze else values
+        self._timestamps = _Buffer((), timestamps.dtype)
+        self._values = _Buffer(values.shape[1:], values.dtype)
+        # Stored levels first_level, first_level + 1, ...
+        self._first_level = first_level
+        self._levels: List[Dict[str, _Buffer]] = []
+        self.append(timestamps, values)
+
+    @classmethod
+    def from_data(
+        cls, data: Union[np.ndarray, DataArrays], time_columns: int = 1
+    ) -> MinMaxPyramid:
+        """
+        Builds the pyramid of a get_data_np result.
+
+        Args:
+            data (Union[np.ndarray, DataArrays]): DataArrays, or a matrix with the
+            timestamps in the first column.
+            time_columns (int): Leading time columns of a matrix, 2 for the (ts, nanos)
+            columns of raw data. Defaults to 1.
+
+        Returns:
+            MinMaxPyramid: The pyramid.
+        """
+        if isinstance(data, DataArrays):
+            return cls(data.timestamps[:, 0], data.values)
+        return cls(data[:, 0], data[:, time_columns:])
+
+    def __len__(self) -> int:
+        return len(self._timestamps.array)
+
+    @property
+    def levels(self) -> int:
+        """the number of levels with at least one bucket, including level 0 (the rows)"""
+        return max(1, len(self).bit_length())
+
+    @property
+    def nbytes(self) -> int:
+        """the memory used by the rows and the levels"""
+        buffers = [self._timestamps, self._values]
+        buffers += [buffer for level in self._levels for buffer in level.values()]
+        return sum(buffer.array.nbytes for buffer in buffers)
+
+    def append(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """
+        Appends rows after the last one and extends the levels by the buckets they
+        complete, without rebuilding the existing ones.
+
+        Args:
+            timestamps (np.ndarray): Timestamps of the new rows.
+            values (np.ndarray): Values with shape (rows,) or (rows, channels).
+
+        Raises:
+            ValueError: If the shapes do not match or the timestamps are not sorted.
+        """
+        timestamps = np.asarray(timestamps)
+        values = np.asarray(values)
+        values = values[:, None] if values.ndim == 1 else values
+        if len(timestamps) != len(values):
+            raise ValueError(f"{len(timestamps)} timestamps for {len(values)} rows")
+        if values.shape[1:] != self._values.array.shape[1:]:
+            raise ValueError(f"Expected {self._values.array.shape[1]} channels")
+        if not len(timestamps):
+            return
+        previous = self._timestamps.array[-1:]
+        if np.any(np.diff(np.concatenate([previous, timestamps])) < 0):
+            raise ValueError("Timestamps must be non-decreasing")
+        self._timestamps.append(timestamps)
+        self._values.append(values)
+
+        k = self._first_level
+        while len(self) >> k:
+            if k - self._first_level == len(self._levels):
+                self._levels.append(self._empty_level())
+            level = self._levels[k - self._first_level]
+            done = len(level["start"].array)
+            todo = (len(self) >> k) - done
+            if todo > 0:
+                if k == self._first_level:
+                    arrays = self._reduce_blocks(k, done, done + todo)
+                else:
+                    arrays = self._combine_pairs(
+                        self._level_arrays(k - 1, 2 * done, 2 * (done + todo))
+                    )
+                for name, array in arrays.items():
+                    level[name].append(array)
+            k += 1
+
+    def query(
+        self, t0: Optional[float] = None, t1: Optional[float] = None, n_pixels: int = 1000
+    ) -> PyramidSlice:
+        """
+        Returns the aggregates of the viewport from the coarsest level needed for at most
+        n_pixels buckets in it (level 0 if the rows fit). Buckets at the edges may extend
+        beyond the viewport, so one more bucket can be returned. Rows after the last
+        complete bucket of the level (fewer than a bucket) are reduced on the fly.
+
+        Args:
+            t0 (Optional[float]): Start of the viewport. Defaults to None (first row).
+            t1 (Optional[float]): End of the viewport (inclusive). Defaults to None (last row).
+            n_pixels (int): Maximum number of buckets. Defaults to 1000.
+
+        Returns:
+            PyramidSlice: First and last timestamp, min, max and mean per bucket,
+            the values with shape (buckets,) or (buckets, channels).
+
+        Raises:
+            ValueError: If n_pixels is not positive.
+        """
+        if n_pixels <= 0:
+            raise ValueError(f"n_pixels must be positive, got {n_pixels}")
+        timestamps = self._timestamps.array
+        i0 = 0 if t0 is None else int(np.searchsorted(timestamps, t0, side="left"))
+        i1 = len(self) if t1 is None else int(np.searchsorted(timestamps, t1, side="right"))
+        rows = max(0, i1 - i0)
+        k = 0 if rows <= n_pixels else math.ceil(math.log2(rows / n_pixels))
+        k = min(k, self.levels - 1)
+        if not rows:
+            return self._slice(k, self._level_arrays(k, 0, 0))
+
+        first, last = i0 >> k, (i1 - 1) >> k
+        complete = len(self) >> k
+        arrays = self._level_arrays(k, first, min(last + 1, complete))
+        if last >= complete:
+            tail = self._reduce(max(first, complete) << k, i1)
+            arrays = {name: np.concatenate([arrays[name], tail[name]]) for name in _FIELDS}
+        return self._slice(k, arrays)
+
+    def _empty_level(self) -> Dict[str, _Buffer]:
+        channels = self._values.array.shape[1:]
+        dtypes = {
+            "start": self._timestamps.array.dtype,
+            "end": self._timestamps.array.dtype,
+            "min": self._values.array.dtype,
+            "max": self._values.array.dtype,
+            "sum": np.dtype(np.float64),
+            "count": np.dtype(np.int64),
+        }
+        return {
+            name: _Buffer(() if name in ("start", "end") else channels, dtypes[name])
+            for name in _FIELDS
+        }
+
+    def _level_arrays(self, k: int, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        """Returns the aggregates of the buckets [lo, hi) of level k."""
+        if k >= self._first_level:
+            level = self._levels[k - self._first_level]
+            return {name: buffer.array[lo:hi] for name, buffer in level.items()}
+        if k:
+            return self._reduce_blocks(k, lo, hi)
+        values = self._values.array[lo:hi]
+        missing = np.isnan(values)
+        timestamps = self._timestamps.array[lo:hi]
+        return {
+            "start": timestamps,
+            "end": timestamps,
+            "min": values,
+            "max": values,
+            "sum": np.where(missing, 0.0, values),
+            "count": (~missing).astype(np.int64),
+        }
+
+    def _reduce_blocks(self, k: int, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        """Reduces the buckets [lo, hi) of level k from the rows."""
+        size = 1 << k
+        timestamps = self._timestamps.array[lo * size: hi * size]
+        values = self._values.array[lo * size: hi * size]
+        blocks = values.reshape(hi - lo, size, values.shape[1])
+        missing = np.isnan(blocks)
+        return {
+            "start": timestamps[::size],
+            "end": timestamps[size - 1:: size],
+            "min": np.fmin.reduce(blocks, axis=1),
+            "max": np.fmax.reduce(blocks, axis=1),
+            "sum": np.where(missing, 0.0, blocks).sum(axis=1),
+            "count": (~missing).sum(axis=1, dtype=np.int64),
+        }
+
+    @staticmethod
+    def _combine_pairs(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Combines the aggregates of consecutive pairs of buckets."""
+        return {
+            "start": arrays["start"][0::2],
+            "end": arrays["end"][1::2],
+            "min": np.fmin(arrays["min"][0::2], arrays["min"][1::2]),
+            "max": np.fmax(arrays["max"][0::2], arrays["max"][1::2]),
+            "sum": arrays["sum"][0::2] + arrays["sum"][1::2],
+            "count": arrays["count"][0::2] + arrays["count"][1::2],
+        }
+
+    def _reduce(self, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        """Returns the aggregates of the rows [lo, hi) as one bucket."""
+        arrays = self._level_arrays(0, lo, hi)
+        return {
+            "start": arrays["start"][:1],
+            "end": arrays["end"][-1:],
+            "min": np.fmin.reduce(arrays["min"], axis=0, keepdims=True),
+            "max": np.fmax.reduce(arrays["max"], axis=0, keepdims=True),
+            "sum": arrays["sum"].sum(axis=0, keepdims=True),
+            "count": arrays["count"].sum(axis=0, keepdims=True),
+        }
+
+    def _slice(self, k: int, arrays: Dict[str, np.ndarray]) -> PyramidSlice:
+        count = arrays["count"]
+        mean = np.divide(
+            arrays["sum"], count, out=np.full(count.shape, np.nan), where=count > 0
+        )
+        values = {"min": arrays["min"], "max": arrays["max"], "mean": mean}
+        if self._squeeze:
+            values = {name: array[:, 0] for name, array in values.items()}
+        return PyramidSlice(k, arrays["start"], arrays["end"], **values)
@@ -33,6 +33,14 @@ setup(
     long_description=long_description,
     packages=find_packages(),
     install_requires=required,
+    extras_require={
+        "async": ["aiohttp"],
+        "brotli": ["brotli"],
+        "arrow": ["pyarrow"],
+        "orjson": ["orjson"],
+        "polars": ["polars", "pyarrow"],
+        "simdjson": ["pysimdjson"],
+    },
     keywords=['python'],
     python_requires='>=3.7',
     classifiers=[
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import sys
+import threading
+import unittest
+
+import numpy as np
+import pytest
+
+if sys.version_info < (3, 8):
+    pytest.skip("IsolatedAsyncioTestCase requires Python 3.8", allow_module_level=True)
+pytest.importorskip("aiohttp")
+
+from aiohttp import web  # noqa: E402
+
+from gimodules.cloudconnect.async_cloud_request import AsyncCloudRequest  # noqa: E402
+from gimodules.cloudconnect.cloud_request import (  # noqa: E402
+    CloudRequest,
+    GIStream,
+    GIStreamVariable,
+)
+from gimodules.cloudconnect.retry import RetryPolicy  # noqa: E402
+
+ANALYTICS_RESPONSE = {"data": {"analytics": {"ts": [1000, 2000], "a1": {"avg": [1.0, 2.0]}}}}
+
+
+class TestAsyncCloudRequest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.status_codes = []
+        self.bodies = []
+        self.requests = 0
+
+        async def handle_gql(request):
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.02)
+            self.in_flight -= 1
+            status = self.status_codes.pop(0) if self.status_codes else 200
+            if self.bodies:
+                return web.Response(body=self.bodies.pop(0), status=status)
+            return web.json_response(ANALYTICS_RESPONSE, status=status)
+
+        app = web.Application()
+        app.router.add_post("/__api__/gql", handle_gql)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        self.client = CloudRequest(retry_policy=RetryPolicy(backoff_factor=0.0))
+        self.client.url = f"http://127.0.0.1:{port}"
+        self.client.login_token = {"access_token": "token"}
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+        self.client.close()
+
+    async def test_concurrency_is_bounded(self):
+        # Arrange
+        async with AsyncCloudRequest(self.client, max_concurrency=3) as agi:
+            # Act
+            results = await asyncio.gather(
+                *(agi.get_data_np("sid", ["a1"], "0", "3000", "SECOND") for _ in range(10))
+            )
+
+        # Assert
+        self.assertLessEqual(self.max_in_flight, 3)
+        for data in results:
+            np.testing.assert_array_equal(data, [[1000.0, 1.0], [2000.0, 2.0]])
+
+    async def test_get_var_data_returns_dataframe(self):
+        # Arrange
+        async with AsyncCloudRequest(self.client) as agi:
+            # Act
+            df = await agi.get_var_data(
+                "sid",
+                ["a1"],
+                "2024-01-01 00:00:00",
+                "2024-01-01 01:00:00",
+                resolution="SECOND",
+                custom_column_names=["Time", "Temp"],
+            )
+
+        # Assert
+        self.assertEqual(list(df.columns), ["Time", "Temp"])
+        self.assertEqual(str(df["Time"].dt.tz), "UTC")
+        self.assertEqual(json.loads(df["Temp"].to_json(orient="values")), [1.0, 2.0])
+
+    async def test_transient_failures_are_retried(self):
+        # Arrange
+        self.status_codes = [503, 502]
+
+        async with AsyncCloudRequest(self.client) as agi:
+            # Act
+            data = await agi.get_data_np("sid", ["a1"], "0", "3000", "SECOND")
+
+        # Assert
+        np.testing.assert_array_equal(data, [[1000.0, 1.0], [2000.0, 2.0]])
+        self.assertEqual(self.status_codes, [])
+
+    async def test_failed_request_returns_none(self):
+        # Arrange
+        self.status_codes = [400]
+
+        async with AsyncCloudRequest(self.client) as agi:
+            # Act
+            data = await agi.get_data_np("sid", ["a1"], "0", "3000", "SECOND")
+
+        # Assert
+        self.assertIsNone(data)
+
+    async def test_only_json_bodies_are_checked_for_errors(self):
+        # Arrange
+        self.bodies = [
+            b'{"errors": [{"message": "unknown column"}], "data": null}',
+            b"Time;Stream errors\n2024-01-01 00:00:00;1.5\n",
+        ]
+        variables = [GIStreamVariable("v1", "errors", "a1", "", "Float", "sid")]
+        self.client.stream_variables = {"Stream__errors": variables[0]}
+
+        async with AsyncCloudRequest(self.client) as agi:
+            # Act
+            data = await agi.get_data_np("sid", ["a1"], "0", "3000", "SECOND")
+            df = await agi.get_data_as_csv(
+                variables,
+                "SECOND",
+                "2024-01-01 00:00:00",
+                "2024-01-01 01:00:00",
+                write_file=False,
+            )
+
+        # Assert
+        self.assertIsNone(data)
+        self.assertEqual(list(df.columns), ["Time", "Stream errors"])
+        self.assertEqual(self.requests, 2)
+
+    async def test_lazy_metadata_is_loaded_off_the_event_loop(self):
+        # Arrange
+        threads = []
+
+        def load_var_metadata(sids):
+            threads.append(threading.current_thread())
+            self.client._stream_variables["Stream__Temp"] = GIStreamVariable(
+                "v1", "Temp", "a1", "C", "Float", sids[0]
+            )
+            return True
+
+        self.client.lazy_metadata = True
+        self.client.streams = {"sid": GIStream("Stream", "sid", 1, 0, 0, 0)}
+        self.client.stream_variables = {}
+        self.client._variable_sids = set()
+        self.client._load_var_metadata = load_var_metadata
+
+        async with AsyncCloudRequest(self.client) as agi:
+            # Act
+            df = await agi.get_var_data(
+                "sid", ["a1"], "2024-01-01 00:00:00", "2024-01-01 01:00:00", "SECOND"
+            )
+
+        # Assert
+        self.assertEqual(list(df.columns), ["Time", "Temp"])
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    async def test_lazy_metadata_of_exports_is_loaded_off_the_event_loop(self):
+        # Arrange
+        threads = []
+        read_export_csv = self.client._read_export_csv
+
+        def load_var_metadata(sids):
+            threads.append(threading.current_thread())
+            self.client._stream_variables[f"Stream {sids[0]}__Temp"] = variables[sids[0]]
+            return True
+
+        def read_csv(*args):
+            threads.append(threading.current_thread())
+            return read_export_csv(*args)
+
+        variables = {
+            sid: GIStreamVariable(f"v-{sid}", "Temp", "a1", "C", "Float", sid)
+            for sid in ("s1", "s2")
+        }
+        body = b"datetime;time;Temp;Temp\n;;Stream s1;Stream s2\n;;avg;avg\n;;C;C\nx;1;1.5;2.5\n"
+        self.bodies = [body, body]
+        self.client.lazy_metadata = True
+        self.client.streams = {sid: GIStream(f"Stream {sid}", sid, 1, 0, 0, 0) for sid in variables}
+        self.client.stream_variables = {}
+        self.client._variable_sids = set()
+        self.client._load_var_metadata = load_var_metadata
+        self.client._read_export_csv = read_csv
+
+        async with AsyncCloudRequest(self.client) as agi:
+            # Act
+            data = await agi.get_data_as_csv(
+                list(variables.values()),
+                "HOUR",
+                "2024-01-01 00:00:00",
+                "2024-01-03 00:00:00",
+                write_file=False,
+                batch="daily",
+                output="numpy",
+            )
+
+        # Assert
+        np.testing.assert_array_equal(data.values[:, 1], [2.5, 2.5])
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(threading.main_thread(), threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from gimodules.cloudconnect.chunk_cache import ChunkCache, ChunkKey
+
+
+class TestChunkCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.key = ChunkKey("https://tenant.gi-cloud.io", "sid", "SECOND")
+
+    def test_columns_are_added_to_stored_buckets(self):
+        # Arrange
+        cache = ChunkCache(self.directory.name)
+        timestamps = np.arange(0, 60_000, 1000, dtype=np.int64)
+
+        # Act
+        cache.put(self.key, 60_000, 0, timestamps, {"a1.avg": timestamps / 1000})
+        cache.put(self.key, 60_000, 0, timestamps, {"a2.max": -timestamps / 1000})
+        stored = cache.get(self.key, 60_000, 0, ["a2.max", "a1.avg"])
+        partial = cache.get(self.key, 60_000, 0, ["a1.avg", "a3.avg"])
+        other = cache.get(self.key, 60_000, 1, ["a1.avg"])
+
+        # Assert
+        np.testing.assert_array_equal(stored[0], timestamps)
+        np.testing.assert_array_equal(stored[1][0], -timestamps / 1000)
+        np.testing.assert_array_equal(stored[1][1], timestamps / 1000)
+        self.assertIsNone(partial)
+        self.assertIsNone(other)
+        self.assertEqual(cache.nbytes, 3 * (128 + 60 * 8))
+
+    def test_least_recently_used_buckets_are_evicted(self):
+        # Arrange
+        cache = ChunkCache(self.directory.name, max_bytes=2 * 2 * (128 + 1000 * 8))
+        timestamps = np.arange(1000, dtype=np.int64)
+        for bucket in range(2):
+            cache.put(self.key, 1000, bucket, timestamps + bucket * 1000, {"a1.avg": timestamps})
+        # Bucket 0 was used last
+        path = os.path.join(cache._bucket_path(self.key, 1000, 1), "ts.npy")
+        os.utime(path, (0, 0))
+
+        # Act
+        cache.put(self.key, 1000, 2, timestamps + 2000, {"a1.avg": timestamps})
+
+        # Assert
+        self.assertIsNotNone(cache.get(self.key, 1000, 0, ["a1.avg"]))
+        self.assertIsNone(cache.get(self.key, 1000, 1, ["a1.avg"]))
+        self.assertIsNotNone(cache.get(self.key, 1000, 2, ["a1.avg"]))
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+        cache.clear()
+        self.assertEqual(cache.nbytes, 0)
+
+    def test_bucket_length_and_open_buckets(self):
+        # Arrange
+        cache = ChunkCache(self.directory.name, open_margin=60)
+
+        # Act
+        lengths = [
+            cache.bucket_ms(1, 1000),
+            cache.bucket_ms(1000, 1),
+            cache.bucket_ms(0, 1000),
+            cache.bucket_ms(1 / 86_400, 86_400_000),
+        ]
+
+        # Assert
+        self.assertEqual(lengths, [86_400_000, 60_000, 3_600_000, 604_800_000])
+        self.assertTrue(cache.is_closed(60_000, 10, last_ts=720_000))
+        self.assertFalse(cache.is_closed(60_000, 10, last_ts=719_999))
+
+
+if __name__ == "__main__":
+    unittest.main()
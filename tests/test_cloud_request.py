@@ -0,0 +1,967 @@
+import gzip
+import io
+import json
+import re
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+import requests
+import urllib3
+
+from gimodules.cloudconnect.chunk_cache import ChunkCache
+from gimodules.cloudconnect.cloud_request import (
+    CloudRequest,
+    GIStream,
+    GIStreamVariable,
+    apply_nan_policy,
+    select_resolution,
+)
+from gimodules.cloudconnect.decoder import DataArrays
+from gimodules.cloudconnect.query_plan import QueryLimits
+from gimodules.cloudconnect.result_cache import ResultCache
+from gimodules.cloudconnect.retry import RetryPolicy
+from gimodules.cloudconnect.session import SessionConfig, create_session
+from gimodules.cloudconnect.time_range import TimeRange
+
+
+def make_response(status_code=200, json_data=None, headers=None, body=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = "OK" if status_code == 200 else "Error"
+    response.headers.update(headers or {})
+    response.raw = io.BytesIO(body if body is not None else json.dumps(json_data).encode())
+    return response
+
+
+def time_range_of(payload):
+    """Returns the (from, to) timestamps inlined into the query of a request payload."""
+    start, end = re.search(r"from:(\d+),to:(\d+)", payload["query"]).groups()
+    return int(start), int(end)
+
+
+def make_gzip_response(body):
+    compressed = gzip.compress(body)
+    response = requests.Response()
+    response.status_code = 200
+    response.headers.update({"Content-Encoding": "gzip"})
+    response.raw = urllib3.HTTPResponse(
+        body=io.BytesIO(compressed),
+        headers={"Content-Encoding": "gzip"},
+        preload_content=False,
+    )
+    return response, len(compressed)
+
+
+class TestCloudRequestSession(unittest.TestCase):
+    def test_create_session_mounts_pool_adapter(self):
+        # Arrange
+        config = SessionConfig(pool_maxsize=3, keep_alive=False)
+
+        # Act
+        session = create_session(config)
+
+        # Assert
+        adapter = session.get_adapter("https://demo.gi-cloud.io")
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(session.headers["Connection"], "close")
+
+    def test_injected_session_is_used_with_timeouts(self):
+        # Arrange
+        session = Mock()
+        session.request.return_value = make_response(
+            json_data={"data": {"analytics": {"ts": [1000, 2000], "a1": {"avg": [1.0, 2.0]}}}}
+        )
+        config = SessionConfig(connect_timeout=1.5, read_timeout=7.0)
+        client = CloudRequest(session=session, session_config=config)
+        client.url = "https://demo.gi-cloud.io"
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        data = client.get_data_np("sid", ["a1"], "0", "3000", resolution="SECOND")
+
+        # Assert
+        method, url = session.request.call_args[0]
+        self.assertEqual((method, url), ("POST", "https://demo.gi-cloud.io/__api__/gql"))
+        self.assertEqual(session.request.call_args[1]["timeout"], (1.5, 7.0))
+        self.assertEqual(session.request.call_args[1]["json"]["variables"]["sid"], "sid")
+        np.testing.assert_array_equal(data, [[1000.0, 1.0], [2000.0, 2.0]])
+
+    def test_request_retries_once_with_refreshed_token(self):
+        # Arrange
+        session = Mock()
+        session.request.side_effect = [
+            make_response(status_code=401, json_data={}),
+            make_response(json_data={"AccessToken": "new", "RefreshToken": "refresh2"}),
+            make_response(json_data={"Data": []}),
+        ]
+        client = CloudRequest(session=session)
+        client.url = "https://demo.gi-cloud.io"
+        client.login_token = {"access_token": "old", "refresh_token": "refresh"}
+
+        # Act
+        streams = client.get_all_stream_metadata()
+
+        # Assert
+        self.assertEqual(streams, {})
+        calls = session.request.call_args_list
+        self.assertEqual(calls[0][1]["headers"]["Authorization"], "Bearer old")
+        self.assertEqual(calls[1][0][1], "https://demo.gi-cloud.io/rpc/AdminAPI.RefreshToken")
+        self.assertEqual(calls[2][1]["headers"]["Authorization"], "Bearer new")
+        self.assertEqual(client.login_token, {"access_token": "new", "refresh_token": "refresh2"})
+
+    @patch("gimodules.cloudconnect.cloud_request.time.sleep")
+    def test_request_retries_transient_failures_honouring_retry_after(self, sleep):
+        # Arrange
+        session = Mock()
+        session.request.side_effect = [
+            requests.ConnectionError("connection reset"),
+            make_response(status_code=429, json_data={}, headers={"Retry-After": "3"}),
+            make_response(json_data={"Data": []}),
+        ]
+        client = CloudRequest(session=session, retry_policy=RetryPolicy(jitter=False))
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        streams = client.get_all_stream_metadata()
+
+        # Assert
+        self.assertEqual(streams, {})
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [0.5, 3.0])
+
+    @patch("gimodules.cloudconnect.cloud_request.time.sleep")
+    def test_state_changing_requests_are_not_retried(self, sleep):
+        # Arrange
+        session = Mock()
+        session.request.return_value = make_response(status_code=503, json_data={})
+        client = CloudRequest(session=session, retry_policy=RetryPolicy(jitter=False))
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        written = client.write_value_on_channel(["vid"], ["0"])
+        forced = client._request("POST", "https://demo.gi-cloud.io", retry=True)
+
+        # Assert
+        self.assertIsNone(written)
+        self.assertEqual(forced.status_code, 503)
+        self.assertEqual(session.request.call_count, 1 + RetryPolicy().max_attempts)
+        self.assertEqual(sleep.call_count, RetryPolicy().max_attempts - 1)
+
+    @patch("gimodules.cloudconnect.retry.time.monotonic")
+    def test_batched_export_fails_as_a_whole_when_the_deadline_runs_out(self, monotonic):
+        # Arrange
+        clock = [0.0]
+        monotonic.side_effect = lambda: clock[0]
+
+        def respond(method, url, **kwargs):
+            clock[0] += 2.0
+            return make_response(body=b"datetime;time;Temp\n;;Stream\n;;avg\n;;C\nx;1;1.5\n")
+
+        session = Mock()
+        session.request.side_effect = respond
+        client = CloudRequest(session=session, retry_policy=RetryPolicy(deadline=1.0))
+        client.login_token = {"access_token": "token"}
+        variable = GIStreamVariable("vid", "Temp", "a1", "C", "Float", "sid")
+        client.stream_variables = {"Stream__Temp": variable}
+
+        # Act
+        df = client.get_data_as_csv(
+            [variable],
+            "HOUR",
+            "2024-01-01 00:00:00",
+            "2024-01-04 23:59:59",
+            write_file=False,
+            batch="daily",
+        )
+
+        # Assert
+        self.assertIsNone(df)
+        session.request.assert_called_once()
+
+    @patch("gimodules.cloudconnect.cloud_request.time.sleep")
+    def test_request_stops_retrying_at_deadline(self, sleep):
+        # Arrange
+        session = Mock()
+        session.request.return_value = make_response(
+            status_code=503, json_data={}, headers={"Retry-After": "120"}
+        )
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        res = client._request("GET", "https://demo.gi-cloud.io", deadline=60)
+
+        # Assert
+        self.assertEqual(res.status_code, 503)
+        session.request.assert_called_once()
+        sleep.assert_not_called()
+
+    def test_compressed_data_response_is_decoded_and_counted(self):
+        # Arrange
+        body = json.dumps({"data": {"Raw": {"data": [[1000, 0, 1.5], [2000, 0, 2.5]] * 500}}})
+        response, compressed_size = make_gzip_response(body.encode())
+        session = Mock()
+        session.request.return_value = response
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        data = client.get_data_np("sid", ["a1"], "0", "3000")
+
+        # Assert
+        self.assertEqual(data.shape, (1000, 3))
+        self.assertIn("gzip", session.request.call_args[1]["headers"]["Accept-Encoding"])
+        self.assertEqual(client.last_transfer.content_encoding, "gzip")
+        self.assertEqual(client.last_transfer.wire_bytes, compressed_size)
+        self.assertEqual(client.last_transfer.decoded_bytes, len(body))
+        self.assertGreater(client.transfer_stats.compression_ratio, 10)
+
+    def test_raw_data_error_is_logged_and_returns_none(self):
+        # Arrange
+        session = Mock()
+        session.request.return_value = make_response(
+            json_data={"errors": [{"message": "unknown sid"}], "data": None}
+        )
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        with self.assertLogs(level="ERROR") as logs:
+            data = client.get_data_np("sid", ["a1"], "0", "3000")
+
+        # Assert
+        self.assertIsNone(data)
+        self.assertIn("unknown sid", logs.output[0])
+
+    def test_streams_are_fetched_in_one_aliased_query(self):
+        # Arrange
+        session = Mock()
+        session.request.return_value = make_response(
+            json_data={
+                "data": {
+                    "s0": {"data": [[1000, 0, 1.0, 2.0], [2000, 0, 3.0, 4.0]]},
+                    "s1": {"data": [[1000, 500, 5.0]]},
+                }
+            }
+        )
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        first, second = client.get_streams_data_np(
+            [("sid1", ["a1", "a2"]), ("sid2", ["a1"])], 0, 3000
+        )
+
+        # Assert
+        session.request.assert_called_once()
+        variables = session.request.call_args[1]["json"]["variables"]
+        self.assertEqual((variables["sid0"], variables["sid1"]), ("sid1", "sid2"))
+        np.testing.assert_array_equal(first, [[1000, 0, 1.0, 2.0], [2000, 0, 3.0, 4.0]])
+        np.testing.assert_array_equal(second, [[1000, 500, 5.0]])
+
+    def test_streams_support_aggregations_and_target_points(self):
+        # Arrange
+        def respond(method, url, **kwargs):
+            query = kwargs["json"]["query"]
+            resolution = re.search(r"resolution:(\w+)", query)
+            resolutions.append(resolution.group(1) if resolution else "nanos")
+            if resolution is None:
+                aliases = re.findall(r"(s\d+):Raw", query)
+                series = {"data": [[1000, 0, 1.0]]}
+            else:
+                aliases = re.findall(r"(s\d+):analytics", query)
+                aggregations = re.search(r"a1\{([\w ]+)\}", query).group(1).split()
+                series = {"ts": [1000, 2000], "a1": {}}
+                for k, aggregation in enumerate(aggregations):
+                    series["a1"][aggregation] = [k + 1.0, k + 2.0]
+            return make_response(json_data={"data": {alias: series for alias in aliases}})
+
+        resolutions = []
+        session = Mock()
+        session.request.side_effect = respond
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+        client.streams = {
+            "fast": GIStream("Fast", "fast", 1000, 0, 0, 0),
+            "slow": GIStream("Slow", "slow", 1, 0, 0, 0),
+            "slow2": GIStream("Slow 2", "slow2", 1, 0, 0, 0),
+        }
+        client.stream_variables = {
+            f"{sid}__Temp": GIStreamVariable(f"v-{sid}", "Temp", "a1", "C", "Float", sid)
+            for sid in client.streams
+        }
+        selections = [("fast", ["a1"]), ("slow", ["a1"]), ("slow2", ["a1"])]
+
+        # Act
+        # The fast stream is aggregated to fit the budget, the slow streams are raw
+        matrices = client.get_streams_data_np(selections, 0, 3_600_000, target_points=5000)
+        arrays = client.get_streams_data_np(
+            selections, 0, 3_600_000, aggregations=["min", "max"], target_points=100
+        )
+        frames = client.get_streams_var_data(
+            selections, 0, 3_600_000, "MINUTE", aggregations=["min", "max"]
+        )
+
+        # Assert
+        self.assertEqual(resolutions, ["SECOND", "nanos", "MINUTE", "MINUTE"])
+        np.testing.assert_array_equal(matrices[0], [[1000, 1.0], [2000, 2.0]])
+        np.testing.assert_array_equal(matrices[2], [[1000, 0, 1.0]])
+        self.assertEqual(arrays[0].values.shape, (2, 1, 2))
+        np.testing.assert_array_equal(arrays[2].values[:, 0, 1], [2.0, 3.0])
+        self.assertEqual(
+            list(frames[1].columns), [("Time", ""), ("Temp", "min"), ("Temp", "max")]
+        )
+
+    def test_selections_are_packed_within_limits(self):
+        # Arrange
+        selections = [("a", ["a1", "a2"]), ("b", ["a1"]), ("c", ["a1"] * 5), ("d", ["a1"])]
+
+        # Act
+        batches = CloudRequest._pack_selections(selections, max_streams=2, max_columns=4)
+
+        # Assert
+        self.assertEqual(batches, [[0, 1], [2], [3]])
+
+    def test_batched_fetch_reassembles_time_slices_without_duplicates(self):
+        # Arrange
+        def respond(method, url, **kwargs):
+            start, end = time_range_of(kwargs["json"])
+            # Each slice repeats the last second of the previous one
+            first = max(start - 1000, 1704067200000)
+            ts = list(range(first, end + 1, 1000))
+            return make_response(
+                json_data={"data": {"analytics": {"ts": ts, "a1": {"avg": [t / 1000 for t in ts]}}}}
+            )
+
+        session = Mock()
+        session.request.side_effect = respond
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        df = client.get_var_data_batched(
+            "sid",
+            ["a1"],
+            "2024-01-01 00:00:00",
+            "2024-01-01 01:00:00",
+            resolution="SECOND",
+            custom_column_names=["Time", "Temp"],
+            max_points=1000,
+            max_workers=3,
+        )
+
+        # Assert
+        self.assertEqual(session.request.call_count, 4)
+        windows = sorted(time_range_of(c[1]["json"]) for c in session.request.call_args_list)
+        for (_, end), (start, _) in zip(windows, windows[1:]):
+            self.assertEqual(start, end + 1)
+            self.assertEqual(start % 1000, 0)
+        self.assertEqual(len(df), 3601)
+        self.assertTrue(df["Time"].is_monotonic_increasing)
+        self.assertTrue(df["Time"].is_unique)
+
+    def test_batched_fetch_follows_the_query_plan(self):
+        # Arrange
+        def respond(method, url, **kwargs):
+            start, end = time_range_of(kwargs["json"])
+            indices = re.findall(r"(a\d+)\{avg\}", kwargs["json"]["query"])
+            ts = list(range(start, end + 1, 1000))
+            columns = {index: {"avg": [int(index[1:])] * len(ts)} for index in indices}
+            return make_response(json_data={"data": {"analytics": {"ts": ts, **columns}}})
+
+        session = Mock()
+        session.request.side_effect = respond
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+        # Data from 00:30 on
+        client.streams = {"sid": GIStream("Stream", "sid", "10", 1704069000000, 0, 0)}
+        index_list = ["a1", "a2", "a3"]
+        limits = QueryLimits(max_points=1500, max_columns=2)
+
+        # Act
+        plan = client.plan_query(
+            "sid", index_list, "2024-01-01 00:00:00", "2024-01-01 01:00:00", "SECOND",
+            limits=limits,
+        )
+        data = client.get_var_data_batched(
+            "sid", index_list, "2024-01-01 00:00:00", "2024-01-01 01:00:00", "SECOND",
+            output="numpy", limits=limits,
+        )
+
+        # Assert
+        self.assertEqual(plan.column_groups, [["a1", "a2"], ["a3"]])
+        self.assertEqual(len(plan.windows), 3)
+        # The windows are balanced over the half hour with data
+        self.assertEqual(plan.windows[1][0], 1704069600000)
+        self.assertEqual(session.request.call_count, plan.requests)
+        self.assertEqual(data.values.shape, (3601, 3))
+        np.testing.assert_array_equal(data.values[-1], [1, 2, 3])
+        self.assertTrue(np.all(np.diff(data.timestamps[:, 0]) == 1000))
+
+    def test_cached_buckets_are_not_fetched_again(self):
+        # Arrange
+        requested = []
+
+        def respond(method, url, **kwargs):
+            start, end = time_range_of(kwargs["json"])
+            requested.append((start, end))
+            indices = re.findall(r"(a\d+)\{avg\}", kwargs["json"]["query"])
+            ts = list(range(start, end + 1, 1000))
+            # Seconds of the day, exact as float32
+            columns = {index: {"avg": [t % 86_400_000 / 1000 for t in ts]} for index in indices}
+            return make_response(json_data={"data": {"analytics": {"ts": ts, **columns}}})
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        session = Mock()
+        session.request.side_effect = respond
+        client = CloudRequest(session=session, cache=ChunkCache(directory.name))
+        client.login_token = {"access_token": "token"}
+        # Data until 2024-01-03 02:00, daily buckets at SECOND resolution
+        client.streams = {"sid": GIStream("Stream", "sid", "1", 0, 1704247200000, 0)}
+        day, tss, tse = 86_400_000, 1704070800000, 1704074400000
+
+        # Act
+        first = client.get_data_np("sid", ["a1"], tss, tse, "SECOND")
+        again = client.get_data_np("sid", ["a1"], tss, tse, "SECOND")
+        cached_requests = list(requested)
+        wider = client.get_data_np("sid", ["a1"], tss - 7_200_000, tse, "SECOND", dtype="float32")
+        wider_requests = requested[len(cached_requests):]
+        client.streams["sid"].last_ts = tss
+        client.get_data_np("sid", ["a1"], tss, tse, "SECOND")
+
+        # Assert
+        self.assertEqual(cached_requests, [(1704067200000, 1704067200000 + day - 1)])
+        np.testing.assert_array_equal(again, first)
+        self.assertEqual(first.shape, (3601, 2))
+        self.assertEqual(first[0, 0], 1704070800000)
+        # Only the missing day is fetched
+        self.assertEqual(wider_requests, [(1704067200000 - day, 1704067200000 - 1)])
+        self.assertEqual(wider.values.shape, (10801, 1))
+        np.testing.assert_array_equal(wider.values[:, 0], wider.timestamps[:, 0] % day / 1000)
+        # Buckets close to the last timestamp are open and fetched again
+        self.assertEqual(len(requested), 3)
+
+    def test_identical_requests_are_answered_from_the_result_cache(self):
+        # Arrange
+        session = Mock()
+        session.request.side_effect = lambda *args, **kwargs: make_response(
+            json_data={"data": {"analytics": {"ts": [1000, 2000], "a1": {"avg": [1.0, 2.0]}}}}
+        )
+        client = CloudRequest(session=session, result_cache=ResultCache())
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        first = client.get_data_np("sid", ["a1"], 1000, "2000", "SECOND")
+        second = client.get_data_np("sid", ["a1"], "1000", 2000, "SECOND")
+        frames = [
+            client.get_var_data("sid", ["a1"], 1000, 2000, "SECOND", custom_column_names=names)
+            for names in (["T", "A"], ["Time", "B"])
+        ]
+
+        # Assert
+        np.testing.assert_array_equal(second, first)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.flags.writeable)
+        self.assertEqual(list(frames[0]["A"]), [1.0, 2.0])
+        self.assertEqual(list(frames[1]["B"]), [1.0, 2.0])
+        # The DataFrame is built from float64 DataArrays, another result than the matrix
+        self.assertEqual(session.request.call_count, 2)
+        stats = client.result_cache.stats
+        self.assertEqual((stats.hits, stats.misses), (2, 2))
+
+    @patch("gimodules.cloudconnect.result_cache.time.monotonic")
+    def test_recent_windows_are_cached_only_for_open_ttl(self, monotonic):
+        # Arrange
+        monotonic.return_value = 100.0
+        session = Mock()
+        session.request.side_effect = lambda *args, **kwargs: make_response(
+            json_data={"data": {"analytics": {"ts": [1000, 2000], "a1": {"avg": [1.0, 2.0]}}}}
+        )
+        client = CloudRequest(session=session, result_cache=ResultCache(open_ttl=5))
+        client.login_token = {"access_token": "token"}
+        now = int(time.time() * 1000)
+
+        # Act
+        client.get_data_np("sid", ["a1"], now - 60000, now, "SECOND")
+        client.get_data_np("sid", ["a1"], now - 60000, now, "SECOND")
+        monotonic.return_value = 106.0
+        client.get_data_np("sid", ["a1"], now - 60000, now, "SECOND")
+        client.get_data_np("sid", ["a1"], 1000, 2000, "SECOND")
+        monotonic.return_value = 1000.0
+        client.get_data_np("sid", ["a1"], 1000, 2000, "SECOND")
+
+        # Assert
+        # The open window is fetched again after open_ttl, the closed one is kept
+        self.assertEqual(session.request.call_count, 3)
+
+    def test_time_slices_are_deduplicated_by_ts_and_nanos(self):
+        # Arrange
+        slices = [
+            np.array([[1000, 100, 1.0], [1000, 200, 2.0]]),
+            np.array([[1000, 200, 2.0], [1000, 300, 3.0], [1001, 0, 4.0]]),
+            np.empty((0, 3)),
+            np.array([[1001, 0, 4.0], [1002, 0, 5.0]]),
+        ]
+
+        # Act
+        data = CloudRequest._concat_time_slices(slices, n_time_columns=2)
+
+        # Assert
+        np.testing.assert_array_equal(data[:, 2], [1.0, 2.0, 3.0, 4.0, 5.0])
+
+    def test_nan_policies(self):
+        # Arrange
+        nan = np.nan
+        data = np.array(
+            [[0, nan, 1], [1, 2, nan], [2, 3, 4], [3, nan, 5], [4, 6, 7], [5, nan, 8]]
+        )
+
+        # Act
+        trimmed = apply_nan_policy(data, "trim_edges")
+        dropped = apply_nan_policy(data, "drop_any")
+        kept = apply_nan_policy(data, "keep")
+        filled = apply_nan_policy(data.copy(), "fill")
+
+        # Assert
+        np.testing.assert_array_equal(trimmed[:, 0], [2, 3, 4])
+        self.assertTrue(np.shares_memory(trimmed, data))
+        np.testing.assert_array_equal(dropped[:, 0], [2, 4])
+        self.assertIs(kept, data)
+        np.testing.assert_array_equal(filled[:, 1], [2, 3, 3, 6, 6])
+        np.testing.assert_array_equal(filled[:, 2], [1, 4, 5, 7, 8])
+        self.assertEqual(apply_nan_policy(np.full((3, 2), nan)).shape, (0, 2))
+
+    def test_data_keeps_inner_nan_rows_by_default(self):
+        # Arrange
+        session = Mock()
+        session.request.return_value = make_response(
+            json_data={"data": {"Raw": {"data": [
+                [1000, 0, None], [2000, 0, 1.0], [3000, 0, None], [4000, 0, 2.0]
+            ]}}}
+        )
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        data = client.get_data_np("sid", ["a1"], "0", "5000")
+        invalid = client.get_data_np("sid", ["a1"], "0", "5000", nan_policy="drop_some")
+
+        # Assert
+        np.testing.assert_array_equal(data[:, 0], [2000, 3000, 4000])
+        self.assertIsNone(invalid)
+        session.request.assert_called_once()
+
+    def test_compact_dtype_keeps_exact_ns_timestamps(self):
+        # Arrange
+        rows = [
+            [1704067200000, 250, 1.5, 7.0],
+            [1704067200001, 0, None, 8.0],
+            [1704067200002, 0, 2.5, 9.0],
+        ]
+        session = Mock()
+        session.request.side_effect = lambda *args, **kwargs: make_response(
+            json_data={"data": {"Raw": {"data": rows}}}
+        )
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+        client.stream_variables = {
+            "S__A": GIStreamVariable("v1", "A", "a1", "V", "Int16", "sid"),
+            "S__B": GIStreamVariable("v2", "B", "a2", "V", "Float", "sid"),
+        }
+
+        # Act
+        data = client.get_data_np("sid", ["a1", "a2"], "0", "5000", dtype="native")
+        df = client.get_var_data(
+            "sid", ["a1", "a2"], "1970-01-01 00:00:00", "1970-01-01 00:00:05",
+            custom_column_names=["Time", "A", "B"], dtype="float32",
+        )
+        invalid = client.get_data_np("sid", ["a1"], "0", "5000", dtype="int16")
+
+        # Assert
+        self.assertIsInstance(data, DataArrays)
+        np.testing.assert_array_equal(
+            data.timestamps[:, 0], [ts * 1_000_000 + nanos for ts, nanos, *_ in rows]
+        )
+        self.assertEqual(data.time_unit, "ns")
+        self.assertEqual(data.values.dtype, np.float32)
+        self.assertEqual(list(df.columns), ["Time", "A", "B"])
+        self.assertEqual(list(df.dtypes[["A", "B"]]), [np.float32, np.float32])
+        self.assertEqual(str(df["Time"].iloc[0]), "2024-01-01 00:00:00.000000250+00:00")
+        self.assertIsNone(invalid)
+
+    def test_time_slices_of_data_arrays_are_concatenated(self):
+        # Arrange
+        slices = [
+            DataArrays(np.array([[1000], [2000]]), np.array([[1.0], [2.0]], dtype=np.float32)),
+            DataArrays(np.array([[2000], [3000]]), np.array([[2.0], [3.0]], dtype=np.float32)),
+        ]
+
+        # Act
+        data = CloudRequest._concat_time_slices(slices, n_time_columns=1)
+
+        # Assert
+        np.testing.assert_array_equal(data.timestamps[:, 0], [1000, 2000, 3000])
+        self.assertEqual(data.timestamps.dtype, np.int64)
+        self.assertEqual(data.values.dtype, np.float32)
+
+    def test_aggregations_are_fetched_in_one_query(self):
+        # Arrange
+        analytics = {
+            "ts": [1000, 2000],
+            "a1": {"min": [0.0, 1.0], "max": [2.0, 3.0]},
+            "a2": {"min": [4.0, 5.0], "max": [6.0, 7.0]},
+        }
+        session = Mock()
+        session.request.side_effect = lambda *args, **kwargs: make_response(
+            json_data={"data": {"analytics": analytics}}
+        )
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        data = client.get_data_np(
+            "sid", ["a1", "a2"], "0", "3000", "SECOND", aggregations=["min", "max"]
+        )
+        df = client.get_var_data(
+            "sid", ["a1", "a2"], "1970-01-01 00:00:00", "1970-01-01 00:00:03", "SECOND",
+            custom_column_names=["Time", "A", "B"], aggregations=["min", "max"],
+        )
+        invalid = client.get_data_np("sid", ["a1"], "0", "3000", aggregations=["max"])
+
+        # Assert
+        self.assertEqual(session.request.call_count, 2)
+        document = session.request.call_args[1]["json"]["query"]
+        self.assertIn("a1{min max}", document)
+        self.assertEqual(data.values.shape, (2, 2, 2))
+        np.testing.assert_array_equal(data.values[:, 1, 0], [4.0, 5.0])
+        np.testing.assert_array_equal(data.values[1], [[1.0, 3.0], [5.0, 7.0]])
+        self.assertEqual(df.columns.names, ["variable", "aggregation"])
+        np.testing.assert_array_equal(df[("B", "max")], [6.0, 7.0])
+        self.assertEqual(df[("Time", "")].iloc[1].second, 2)
+        self.assertIsNone(invalid)
+
+    def test_resolution_is_selected_for_point_budget(self):
+        # Act / Assert
+        self.assertEqual(select_resolution(10, 2000, sample_rate_hz=100), "nanos")
+        self.assertEqual(select_resolution(60, 2000, sample_rate_hz=100), "HZ10")
+        self.assertEqual(select_resolution(86400, 2000, sample_rate_hz=100), "MINUTE")
+        self.assertEqual(select_resolution(10, 2000), "HZ100")
+        self.assertEqual(select_resolution(10, 2000, 100, raw=False), "HZ100")
+        self.assertEqual(select_resolution(10, 2000, 100, finest="SECOND"), "SECOND")
+        self.assertEqual(select_resolution(1e12, 2000, 100), "MONTH")
+        with self.assertRaises(ValueError):
+            select_resolution(10, 0)
+
+    def test_target_points_select_the_query_resolution(self):
+        # Arrange
+        session = Mock()
+        session.request.side_effect = lambda *args, **kwargs: make_response(
+            json_data={"data": {"analytics": {"ts": [0, 60000], "a1": {"avg": [1.0, 2.0]}}}}
+        )
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+        client.streams = {"sid": GIStream("Stream", "sid", "100", 0, 0, 0)}
+
+        # Act
+        df = client.get_var_data(
+            "sid", ["a1"], "2024-01-01 00:00:00", "2024-01-02 00:00:00",
+            custom_column_names=["Time", "Temp"], target_points=2000,
+        )
+
+        # Assert
+        self.assertIn("resolution:MINUTE", session.request.call_args[1]["json"]["query"])
+        self.assertEqual(len(df), 2)
+
+    def test_time_range_keeps_sub_second_bounds(self):
+        # Arrange
+        session = Mock()
+        session.request.side_effect = lambda *args, **kwargs: make_response(
+            json_data={"data": {"analytics": {"ts": [0, 1000], "a1": {"avg": [1.0, 2.0]}}}}
+        )
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+        time_range = TimeRange.parse(
+            "2024-01-01 00:00:00.250", np.datetime64("2024-01-01T00:00:10.5")
+        )
+
+        # Act
+        df = client.get_var_data(
+            "sid", ["a1"], time_range, resolution="SECOND", custom_column_names=["Time", "Temp"]
+        )
+        invalid = client.get_var_data("sid", ["a1"], "2024-01-02", "2024-01-01")
+
+        # Assert
+        self.assertEqual(
+            time_range_of(session.request.call_args[1]["json"]), (1704067200250, 1704067210500)
+        )
+        self.assertEqual(len(df), 2)
+        self.assertIsNone(invalid)
+        self.assertEqual(session.request.call_count, 1)
+
+    def test_batched_export_is_split_at_midnight(self):
+        # Act
+        intervals = CloudRequest._generate_date_intervals(
+            "2024-01-15 10:30:00", "2024-03-01 00:00:00", "monthly"
+        )
+
+        # Assert
+        self.assertEqual(
+            intervals,
+            [
+                ("2024-01-15 10:30:00", "2024-02-01 00:00:00"),
+                ("2024-02-01 00:00:00", "2024-03-01 00:00:00"),
+            ],
+        )
+
+    def test_dataframe_wraps_decoded_matrix_without_copy(self):
+        # Arrange
+        client = CloudRequest()
+        data = np.array([[1704067200000.0, 1.0], [1704067201000.0, 2.0]])
+
+        # Act
+        df = client._build_dataframe(data, "sid", ["a1"], ["Time", "Temp"], "Europe/Vienna")
+        indexed = client._build_dataframe(data, "sid", ["a1"], ["Time", "Temp"], None, True)
+
+        # Assert
+        self.assertEqual(str(df["Time"].dt.tz), "Europe/Vienna")
+        self.assertEqual(df["Time"].iloc[0].isoformat(), "2024-01-01T01:00:00+01:00")
+        self.assertTrue(np.shares_memory(df["Temp"].to_numpy(), data))
+        self.assertIsNone(indexed.index.tz)
+        self.assertEqual(indexed.index.name, "Time")
+        self.assertEqual(str(indexed.index[1]), "2024-01-01 00:00:01")
+
+    def test_csv_export_is_parsed_from_stream(self):
+        # Arrange
+        csv_body = b"datetime;time;Temp\n2024-01-01T00:00:00;1704067200;1.5\n" * 50
+        response, _ = make_gzip_response(csv_body)
+        session = Mock()
+        session.request.return_value = response
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+        variable = GIStreamVariable("vid", "Temp", "a1", "C", "float", "sid")
+
+        # Act
+        df = client.get_data_as_csv(
+            [variable], "SECOND", "2024-01-01 00:00:00", "2024-01-02 00:00:00", write_file=False
+        )
+
+        # Assert
+        self.assertEqual(list(df.columns), ["datetime", "time", "Temp"])
+        self.assertEqual(len(df), 99)
+        self.assertEqual(client.last_transfer.decoded_bytes, len(csv_body))
+
+    def test_csv_export_error_document_returns_none(self):
+        # Arrange
+        session = Mock()
+        session.request.return_value = make_response(
+            json_data={"errors": [{"message": "invalid resolution"}]}
+        )
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+        variable = GIStreamVariable("vid", "Temp", "a1", "C", "float", "sid")
+
+        # Act
+        df = client.get_data_as_csv(
+            [variable], "FOO", "2024-01-01 00:00:00", "2024-01-02 00:00:00", write_file=False
+        )
+
+        # Assert
+        self.assertIsNone(df)
+
+    def test_close_closes_session(self):
+        # Arrange
+        session = Mock()
+
+        # Act
+        with CloudRequest(session=session):
+            pass
+
+        # Assert
+        session.close.assert_called_once()
+
+
+class TestMetadataSnapshotLogin(unittest.TestCase):
+    def test_login_uses_the_metadata_snapshot_while_the_streams_are_unchanged(self):
+        # Arrange
+        streams = [
+            {
+                "Name": "Stream",
+                "Id": "sid",
+                "SampleRateHz": 100,
+                "AbsoluteStart": 0,
+                "LastTimeStamp": 1000,
+                "Index": 0,
+            }
+        ]
+        variables = {
+            "Success": True,
+            "Data": [
+                {
+                    "Name": "Stream",
+                    "Id": "sid",
+                    "Variables": [
+                        {
+                            "Name": "A",
+                            "GQLId": "a1",
+                            "Id": "vid",
+                            "Unit": "V",
+                            "DataFormat": "Float",
+                        }
+                    ],
+                }
+            ],
+        }
+
+        def respond(method, url, **kwargs):
+            if method == "GET":
+                return make_response(json_data={"Data": streams})
+            return make_response(json_data=variables)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = f"{directory.name}/metadata.json"
+        session = Mock()
+        session.request.side_effect = respond
+        url = "https://tenant.gi-cloud.io"
+
+        def login(**kwargs):
+            session.request.reset_mock()
+            client = CloudRequest(session=session)
+            client.login(url=url, access_token="token", metadata_snapshot=path, **kwargs)
+            return client, [call[0][0] for call in session.request.call_args_list]
+
+        # Act
+        cold, cold_requests = login()
+        streams[0]["LastTimeStamp"] = 2000
+        warm, warm_requests = login()
+        offline, offline_requests = login(check_snapshot=False)
+        streams.append(dict(streams[0], Id="sid2", Name="Stream 2"))
+        stale, stale_requests = login()
+
+        # Assert
+        self.assertEqual(cold_requests, ["GET", "POST"])
+        self.assertEqual(warm_requests, ["GET"])
+        self.assertEqual(warm.streams["sid"].last_ts, 2000)
+        self.assertEqual(warm.stream_variables, cold.stream_variables)
+        self.assertEqual(warm.units.V.value, "V")
+        self.assertEqual(offline_requests, [])
+        self.assertEqual(offline.streams["sid"].last_ts, 1000)
+        # The stream list fetched by the check is reused
+        self.assertEqual(stale_requests, ["GET", "POST"])
+        self.assertEqual(len(stale.streams), 2)
+
+
+class TestLazyMetadata(unittest.TestCase):
+    def test_lazy_login_loads_metadata_of_used_streams_only(self):
+        # Arrange
+        def respond(method, url, **kwargs):
+            if method == "GET":
+                streams = [
+                    {
+                        "Name": f"Stream {sid}",
+                        "Id": sid,
+                        "SampleRateHz": 1,
+                        "AbsoluteStart": 0,
+                        "LastTimeStamp": 0,
+                        "Index": 0,
+                    }
+                    for sid in ("s1", "s2")
+                ]
+                return make_response(json_data={"Data": streams})
+            if "json" in kwargs and "Sources" in kwargs["json"]:
+                sources = [
+                    {
+                        "Name": f"Stream {sid}",
+                        "Id": sid,
+                        "Variables": [{"Name": f"Var {sid}", "GQLId": "a1", "Id": f"v{sid}"}],
+                    }
+                    for sid in kwargs["json"]["Sources"]
+                ]
+                return make_response(json_data={"Success": True, "Data": sources})
+            data = {"ts": [1000], "a1": {"avg": [1.0]}}
+            return make_response(json_data={"data": {"analytics": data}})
+
+        session = Mock()
+        session.request.side_effect = respond
+        client = CloudRequest(session=session)
+
+        # Act
+        client.login(url="https://tenant.gi-cloud.io", access_token="token", lazy_metadata=True)
+        login_requests = session.request.call_count
+        df = client.get_var_data("s2", ["a1"], 1000, 1000, "SECOND")
+        variables = client.get_all_vars_of_stream("s2")
+        first_requests = [call[1].get("json") for call in session.request.call_args_list]
+        all_variables = client.stream_variables
+
+        # Assert
+        self.assertEqual(login_requests, 0)
+        self.assertEqual(list(df.columns), ["Time", "Var s2"])
+        self.assertEqual([var.id for var in variables], ["vs2"])
+        # The data query is the first request, then only the variables of s2 are loaded
+        self.assertIn("analytics", first_requests[0]["query"])
+        self.assertEqual(first_requests[1:], [{"AddVarMapping": True, "Sources": ["s2"]}])
+        self.assertEqual(sorted(all_variables), ["Stream s1__Var s1", "Stream s2__Var s2"])
+        self.assertEqual(session.request.call_count, 4)
+
+    def test_lazy_metadata_is_loaded_again_after_a_failure(self):
+        # Arrange
+        source = {
+            "Name": "Stream s1",
+            "Id": "s1",
+            "Variables": [{"Name": "Var", "GQLId": "a1", "Id": "v1"}],
+        }
+        session = Mock()
+        session.request.side_effect = [
+            make_response(json_data={"Success": False, "Message": "unavailable"}),
+            make_response(json_data={"Success": True, "Data": [source]}),
+        ]
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+        client.lazy_metadata = True
+
+        # Act
+        failed = client.get_all_vars_of_stream("s1")
+        loaded = client.get_all_vars_of_stream("s1")
+        cached = client.get_all_vars_of_stream("s1")
+
+        # Assert
+        self.assertEqual(failed, [])
+        self.assertEqual([var.id for var in loaded], ["v1"])
+        self.assertEqual(cached, loaded)
+        self.assertEqual(session.request.call_count, 2)
+
+
+class TestVariableHelpers(unittest.TestCase):
+    def test_variable_helpers_use_the_catalog(self):
+        # Arrange
+        client = CloudRequest(session=Mock())
+        client.stream_variables = {
+            "Stream__Temp": GIStreamVariable("v1", "Temp", "a1", "C", "Float", "sid"),
+            "Stream__Temp 2": GIStreamVariable("v2", "Temp 2", "a2", "C", "Float", "sid"),
+            "Other__Temp": GIStreamVariable("v3", "Temp", "a1", "V", "Int16", "sid2"),
+        }
+
+        # Act
+        found = client.find_var(["Temp 2", "Other"])
+        celsius = client.filter_var_attr("unit", "C")
+        exact = client.get_gistreamvariables("Stream", ["Temp", "Missing"])
+        query, _ = client._build_export_csv_query(
+            list(client.stream_variables.values()), "HOUR", 0, 3_600_000
+        )
+
+        # Assert
+        self.assertEqual(list(found), ["Stream__Temp 2", "Other__Temp"])
+        self.assertEqual([var.id for var in celsius], ["v1", "v2"])
+        self.assertEqual([var.id for var in exact], ["v1"])
+        self.assertEqual(client.get_all_vars_of_stream("sid2")[0].id, "v3")
+        # The stream names of the export header come from the (sid, id) index
+        self.assertIn('headers:["Temp 2","Stream","avg","C"]', query.document)
+        self.assertIn('headers:["Temp","Other","avg","V"]', query.document)
+
+
+if __name__ == "__main__":
+    unittest.main()
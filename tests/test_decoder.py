@@ -0,0 +1,140 @@
+import json
+import unittest
+
+import numpy as np
+
+from gimodules.cloudconnect.decoder import (
+    GraphQLError,
+    RawMatrixDecoder,
+    decode_raw_matrices,
+    decode_raw_matrix,
+)
+
+
+def make_raw_body(rows):
+    return json.dumps({"data": {"Raw": {"data": rows}}}).encode()
+
+
+def split(body, size):
+    return [body[i: i + size] for i in range(0, len(body), size)]
+
+
+class TestRawMatrixDecoder(unittest.TestCase):
+    def test_decodes_rows_across_chunk_boundaries(self):
+        # Arrange
+        rows = [[1000 + i, i, i * 0.5, None if i % 3 == 0 else -1.25e-3] for i in range(200)]
+        body = make_raw_body(rows)
+
+        for size in (1, 5, 64, len(body)):
+            # Act
+            data = decode_raw_matrix(split(body, size))
+
+            # Assert
+            np.testing.assert_array_equal(data, np.array(rows, dtype=float))
+
+    def test_array_grows_beyond_preallocation(self):
+        # Arrange
+        rows = [[i, 0, float(i)] for i in range(100)]
+        decoder = RawMatrixDecoder(n_columns=3, expected_rows=10)
+
+        # Act
+        for chunk in split(make_raw_body(rows), 16):
+            decoder.feed(chunk)
+        data = decoder.close()
+
+        # Assert
+        self.assertEqual(data.shape, (100, 3))
+        self.assertEqual(data[-1, 2], 99.0)
+
+    def test_rows_parsed_with_json_loads(self):
+        # Arrange
+        rows = [[1000 + i, 0, None if i % 2 else 0.5] for i in range(50)]
+
+        # Act
+        data = decode_raw_matrix(split(make_raw_body(rows), 33), loads=json.loads)
+
+        # Assert
+        np.testing.assert_array_equal(data, np.array(rows, dtype=float))
+
+    def test_decodes_aliased_matrices(self):
+        # Arrange
+        first = [[i, 0, float(i)] for i in range(40)]
+        second = [[i, 1, None, 2.0] for i in range(30)]
+        body = json.dumps(
+            {"data": {"s0": {"data": first}, "s1": {"data": []}, "s2": {"data": second}}}
+        ).encode()
+
+        # Act
+        matrices = decode_raw_matrices(split(body, 11), {"s0": 3, "s1": 3, "s2": 4})
+
+        # Assert
+        np.testing.assert_array_equal(matrices["s0"], np.array(first, dtype=float))
+        self.assertEqual(matrices["s1"].shape, (0, 3))
+        np.testing.assert_array_equal(matrices["s2"], np.array(second, dtype=float))
+
+    def test_empty_matrix(self):
+        # Act
+        data = decode_raw_matrix([make_raw_body([])], n_columns=4)
+
+        # Assert
+        self.assertEqual(data.shape, (0, 4))
+
+    def test_value_dtype_splits_exact_timestamps_from_values(self):
+        # Arrange
+        rows = [[1704067200000 + i, i * 1000, i * 0.5, None] for i in range(50)]
+        decoder = RawMatrixDecoder(
+            n_columns=4, expected_rows=8, value_dtype="float32", time_columns=2
+        )
+
+        # Act
+        for chunk in split(make_raw_body(rows), 9):
+            decoder.feed(chunk)
+        data = decoder.close()
+
+        # Assert
+        self.assertEqual(data.timestamps.dtype, np.int64)
+        self.assertEqual(data.values.dtype, np.float32)
+        self.assertEqual(len(data), 50)
+        np.testing.assert_array_equal(data.timestamps, [row[:2] for row in rows])
+        np.testing.assert_array_equal(data.values[:, 0], np.arange(50, dtype=np.float32) / 2)
+        self.assertTrue(np.isnan(data.values[:, 1]).all())
+
+    def test_ts_and_nanos_are_fused_to_exact_ns(self):
+        # Arrange
+        rows = [[1704067200123, 999_999, 1.0], [1704067200124, 1, 2.0]]
+
+        # Act
+        data = decode_raw_matrix(
+            split(make_raw_body(rows), 5), value_dtype=float, time_columns=2, fuse_nanos=True
+        )
+
+        # Assert
+        self.assertEqual(data.timestamps.shape, (2, 1))
+        self.assertEqual(data.timestamps[0, 0], 1704067200123999999)
+        self.assertEqual(str(data.times[1]), "2024-01-01T00:00:00.124000001")
+        np.testing.assert_array_equal(data.values[:, 0], [1.0, 2.0])
+
+    def test_errors_are_raised(self):
+        # Arrange
+        bodies = [
+            b'{"errors": [{"message": "unknown sid"}], "data": null}',
+            b'{"data": {"Raw": {"data": [[1, 2]]}}, "errors": [{"message": "partial"}]}',
+        ]
+
+        for body, message in zip(bodies, ["unknown sid", "partial"]):
+            # Act / Assert
+            with self.assertRaisesRegex(GraphQLError, message):
+                decode_raw_matrix(split(body, 7))
+
+    def test_truncated_or_malformed_matrix_raises(self):
+        # Arrange
+        bodies = [b'{"data": {"Raw": {"data": [[1, 2], [3', b'{"data": {"Raw": {"data": [[1, "x"]]}}}']
+
+        for body in bodies:
+            # Act / Assert
+            with self.assertRaises(ValueError):
+                decode_raw_matrix([body])
+
+
+if __name__ == "__main__":
+    unittest.main()
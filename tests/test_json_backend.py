@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import Mock
+
+from gimodules.cloudconnect.cloud_request import CloudRequest
+from gimodules.cloudconnect.json_backend import (
+    STDLIB,
+    JSONBackend,
+    available_backends,
+    get_json_backend,
+)
+
+
+class TestJSONBackend(unittest.TestCase):
+    def test_auto_selects_fastest_installed_backend(self):
+        # Act
+        backend = get_json_backend()
+
+        # Assert
+        self.assertEqual(backend.name, available_backends()[0])
+        self.assertEqual(backend.loads(b'{"a": [1, null]}'), {"a": [1, None]})
+
+    def test_named_backend_and_unknown_name(self):
+        # Act / Assert
+        self.assertIs(get_json_backend("json"), STDLIB)
+        with self.assertRaises(ValueError):
+            get_json_backend("yaml")
+
+    def test_client_uses_selected_backend(self):
+        # Arrange
+        loads = Mock(return_value={"Data": []})
+        session = Mock()
+        session.request.return_value = Mock(status_code=200, content=b'{"Data": []}')
+        client = CloudRequest(session=session, json_backend=JSONBackend("custom", loads))
+        client.login_token = {"access_token": "token"}
+
+        # Act
+        streams = client.get_all_stream_metadata()
+
+        # Assert
+        self.assertEqual(streams, {})
+        loads.assert_called_once_with(b'{"Data": []}')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from gimodules.cloudconnect.metadata_snapshot import (
+    MetadataSnapshot,
+    load_snapshot,
+    save_snapshot,
+    stream_fingerprint,
+)
+
+
+class TestMetadataSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "meta", "tenant.json")
+        self.snapshot = MetadataSnapshot(
+            url="https://tenant.gi-cloud.io",
+            fingerprint=stream_fingerprint([("sid", "Stream", "100", 0)]),
+            streams=[["Stream", "sid", "100", 0, 1000, 0]],
+            variables=[["Stream__A", "vid", "A", "a1", "V", "Float", "sid"]],
+            created=1000.0,
+        )
+
+    @patch("gimodules.cloudconnect.metadata_snapshot.time.time", return_value=4600.0)
+    def test_snapshot_is_loaded_for_its_tenant_within_the_ttl(self, _):
+        # Arrange
+        save_snapshot(self.path, self.snapshot)
+
+        # Act
+        loaded = load_snapshot(self.path, "https://tenant.gi-cloud.io", ttl=3600)
+        other_tenant = load_snapshot(self.path, "https://other.gi-cloud.io", ttl=3600)
+        expired = load_snapshot(self.path, "https://tenant.gi-cloud.io", ttl=3599)
+
+        # Assert
+        self.assertEqual(loaded, self.snapshot)
+        self.assertIsNone(other_tenant)
+        self.assertIsNone(expired)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["tenant.json"])
+
+    def test_unreadable_or_outdated_snapshots_are_ignored(self):
+        # Arrange
+        save_snapshot(self.path, self.snapshot)
+        with open(self.path) as file:
+            content = json.load(file)
+        content["version"] = 0
+        old_path = os.path.join(self.directory.name, "old.json")
+        with open(old_path, "w") as file:
+            json.dump(content, file)
+        broken_path = os.path.join(self.directory.name, "broken.json")
+        with open(broken_path, "w") as file:
+            file.write('{"url": ')
+
+        # Act / Assert
+        self.assertIsNone(load_snapshot(old_path))
+        self.assertIsNone(load_snapshot(broken_path))
+        self.assertIsNone(load_snapshot(os.path.join(self.directory.name, "missing.json")))
+        self.assertEqual(
+            stream_fingerprint([("b", 2), ("a", 1)]), stream_fingerprint([("a", 1), ("b", 2)])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import io
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+import requests
+
+from gimodules.cloudconnect import output
+from gimodules.cloudconnect.cloud_request import CloudRequest, GIStream, GIStreamVariable
+from gimodules.cloudconnect.output import (
+    FieldInfo,
+    OutputFormat,
+    arrow_table,
+    get_output_format,
+    read_csv_table,
+)
+
+CSV_EXPORT = (
+    b"datetime;time;Temp\n"
+    b";;Stream\n"
+    b";;avg\n"
+    b";[s since 01.01.1970];C\n"
+    b"2024-01-01T00:00:00;1704067200;1,5\n"
+    b"2024-01-01T00:00:01;1704067201;2\n"
+)
+
+
+def make_response(body):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(body)
+    return response
+
+
+@unittest.skipIf(output.pa is None, "pyarrow is not installed")
+class TestArrowOutput(unittest.TestCase):
+    def test_table_wraps_columns_with_metadata(self):
+        # Arrange
+        times = np.array([1704067200000000250, 1704067200001000000]).view("datetime64[ns]")
+        values = np.asfortranarray([[1.0, 2.0], [3.0, np.nan]])
+        fields = [FieldInfo("Temp", "a1", "Stream", "C", "avg"), FieldInfo("Pressure", "a2")]
+
+        # Act
+        table = arrow_table(times, values, "Time", fields, "Europe/Vienna")
+
+        # Assert
+        self.assertEqual(table.column_names, ["Time", "Temp", "Pressure"])
+        self.assertEqual(str(table.schema.field("Time").type), "timestamp[ns, tz=Europe/Vienna]")
+        self.assertEqual(table.column("Time").cast("int64")[0].as_py(), 1704067200000000250)
+        self.assertEqual(table.schema.field("Temp").metadata[b"unit"], b"C")
+        self.assertEqual(table.schema.field("Temp").metadata[b"stream"], b"Stream")
+        np.testing.assert_array_equal(table.column("Temp").to_numpy(), [1.0, 3.0])
+
+    def test_csv_export_is_parsed_with_typed_columns(self):
+        # Act
+        table = read_csv_table(
+            io.BytesIO(CSV_EXPORT),
+            [FieldInfo("Temp", unit="C")],
+            decimal_sep=",",
+            float_columns=["time"],
+        )
+
+        # Assert
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(str(table.schema.field("time").type), "double")
+        self.assertEqual(table.column("Temp").to_pylist(), [1.5, 2.0])
+        self.assertEqual(table.schema.field("Temp").metadata[b"unit"], b"C")
+
+    def test_csv_columns_are_typed_by_position(self):
+        # Arrange
+        body = (
+            b"datetime;time;Temp;Temp\n"
+            b";;Stream A;Stream B\n"
+            b";;avg;avg\n"
+            b";[s since 01.01.1970];C;K\n"
+            b"2024-01-01T00:00:00;1704067200;1;\n"
+            b"2024-01-01T00:00:01;1704067201;2;2,5\n"
+        )
+        fields = [
+            FieldInfo("Temp", "a1", "Stream A", "C"),
+            FieldInfo("Temp", "a1", "Stream B", "K"),
+        ]
+
+        # Act
+        table = read_csv_table(io.BytesIO(body), fields, decimal_sep=",", float_columns=["time"])
+
+        # Assert
+        self.assertEqual(table.column_names, ["datetime", "time", "Temp", "Temp"])
+        self.assertEqual([str(field.type) for field in table.schema][1:], ["double"] * 3)
+        self.assertEqual(table.column(2).to_pylist(), [1.0, 2.0])
+        self.assertEqual(table.column(3).to_pylist(), [None, 2.5])
+        self.assertEqual(table.schema.field(3).metadata[b"stream"], b"Stream B")
+
+    def test_float_matrix_is_converted_to_the_output_format(self):
+        # Arrange
+        client = CloudRequest()
+        client.stream_variables = {
+            "Stream__Temp": GIStreamVariable("vid", "Temp", "a1", "C", "Float", "sid")
+        }
+        client.streams = {"sid": GIStream("Stream", "sid", "1000", 0, 0, 0)}
+        matrix = np.array([[1704067200000.0, 5.0, 1.5], [1704067200001.0, 0.0, 2.5]])
+
+        # Act
+        table = client._build_output(matrix, "sid", ["a1"], "nanos", OutputFormat.ARROW)
+        data = client._build_output(matrix, "sid", ["a1"], "nanos", OutputFormat.NUMPY)
+
+        # Assert
+        self.assertEqual(table.column_names, ["Time", "Temp"])
+        self.assertEqual(table.column("Time").cast("int64")[0].as_py(), 1704067200000000005)
+        self.assertEqual(table.column("Temp").to_pylist(), [1.5, 2.5])
+        np.testing.assert_array_equal(data.values[:, 0], [1.5, 2.5])
+        self.assertEqual(data.time_unit, "ns")
+
+    def test_client_returns_arrow_tables(self):
+        # Arrange
+        raw = {"data": {"Raw": {"data": [[1704067200000, 5, 1.5], [1704067200001, 0, 2.5]]}}}
+        session = Mock()
+        session.request.side_effect = [
+            make_response(json.dumps(raw).encode()),
+            make_response(CSV_EXPORT),
+        ]
+        client = CloudRequest(session=session)
+        client.login_token = {"access_token": "token"}
+        variable = GIStreamVariable("vid", "Temp", "a1", "C", "Float", "sid")
+        client.stream_variables = {"Stream__Temp": variable}
+        client.streams = {"sid": GIStream("Stream", "sid", "1000", 0, 0, 0)}
+
+        # Act
+        table = client.get_var_data(
+            "sid", ["a1"], "2024-01-01 00:00:00", "2024-01-01 00:00:01", output="arrow"
+        )
+        csv_table = client.get_data_as_csv(
+            [variable],
+            "SECOND",
+            "2024-01-01 00:00:00",
+            "2024-01-01 00:00:01",
+            write_file=False,
+            decimal_sep=",",
+            output="arrow",
+        )
+
+        # Assert
+        self.assertEqual(table.column_names, ["Time", "Temp"])
+        self.assertEqual(table.column("Time").cast("int64")[0].as_py(), 1704067200000000005)
+        self.assertEqual(table.schema.field("Temp").metadata[b"stream"], b"Stream")
+        self.assertEqual(table.schema.field("Temp").metadata[b"aggregation"], b"")
+        self.assertEqual(csv_table.column("Temp").to_pylist(), [1.5, 2.0])
+        self.assertEqual(csv_table.schema.field("Temp").metadata[b"aggregation"], b"avg")
+
+
+class TestOutputFormat(unittest.TestCase):
+    def test_unknown_or_missing_output(self):
+        # Act / Assert
+        with self.assertRaises(ValueError):
+            get_output_format("excel")
+        with patch.object(output, "pa", None):
+            with self.assertRaises(ImportError):
+                get_output_format("arrow")
+
+    def test_numpy_output_of_csv_export(self):
+        # Arrange
+        client = CloudRequest()
+        variable = GIStreamVariable("vid", "Temp", "a1", "C", "Float", "sid")
+
+        # Act
+        data = client._read_export_csv(
+            io.BytesIO(CSV_EXPORT), [variable], "avg", ";", ",", get_output_format("numpy")
+        )
+
+        # Assert
+        np.testing.assert_array_equal(data.timestamps[:, 0], [1704067200000, 1704067201000])
+        np.testing.assert_array_equal(data.values[:, 0], [1.5, 2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from gimodules.cloudconnect.decoder import DataArrays
+from gimodules.domain.pyramid import MinMaxPyramid
+
+
+def reduce_buckets(values, edges):
+    """Brute force min, max and mean of the rows between consecutive edges."""
+    parts = [values[lo:hi] for lo, hi in zip(edges, edges[1:])]
+    return tuple(
+        np.array([func(part, axis=0) for part in parts])
+        for func in (np.nanmin, np.nanmax, np.nanmean)
+    )
+
+
+class TestMinMaxPyramid(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.timestamps = np.arange(10_001, dtype=np.int64) * 10
+        self.values = rng.normal(size=(10_001, 2))
+        self.values[rng.random(10_001) < 0.05, 1] = np.nan
+
+    def test_viewport_is_answered_from_the_matching_level(self):
+        # Arrange
+        pyramid = MinMaxPyramid(self.timestamps, self.values)
+
+        # Act
+        result = pyramid.query(1_005, 99_995, n_pixels=500)
+
+        # Assert
+        self.assertEqual(result.level, 5)
+        self.assertLessEqual(len(result), 501)
+        self.assertEqual(result.start[0], 960)
+        self.assertEqual(result.end[-1], 99_990)
+        # 312 complete buckets of 32 rows, the rows after them are one partial bucket
+        edges = list(range(96, 9_985, 32)) + [10_000]
+        expected = reduce_buckets(self.values, edges)
+        np.testing.assert_allclose(result.min, expected[0])
+        np.testing.assert_allclose(result.max, expected[1])
+        np.testing.assert_allclose(result.mean, expected[2])
+
+    def test_appended_chunks_extend_the_levels(self):
+        # Arrange
+        pyramid = MinMaxPyramid(self.timestamps[:3_333], self.values[:3_333, 0])
+
+        # Act
+        pyramid.append(self.timestamps[3_333:7_000], self.values[3_333:7_000, 0])
+        pyramid.append(self.timestamps[7_000:], self.values[7_000:, 0])
+        result = pyramid.query(n_pixels=100)
+
+        # Assert
+        built = MinMaxPyramid(self.timestamps, self.values[:, 0]).query(n_pixels=100)
+        self.assertEqual(pyramid.levels, 14)
+        self.assertEqual(result.min.shape, (79,))
+        np.testing.assert_array_equal(result.min, built.min)
+        np.testing.assert_array_equal(result.max, built.max)
+        np.testing.assert_array_equal(result.mean, built.mean)
+        with self.assertRaises(ValueError):
+            pyramid.append(self.timestamps[:1], self.values[:1, 0])
+
+    def test_small_viewport_returns_the_rows(self):
+        # Arrange
+        data = DataArrays(self.timestamps.reshape(-1, 1), np.asfortranarray(self.values))
+        pyramid = MinMaxPyramid.from_data(data)
+
+        # Act
+        result = pyramid.query(100, 150, n_pixels=10)
+        reduced = pyramid.query(100, 150, n_pixels=3)
+        empty = pyramid.query(200_000, 300_000)
+
+        # Assert
+        self.assertEqual(result.level, 0)
+        np.testing.assert_array_equal(result.start, [100, 110, 120, 130, 140, 150])
+        np.testing.assert_array_equal(result.max, self.values[10:16])
+        self.assertEqual(reduced.level, 1)
+        np.testing.assert_array_equal(reduced.end, [110, 130, 150])
+        pairs = np.fmax(self.values[10:16:2], self.values[11:16:2])
+        np.testing.assert_array_equal(reduced.max, pairs)
+        self.assertEqual(len(empty), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
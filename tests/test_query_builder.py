@@ -0,0 +1,74 @@
+import unittest
+
+from gimodules.cloudconnect import query_builder
+
+
+class TestQueryBuilder(unittest.TestCase):
+    def test_raw_queries_share_one_document_per_time_range(self):
+        # Act
+        first = query_builder.raw_query("sid1", ["ts", "nanos", "a1"], "1000", 2000)
+        second = query_builder.raw_query("sid2", ["ts", "nanos", "a2", "a3"], 1000, 2000.0)
+        other = query_builder.raw_query("sid1", ["ts", "nanos", "a1"], 3000, 4000)
+
+        # Assert
+        self.assertEqual(first.document, second.document)
+        self.assertNotIn("sid1", first.document)
+        self.assertEqual(
+            first.document,
+            "query($sid:String!,$columns:[String!]!)"
+            "{Raw(columns:$columns,sid:$sid,from:1000,to:2000){data}}",
+        )
+        self.assertIn("from:3000,to:4000", other.document)
+        self.assertEqual(
+            second.payload["variables"], {"sid": "sid2", "columns": ["ts", "nanos", "a2", "a3"]}
+        )
+
+    def test_analytics_document_is_cached_per_shape(self):
+        # Act
+        first = query_builder.analytics_query("sid1", ["a1", "a2"], 0, 1000, "SECOND")
+        second = query_builder.analytics_query("sid2", ["a1", "a2"], 5000, 9000, "SECOND")
+        other = query_builder.analytics_query("sid1", ["a1"], 0, 1000, "MINUTE")
+
+        # Assert
+        self.assertEqual(
+            first.document.replace("from:0,to:1000", "from:5000,to:9000"), second.document
+        )
+        self.assertEqual(second.variables, {"sid": "sid2"})
+        self.assertNotEqual(first.document, other.document)
+        self.assertIn("a1{avg} a2{avg}", first.document)
+        self.assertIn("resolution:SECOND", first.document)
+
+    def test_batch_query_aliases_one_field_per_stream(self):
+        # Act
+        query = query_builder.analytics_batch_query(
+            [("sid1", ["a1"]), ("sid2", ["a1", "a2"])], 0, 1000, "SECOND"
+        )
+
+        # Assert
+        self.assertIn("s0:analytics(", query.document)
+        self.assertIn("s1:analytics(", query.document)
+        self.assertEqual((query.variables["sid0"], query.variables["sid1"]), ("sid1", "sid2"))
+
+    def test_invalid_names_and_missing_timestamps_are_rejected(self):
+        # Act / Assert
+        with self.assertRaises(ValueError):
+            query_builder.analytics_query("sid", ['a1} evil{'], 0, 1000, "SECOND")
+        with self.assertRaises(ValueError):
+            query_builder.raw_query("sid", ["ts"], None, 1000)
+
+    def test_export_csv_columns_are_escaped(self):
+        # Arrange
+        columns = [{"field": "sid:a1.avg", "headers": ['Temp "inner"', "Stream"]}]
+
+        # Act
+        query = query_builder.export_csv_query(columns, "SECOND", 0, 1000, "UTC", "x.csv")
+
+        # Assert
+        self.assertIn('columns:[{field:"sid:a1.avg",headers:["Temp \\"inner\\"","Stream"]}]',
+                      query.document)
+        self.assertIn('from:0,to:1000,timezone:"UTC",filename:"x.csv"', query.document)
+        self.assertEqual(query.payload, {"query": query.document})
+
+
+if __name__ == "__main__":
+    unittest.main()
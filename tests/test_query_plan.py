@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from gimodules.cloudconnect.query_plan import (
+    QueryLimits,
+    active_periods,
+    balanced_windows,
+    plan_query,
+)
+
+
+class TestQueryPlan(unittest.TestCase):
+    def test_active_periods_are_clipped_and_merged(self):
+        # Arrange
+        periods = np.array([[500, 900], [0, 100], [50, 300], [2_000, 3_000]])
+
+        # Act
+        active = active_periods(0, 2_499, first_ts=20, periods=periods)
+
+        # Assert
+        np.testing.assert_array_equal(active, [[20, 300], [500, 900], [2_000, 2_499]])
+        self.assertEqual(active_periods(0, 99, first_ts=200).shape, (0, 2))
+
+    def test_windows_are_balanced_by_active_time(self):
+        # Arrange
+        active = np.array([[0, 999], [9_000, 9_999]])
+
+        # Act
+        windows = balanced_windows(0, 9_999, active, 4, step=100)
+
+        # Assert
+        self.assertEqual(windows, [(0, 499), (500, 8_999), (9_000, 9_499), (9_500, 9_999)])
+
+    def test_plan_has_the_fewest_requests_within_the_limits(self):
+        # Arrange
+        columns = [f"a{i}" for i in range(10)]
+        limits = QueryLimits(max_points=100_000, max_columns=4)
+
+        # Act
+        raw = plan_query(columns, 0, 99_999, 1_000.0, "nanos", time_columns=2, limits=limits)
+        coarse = plan_query(columns, 0, 99_999, 1.0, "SECOND", step=1000, limits=limits)
+        unknown = plan_query(columns, 0, 99_999, 0.0, "nanos")
+
+        # Assert
+        # 3 groups of 4 columns need 4 windows each, 5 groups of 2 need 2
+        self.assertEqual([len(group) for group in raw.column_groups], [2] * 5)
+        self.assertEqual(len(raw.windows), 2)
+        self.assertEqual(raw.requests, 10)
+        self.assertEqual(raw.rows, 99_999)
+        self.assertEqual(raw.windows[-1][1], 99_999)
+        self.assertEqual((coarse.requests, len(coarse.column_groups)), (3, 3))
+        self.assertEqual(unknown.requests, 1)
+        with self.assertRaises(ValueError):
+            plan_query([], 0, 1, 1.0, "nanos")
+
+
+if __name__ == "__main__":
+    unittest.main()
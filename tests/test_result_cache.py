@@ -0,0 +1,160 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from gimodules.cloudconnect.decoder import DataArrays
+from gimodules.cloudconnect.result_cache import ResultCache
+from gimodules.cloudconnect.retry import DeadlineExceeded
+
+
+class TestResultCache(unittest.TestCase):
+    def test_least_recently_used_results_are_evicted_by_bytes(self):
+        # Arrange
+        cache = ResultCache(max_bytes=2 * 800)
+        matrices = {key: np.full((50, 2), key, dtype=np.float64) for key in range(3)}
+        data = DataArrays(np.zeros((101, 1), dtype=np.int64), np.zeros((101, 1)))
+
+        # Act
+        for key in range(2):
+            cache.get_or_fetch(key, lambda key=key: matrices[key])
+        cache.get_or_fetch(0, Mock())
+        cache.get_or_fetch(2, lambda: matrices[2])
+        fetch_1 = Mock(return_value=matrices[1])
+        result_1 = cache.get_or_fetch(1, fetch_1)
+        too_large = cache.get_or_fetch("data", lambda: data)
+
+        # Assert
+        fetch_1.assert_called_once()
+        np.testing.assert_array_equal(result_1, matrices[1])
+        self.assertTrue(result_1.flags.writeable)
+        self.assertTrue(too_large.values.flags.writeable)
+        self.assertTrue(too_large.values.flags.f_contiguous)
+        stats = cache.stats
+        self.assertEqual((stats.hits, stats.misses, stats.evictions), (1, 5, 2))
+        self.assertEqual((stats.entries, stats.nbytes), (2, 1600))
+
+    def test_concurrent_identical_requests_share_one_fetch(self):
+        # Arrange
+        cache = ResultCache()
+        started, release = threading.Event(), threading.Event()
+        fetch = Mock(side_effect=lambda: (started.set(), release.wait(), np.arange(4))[-1])
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.get_or_fetch("k", fetch)))
+        followers = [
+            threading.Thread(target=lambda: results.append(cache.get_or_fetch("k", fetch)))
+            for _ in range(3)
+        ]
+
+        # Act
+        leader.start()
+        started.wait(5)
+        for follower in followers:
+            follower.start()
+        while cache.stats.shared < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        # Assert
+        fetch.assert_called_once()
+        self.assertEqual(len(results), 4)
+        for result in results:
+            np.testing.assert_array_equal(result, np.arange(4))
+        self.assertEqual(len({id(result) for result in results}), 4)
+        self.assertEqual((cache.stats.misses, cache.stats.shared), (1, 3))
+
+    def test_callers_get_their_own_copy(self):
+        # Arrange
+        cache = ResultCache()
+        fetch = Mock(return_value=np.zeros((2, 2)))
+
+        # Act
+        first = cache.get_or_fetch("k", fetch)
+        first[0, 0] = 1.0
+        second = cache.get_or_fetch("k", fetch)
+
+        # Assert
+        fetch.assert_called_once()
+        self.assertTrue(second.flags.writeable)
+        np.testing.assert_array_equal(second, np.zeros((2, 2)))
+
+    @patch("gimodules.cloudconnect.result_cache.time.monotonic")
+    def test_failures_are_not_cached_and_results_expire(self, monotonic):
+        # Arrange
+        monotonic.return_value = 100.0
+        cache = ResultCache(ttl=10)
+        failing = Mock(side_effect=ValueError("bad response"))
+        fetch = Mock(return_value=np.zeros(3))
+
+        # Act
+        with self.assertRaises(ValueError):
+            cache.get_or_fetch("k", failing)
+        none = cache.get_or_fetch("k", Mock(return_value=None))
+        cache.get_or_fetch("k", fetch)
+        cache.get_or_fetch("k", fetch)
+        monotonic.return_value = 110.0
+        cache.get_or_fetch("k", fetch)
+
+        # Assert
+        self.assertIsNone(none)
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual((cache.stats.hits, cache.stats.evictions), (1, 1))
+
+    @patch("gimodules.cloudconnect.result_cache.time.time", return_value=1704067200.0)
+    def test_windows_close_to_the_last_timestamp_are_open(self, _time):
+        # Arrange
+        cache = ResultCache(open_margin=3600)
+        now = 1704067200000
+
+        # Act / Assert
+        self.assertTrue(cache.is_open(now))
+        self.assertTrue(cache.is_open(now - 1800 * 1000))
+        self.assertFalse(cache.is_open(now - 7200 * 1000))
+        # The stream's last timestamp is the cutoff if it is before now
+        self.assertTrue(cache.is_open(now - 7200 * 1000, last_ts=now - 5400 * 1000))
+        self.assertFalse(cache.is_open(now - 7200 * 1000, last_ts=now + 7200 * 1000))
+
+    @patch("gimodules.cloudconnect.result_cache.time.monotonic")
+    def test_results_of_open_windows_expire_after_open_ttl(self, monotonic):
+        # Arrange
+        monotonic.return_value = 100.0
+        cache = ResultCache(ttl=3600, open_ttl=5)
+        fetch = Mock(return_value=np.zeros(3))
+
+        # Act
+        cache.get_or_fetch("open", fetch, ttl=cache.open_ttl)
+        cache.get_or_fetch("closed", fetch)
+        monotonic.return_value = 104.0
+        cache.get_or_fetch("open", fetch, ttl=cache.open_ttl)
+        monotonic.return_value = 106.0
+        cache.get_or_fetch("open", fetch, ttl=cache.open_ttl)
+        cache.get_or_fetch("closed", fetch)
+
+        # Assert
+        self.assertEqual(fetch.call_count, 3)
+        self.assertEqual(cache.stats.hits, 2)
+
+    def test_waiting_for_another_fetch_honours_the_timeout(self):
+        # Arrange
+        cache = ResultCache()
+        started, release = threading.Event(), threading.Event()
+        leader = threading.Thread(
+            target=cache.get_or_fetch,
+            args=("k", lambda: (started.set(), release.wait(), np.zeros(1))[-1]),
+        )
+        leader.start()
+        started.wait(5)
+
+        # Act / Assert
+        with self.assertRaises(DeadlineExceeded):
+            cache.get_or_fetch("k", Mock(), timeout=0.01)
+        release.set()
+        leader.join(5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+from email.utils import formatdate
+
+from gimodules.cloudconnect.retry import Deadline, DeadlineExceeded, RetryPolicy, parse_retry_after
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_backoff_is_exponential_and_capped(self):
+        policy = RetryPolicy(backoff_factor=1.0, max_backoff=5.0, jitter=False)
+
+        self.assertEqual([policy.get_backoff(n) for n in range(1, 6)], [1.0, 2.0, 4.0, 5.0, 5.0])
+
+    def test_jitter_stays_below_backoff(self):
+        policy = RetryPolicy(backoff_factor=1.0)
+
+        for _ in range(100):
+            self.assertTrue(0.0 <= policy.get_backoff(3) <= 4.0)
+
+    def test_retry_after_takes_precedence(self):
+        policy = RetryPolicy(jitter=False)
+
+        self.assertEqual(policy.get_delay(1, "7"), 7.0)
+        policy = RetryPolicy(respect_retry_after=False, jitter=False)
+        self.assertEqual(policy.get_delay(1, "7"), 0.5)
+
+    def test_parse_retry_after_http_date(self):
+        delay = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+
+        self.assertTrue(25 <= delay <= 30)
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+class TestDeadline(unittest.TestCase):
+    def test_clamps_timeout_to_remaining_budget(self):
+        connect, read = Deadline(2.0).clamp_timeout((10.0, None))
+
+        self.assertLessEqual(connect, 2.0)
+        self.assertLessEqual(read, 2.0)
+
+    def test_unbounded_deadline(self):
+        deadline = Deadline.resolve(None, RetryPolicy().deadline)
+
+        self.assertEqual(deadline.clamp_timeout((10.0, 300.0)), (10.0, 300.0))
+        self.assertTrue(deadline.allows(1e9))
+
+    def test_expired_deadline_raises(self):
+        with self.assertRaises(DeadlineExceeded):
+            Deadline(0.0).clamp_timeout((10.0, 300.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
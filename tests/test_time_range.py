@@ -0,0 +1,84 @@
+import datetime as dt
+import unittest
+
+import numpy as np
+
+from gimodules.cloudconnect.time_range import (
+    TimeRange,
+    format_timestamps,
+    to_epoch_ns,
+    to_time_range,
+)
+from gimodules.cloudconnect.utils import split_dates, split_time_range
+
+
+class TestTimeRange(unittest.TestCase):
+    def test_time_values_are_converted_to_ns(self):
+        # Arrange
+        expected = 1704067200_250_000_000
+
+        # Act
+        values = [
+            to_epoch_ns("2024-01-01 00:00:00.250"),
+            to_epoch_ns("2024-01-01T01:00:00.250+01:00"),
+            to_epoch_ns(dt.datetime(2024, 1, 1, 0, 0, 0, 250_000)),
+            to_epoch_ns(np.datetime64("2024-01-01T00:00:00.250")),
+            to_epoch_ns(1704067200250),
+            to_epoch_ns(1704067200.25, unit="s"),
+        ]
+
+        # Assert
+        self.assertEqual(values, [expected] * 6)
+        self.assertEqual(to_epoch_ns(np.datetime64("2024-01-01T00:00:00.250000001")), expected + 1)
+        with self.assertRaises(ValueError):
+            to_epoch_ns("not a date")
+        with self.assertRaises(ValueError):
+            TimeRange.parse("2024-01-02", "2024-01-01")
+        with self.assertRaises(ValueError):
+            to_time_range("2024-01-01")
+
+    def test_windows_are_gap_free(self):
+        # Arrange
+        time_range = TimeRange.parse("2024-01-30 12:00:00", "2024-03-02 00:00:00.5")
+
+        # Act
+        monthly = time_range.calendar_windows("monthly")
+        weekly = time_range.calendar_windows("weekly")
+        hourly = TimeRange.parse(0, 10_799_999).windows("1h")
+        split = TimeRange.parse(0, 9_999).split(3, step=1000)
+
+        # Assert
+        self.assertEqual(
+            format_timestamps([w.start_ns for w in monthly]),
+            ["2024-01-30 12:00:00", "2024-02-01 00:00:00", "2024-03-01 00:00:00"],
+        )
+        self.assertEqual(monthly[-1].end_ns, time_range.end_ns)
+        self.assertEqual(format_timestamps([weekly[1].start_ns]), ["2024-02-05 00:00:00"])
+        for windows in (monthly, weekly, hourly, split):
+            for window, following in zip(windows, windows[1:]):
+                self.assertEqual(window.end_ns + 1, following.start_ns)
+        self.assertEqual([(w.start_ms, w.end_ms) for w in hourly][1], (3_600_000, 7_199_999))
+        self.assertEqual([(w.start_ms, w.end_ms) for w in split], [
+            (0, 3_999), (4_000, 6_999), (7_000, 9_999)
+        ])
+
+    def test_utils_splits_match_the_previous_format(self):
+        # Act
+        dates = split_dates(dt.datetime(1997, 1, 1), dt.datetime(1997, 1, 1, 0, 0, 5), 3)
+        windows = split_time_range(0, 9, 4, step=2)
+
+        # Assert
+        self.assertEqual(
+            dates,
+            [
+                "1997-01-01 00:00:00",
+                "1997-01-01 00:00:01",
+                "1997-01-01 00:00:03",
+                "1997-01-01 00:00:05",
+            ],
+        )
+        self.assertEqual(windows, [(0, 1), (2, 5), (6, 7), (8, 9)])
+
+
+if __name__ == "__main__":
+    unittest.main()
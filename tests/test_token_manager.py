@@ -0,0 +1,90 @@
+import base64
+import json
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from gimodules.cloudconnect.token_manager import TokenManager, decode_jwt_expiry
+
+
+def make_jwt(exp):
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'HS256'})}.{encode({'exp': exp})}.signature"
+
+
+class TestTokenManager(unittest.TestCase):
+    def test_decode_jwt_expiry(self):
+        self.assertEqual(decode_jwt_expiry(make_jwt(1700000000)), 1700000000.0)
+        self.assertIsNone(decode_jwt_expiry("not-a-jwt"))
+        self.assertIsNone(decode_jwt_expiry(None))
+
+    def test_refreshes_proactively_before_expiry(self):
+        # Arrange
+        refresh_func = Mock(return_value=(make_jwt(time.time() + 3600), "refresh2"))
+        manager = TokenManager(refresh_func=refresh_func, refresh_margin=60)
+        manager.set_tokens(make_jwt(time.time() + 30), "refresh1")
+
+        # Act
+        header = manager.auth_header()
+
+        # Assert
+        refresh_func.assert_called_once_with("refresh1")
+        self.assertEqual(header, {"Authorization": f"Bearer {manager.access_token}"})
+        self.assertEqual(manager.refresh_token, "refresh2")
+        self.assertFalse(manager.needs_refresh())
+
+    def test_failed_proactive_refresh_backs_off(self):
+        # Arrange
+        refresh_func = Mock(return_value=None)
+        manager = TokenManager(refresh_func=refresh_func, refresh_margin=60, refresh_backoff=30)
+        token = make_jwt(time.time() + 30)
+        manager.set_tokens(token, "refresh")
+
+        # Act
+        tokens = [manager.get_access_token() for _ in range(5)]
+        reactive = manager.refresh(token)
+
+        # Assert
+        self.assertEqual(tokens, [token] * 5)
+        self.assertFalse(reactive)
+        self.assertEqual(refresh_func.call_count, 2)
+
+    def test_concurrent_refreshes_are_single_flight(self):
+        # Arrange
+        def slow_refresh(refresh_token):
+            time.sleep(0.05)
+            return "new-token", refresh_token
+
+        refresh_func = Mock(side_effect=slow_refresh)
+        manager = TokenManager(refresh_func=refresh_func)
+        manager.set_tokens("old-token", "refresh")
+        results = []
+
+        # Act
+        threads = [
+            threading.Thread(target=lambda: results.append(manager.refresh("old-token")))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        refresh_func.assert_called_once()
+        self.assertEqual(results, [True] * 8)
+        self.assertEqual(manager.access_token, "new-token")
+
+    def test_refresh_without_refresh_token_fails(self):
+        manager = TokenManager(refresh_func=Mock())
+        manager.set_tokens("token")
+
+        self.assertFalse(manager.refresh("token"))
+        manager.refresh_func.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
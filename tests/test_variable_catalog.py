@@ -0,0 +1,69 @@
+import unittest
+
+from gimodules.cloudconnect.cloud_request import GIStreamVariable
+from gimodules.cloudconnect.variable_catalog import VariableCatalog
+
+
+def make_variable(sid, index, unit="V", data_type="Float"):
+    return GIStreamVariable(f"{sid}-{index}", f"Var {index}", index, unit, data_type, sid)
+
+
+class TestVariableCatalog(unittest.TestCase):
+    def setUp(self):
+        self.variables = {
+            f"Stream {sid}__Var {index}": make_variable(sid, index)
+            for sid in ("s1", "s2")
+            for index in ("a1", "a2", "a10")
+        }
+
+    def test_indexes_follow_changes_of_the_catalog(self):
+        # Arrange
+        catalog = VariableCatalog(self.variables)
+        catalog.find(sid="s1", index="a1")
+        catalog.find(unit="A")
+
+        # Act
+        catalog["Stream s1__Var a1"] = make_variable("s1", "a1", unit="A")
+        del catalog["Stream s2__Var a2"]
+        catalog["Stream s3__Var a1"] = make_variable("s3", "a1", unit="A")
+
+        # Assert
+        self.assertEqual(
+            catalog.find_names(unit="A"), ["Stream s1__Var a1", "Stream s3__Var a1"]
+        )
+        self.assertEqual([var.id for var in catalog.find(sid="s2")], ["s2-a1", "s2-a10"])
+        self.assertEqual(catalog.find_names(sid="s1", id="s1-a10"), ["Stream s1__Var a10"])
+        self.assertEqual(catalog.find(sid="s2", index="a2"), [])
+        # Fields without an index are compared on the matches of the indexed ones
+        self.assertEqual(len(catalog.find(sid="s1", name="Var a2")), 1)
+        self.assertEqual(len(catalog.find(name="Var a1")), 3)
+        self.assertEqual(len(catalog), 6)
+        with self.assertRaises(ValueError):
+            catalog.find()
+
+    def test_search_matches_substrings_in_insertion_order(self):
+        # Arrange
+        catalog = VariableCatalog(self.variables)
+
+        # Act
+        long_text = catalog.search("Var a1")
+        short_text = catalog.search("a2")
+        several = catalog.search(["s2__Var a10", "s1__"])
+        catalog["Stream s0__Var a1"] = make_variable("s0", "a1")
+        added = catalog.search("Var a1")
+
+        # Assert
+        expected = [name for name in self.variables if "Var a1" in name]
+        self.assertEqual(long_text, expected)
+        self.assertEqual(short_text, ["Stream s1__Var a2", "Stream s2__Var a2"])
+        self.assertEqual(
+            several,
+            ["Stream s1__Var a1", "Stream s1__Var a2", "Stream s1__Var a10", "Stream s2__Var a10"],
+        )
+        self.assertEqual(added, expected + ["Stream s0__Var a1"])
+        self.assertEqual(catalog.search("missing"), [])
+        self.assertEqual(catalog, dict(catalog))
+
+
+if __name__ == "__main__":
+    unittest.main()